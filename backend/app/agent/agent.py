@@ -1,12 +1,21 @@
 """Pydantic AI Agent for submitting apps to Show Your App."""
 
+from typing import Optional
+
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers.openai import OpenAIProvider
+from pydantic_ai.usage import RunUsage
 
 from app.agent.deps import AgentDeps
-from app.agent.tools import ALL_TOOLS
-from app.agent.browser import cleanup_browser
+from app.agent.tools import ALL_TOOLS, MAX_BROWSER_STEPS
+from app.agent.telemetry import instrument_tool
+from app.agent.browser import release_browser
+from app.agent.llm_cache import CachedModel, LLMResponseCache
+from app.agent.retry import JobRetryState, backoff_delay, classify_error
+from app.services.facets import invalidate_facets
+from app.services.og_cache import app_tag, og_cache
+from app.services.taxonomy import taxonomy_cache, user_apps_key
 from app.core.config import settings
 
 
@@ -124,15 +133,19 @@ def _create_agent() -> Agent[AgentDeps, str]:
         # Fall back to default OpenAI (requires OPENAI_API_KEY env var)
         model = OpenAIChatModel(settings.AGENT_MODEL)
     
+    if settings.LLM_CACHE_MODE != "off":
+        cache = LLMResponseCache(settings.LLM_CACHE_PATH, settings.LLM_CACHE_TTL_SECONDS)
+        model = CachedModel(model, cache, mode=settings.LLM_CACHE_MODE)
+    
     agent = Agent(
         model,
         deps_type=AgentDeps,
         system_prompt=SYSTEM_PROMPT,
     )
     
-    # Register all tools
+    # Register all tools, timed into the run profile
     for tool_func in ALL_TOOLS:
-        agent.tool(tool_func)
+        agent.tool(instrument_tool(tool_func))
     
     return agent
 
@@ -149,69 +162,117 @@ def get_agent() -> Agent[AgentDeps, str]:
     return _agent
 
 
-async def run_agent(prompt: str, deps: AgentDeps) -> dict:
+async def run_agent(prompt: str, deps: AgentDeps, retry_state: Optional[JobRetryState] = None) -> dict:
     """Run the agent with a user prompt.
     
+    Failed attempts are classified (see ``app.agent.retry``): deterministic
+    errors fail immediately, rate limits and transient errors are retried
+    with jittered backoff.
+    
     Args:
         prompt: The user's input (e.g., Reddit post with app link)
         deps: Agent dependencies with DB session and user context
+        retry_state: Retry budget and circuit breaker shared across a job
         
     Returns:
-        Dict with result text and created app IDs.
+        Dict with result text, created app IDs and the run profile.
     """
     import asyncio
+    import time
     import traceback
     import logging
     
     logger = logging.getLogger(__name__)
     agent = get_agent()
     
-    # Retry delays in seconds: 1s, 5s, 15s, 30s, 60s, 300s
-    retry_delays = [1, 5, 15, 30, 60, 300]
+    max_retries = settings.AGENT_MAX_RETRIES
     last_error = None
     last_trace = None
     
-    for attempt in range(len(retry_delays) + 1):  # +1 for initial attempt
-        try:
-            logger.info(f"Starting agent run for user {deps.user_id} (attempt {attempt + 1})")
-            result = await agent.run(prompt, deps=deps)
-            
-            # Commit any database changes
-            await deps.db.commit()
-            
-            logger.info(f"Agent run completed. Created apps: {deps.created_app_ids}")
-            
-            await cleanup_browser()
-            return {
-                "success": True,
-                "result": result.output,  # pydantic-ai uses .output not .data
-                "app_ids": deps.created_app_ids,
-            }
-        except Exception as e:
-            last_error = e
-            last_trace = traceback.format_exc()
-            
-            # Check if we have retries left
-            if attempt < len(retry_delays):
-                delay = retry_delays[attempt]
-                logger.warning(
-                    f"Agent run failed (attempt {attempt + 1}): {e}. "
-                    f"Retrying in {delay}s..."
-                )
-                await deps.db.rollback()
-                await asyncio.sleep(delay)
-            else:
-                # No more retries
-                logger.error(f"Agent run failed after {attempt + 1} attempts: {e}\n{last_trace}")
-                await deps.db.rollback()
+    # Shared across attempts so failed attempts' tokens are counted too
+    usage = RunUsage()
+    profile = deps.profile
+    profile.browser_step_limit = MAX_BROWSER_STEPS
+    started = time.perf_counter()
     
-    # All retries exhausted
-    await cleanup_browser()
-    return {
-        "success": False,
-        "error": f"{type(last_error).__name__}: {str(last_error)}\n\nTraceback:\n{last_trace}",
-        "app_ids": [],
-    }
+    def finish_profile() -> dict:
+        profile.record_usage(usage)
+        profile.browser_steps = deps.browser_step_count
+        profile.duration_ms = (time.perf_counter() - started) * 1000
+        return profile.to_dict()
     
-    # Note: finally block removed since we need different cleanup paths
-    # Browser cleanup happens after all retries are exhausted or on success
+    try:
+        for attempt in range(max_retries + 1):  # +1 for initial attempt
+            profile.attempts = attempt + 1
+            # The previous attempt's writes were rolled back; don't report or re-upload them
+            deps.created_app_ids = []
+            deps.changed_app_ids = set()
+            deps.saved_screenshots.clear()
+            try:
+                logger.info(f"Starting agent run for user {deps.user_id} (attempt {attempt + 1})")
+                result = await agent.run(prompt, deps=deps, usage=usage)
+                
+                # Commit any database changes
+                await deps.db.commit()
+                if deps.changed_app_ids:
+                    taxonomy_cache.invalidate(user_apps_key(deps.user_id))
+                    og_cache.invalidate(*(app_tag(app_id) for app_id in deps.changed_app_ids))
+                    invalidate_facets()
+                if retry_state:
+                    retry_state.breaker.record_success()
+                
+                logger.info(f"Agent run completed. Created apps: {deps.created_app_ids}")
+                
+                return {
+                    "success": True,
+                    "result": result.output,  # pydantic-ai uses .output not .data
+                    "app_ids": deps.created_app_ids,
+                    "profile": finish_profile(),
+                }
+            except Exception as e:
+                last_error = e
+                last_trace = traceback.format_exc()
+                await deps.db.rollback()
+                
+                decision = classify_error(e)
+                profile.error_kinds.append(decision.kind)
+                if retry_state:
+                    if decision.endpoint_failure:
+                        retry_state.breaker.record_failure()
+                    elif decision.from_model:
+                        # The endpoint answered; the request itself was bad
+                        retry_state.breaker.record_success()
+                    else:
+                        retry_state.breaker.release_trial()
+                
+                if not decision.retryable:
+                    logger.error(f"Agent run failed with non-retryable {type(e).__name__}: {e}")
+                    break
+                if attempt >= max_retries:
+                    logger.error(f"Agent run failed after {attempt + 1} attempts: {e}\n{last_trace}")
+                    break
+                if retry_state and not retry_state.budget.take():
+                    logger.error(f"Agent run failed ({e}); job retry budget exhausted")
+                    break
+                
+                if retry_state and retry_state.breaker.is_open:
+                    logger.warning("Model endpoint circuit open; waiting before retrying")
+                    if not await retry_state.breaker.wait_until_closed(settings.AGENT_CIRCUIT_MAX_PAUSE_SECONDS):
+                        break
+                else:
+                    delay = backoff_delay(attempt, decision)
+                    logger.warning(
+                        f"Agent run failed (attempt {attempt + 1}, {decision.kind}): {e}. "
+                        f"Retrying in {delay:.1f}s..."
+                    )
+                    await asyncio.sleep(delay)
+        
+        return {
+            "success": False,
+            "error": f"{type(last_error).__name__}: {str(last_error)}\n\nTraceback:\n{last_trace}",
+            "app_ids": [],
+            "profile": finish_profile(),
+        }
+    finally:
+        # Cancellation or a failing rollback must not leak the pooled browser lease
+        await release_browser(deps)
@@ -1,54 +1,142 @@
 """Browser automation utilities using Playwright for the agent."""
 
 import asyncio
+import logging
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
+from urllib.parse import urlparse
 
-from playwright.async_api import async_playwright, Browser, Page
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Request, Route
 
+from app.core.config import settings
+from app.services.images import FORMAT_EXTENSIONS, encode_image_async
 
-class BrowserManager:
-    """Manages Playwright browser instance for agent automation."""
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestPolicy:
+    """Which requests an agent page may make and how navigation waits."""
     
-    def __init__(self, headless: bool = True):
-        self.headless = headless
-        self._playwright = None
-        self._browser: Optional[Browser] = None
-        self._page: Optional[Page] = None
+    blocked_resource_types: frozenset[str] = frozenset()
+    blocked_hosts: frozenset[str] = frozenset()
+    max_transfer_bytes: int = 0  # 0 = unlimited
+    wait_strategy: str = "domcontentloaded"  # or "networkidle"
+    network_idle_deadline_ms: int = 5000
+    navigation_timeout_ms: int = 30000
+    
+    @classmethod
+    def from_settings(cls) -> "RequestPolicy":
+        return cls(
+            blocked_resource_types=frozenset(settings.agent_blocked_resource_types_list),
+            blocked_hosts=frozenset(settings.agent_blocked_hosts_list),
+            max_transfer_bytes=settings.AGENT_MAX_TRANSFER_BYTES,
+            wait_strategy=settings.AGENT_WAIT_STRATEGY,
+            network_idle_deadline_ms=settings.AGENT_NETWORK_IDLE_DEADLINE_MS,
+            navigation_timeout_ms=settings.AGENT_NAVIGATION_TIMEOUT_MS,
+        )
+    
+    def is_blocked_host(self, url: str) -> bool:
+        """Check the request host (and its parent domains) against the blocklist."""
+        host = (urlparse(url).hostname or "").lower()
+        while host:
+            if host in self.blocked_hosts:
+                return True
+            _, _, host = host.partition(".")
+        return False
+
+
+class BrowserSession:
+    """An isolated browser context and page leased to a single agent run."""
+    
+    def __init__(self, context: BrowserContext, page: Page, policy: Optional[RequestPolicy] = None):
+        self._context = context
+        self._page: Optional[Page] = page
         self._screenshot_dir = Path(tempfile.mkdtemp(prefix="agent_screenshots_"))
+        self.policy = policy or RequestPolicy()
+        self.blocked_requests = 0
+        self.transferred_bytes = 0
     
-    async def start(self) -> None:
-        """Initialize browser if not already running."""
-        if self._browser is None:
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(headless=self.headless)
-            self._page = await self._browser.new_page()
+    @property
+    def budget_exceeded(self) -> bool:
+        return 0 < self.policy.max_transfer_bytes <= self.transferred_bytes
     
-    async def stop(self) -> None:
-        """Close browser and cleanup."""
-        if self._browser:
-            await self._browser.close()
-            self._browser = None
-            self._page = None
-        if self._playwright:
-            await self._playwright.stop()
-            self._playwright = None
+    async def install_routing(self) -> None:
+        """Route every request of this context through the request policy."""
+        await self._context.route("**/*", self._handle_route)
+        self._page.on("requestfinished", self._record_transfer)
+    
+    async def _handle_route(self, route: Route) -> None:
+        request = route.request
+        blocked = (
+            request.resource_type in self.policy.blocked_resource_types
+            or self.policy.is_blocked_host(request.url)
+            # Once over budget only top-level documents may still load
+            or (self.budget_exceeded and request.resource_type != "document")
+        )
+        if blocked:
+            self.blocked_requests += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
     
-    async def navigate(self, url: str, timeout: int = 30000) -> dict:
+    async def _record_transfer(self, request: Request) -> None:
+        # Bytes actually received, so chunked responses without a
+        # content-length header count too
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            logger.debug(f"No transfer sizes for {request.url}", exc_info=True)
+            return
+        self.transferred_bytes += sizes["responseHeadersSize"] + sizes["responseBodySize"]
+    
+    def is_healthy(self) -> bool:
+        """Check that the page is still usable."""
+        return self._page is not None and not self._page.is_closed()
+    
+    async def close(self) -> None:
+        """Close the context (and its page)."""
+        try:
+            await self._context.close()
+        except Exception:
+            logger.debug("Browser context already closed", exc_info=True)
+        self._page = None
+    
+    async def navigate(self, url: str, timeout: Optional[int] = None) -> dict:
         """Navigate to a URL and wait for load.
         
+        With the "networkidle" strategy the page first reaches
+        DOMContentLoaded, then gets up to ``network_idle_deadline_ms`` to go
+        idle; pages that never settle (polling, websockets) are used as-is.
+        
         Returns:
             Dict with status and page title.
         """
-        await self.start()
+        if not self._page:
+            return {"success": False, "error": "Browser not started"}
+        
         try:
-            await self._page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+            await self._page.goto(
+                url,
+                timeout=timeout or self.policy.navigation_timeout_ms,
+                wait_until="domcontentloaded",
+            )
+            if self.policy.wait_strategy == "networkidle":
+                try:
+                    await self._page.wait_for_load_state(
+                        "networkidle", timeout=self.policy.network_idle_deadline_ms
+                    )
+                except Exception:
+                    logger.debug(f"Network not idle after deadline for {url}")
             title = await self._page.title()
             return {
                 "success": True,
                 "url": self._page.url,
                 "title": title,
+                "blocked_requests": self.blocked_requests,
+                "transferred_bytes": self.transferred_bytes,
             }
         except Exception as e:
             return {
@@ -59,8 +147,12 @@ class BrowserManager:
     async def take_screenshot(self, name: str = "screenshot") -> dict:
         """Take a screenshot of the current page.
         
+        The capture is lossless; encoding to the configured media format,
+        plus the thumbnail and OG variants, happens in the image thread pool.
+        
         Returns:
-            Dict with file path and success status.
+            Dict with file path, dimensions, success status and the
+            EncodedImage under "image".
         """
         if not self._page:
             return {"success": False, "error": "Browser not started"}
@@ -71,13 +163,16 @@ class BrowserManager:
             if not safe_name:
                 safe_name = "screenshot"
             
-            file_path = self._screenshot_dir / f"{safe_name}.png"
-            await self._page.screenshot(path=str(file_path), full_page=False)
+            data = await self._page.screenshot(full_page=False)
+            image = await encode_image_async(data, self._screenshot_dir, safe_name)
             
             return {
                 "success": True,
-                "file_path": str(file_path),
-                "size_bytes": file_path.stat().st_size,
+                "file_path": image.path,
+                "width": image.width,
+                "height": image.height,
+                "size_bytes": image.size_bytes,
+                "image": image,
             }
         except Exception as e:
             return {
@@ -168,24 +263,207 @@ class BrowserManager:
     def get_screenshot_path(self, name: str) -> Path:
         """Get the path where a screenshot would be saved."""
         safe_name = "".join(c for c in name if c.isalnum() or c in "._-") or "screenshot"
-        return self._screenshot_dir / f"{safe_name}.png"
+        ext = FORMAT_EXTENSIONS.get(settings.MEDIA_IMAGE_FORMAT.lower(), ".webp")
+        return self._screenshot_dir / f"{safe_name}{ext}"
+
+
+class BrowserPool:
+    """Long-lived Chromium processes handing out isolated contexts.
+    
+    At most ``max_contexts`` sessions are leased at a time; further
+    ``acquire()`` calls wait. Every run gets a fresh ``BrowserContext`` so
+    cookies and storage never leak between runs.
+    
+    New sessions come from the current browser. It is retired when it has
+    served ``max_uses`` contexts, disconnects, or hands out (or gets back) a
+    session whose page is no longer usable; a fresh process is launched for
+    the next session. A retired browser drains: it closes once its last
+    leased session is released, so recycling works under sustained load.
+    """
+    
+    def __init__(
+        self,
+        headless: bool = True,
+        max_contexts: int = 3,
+        max_uses: int = 50,
+        policy: Optional[RequestPolicy] = None,
+    ):
+        self.headless = headless
+        self.policy = policy or RequestPolicy()
+        self.max_contexts = max_contexts
+        self.max_uses = max_uses
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._active = 0
+        self._uses = 0
+        # Leased sessions per browser, the browser of each session, and browsers draining
+        self._leases: dict[Browser, int] = {}
+        self._session_browsers: dict[BrowserSession, Browser] = {}
+        self._retired: set[Browser] = set()
+    
+    @property
+    def active(self) -> int:
+        """Number of sessions currently leased."""
+        return self._active
+    
+    async def _launch_browser(self) -> Browser:
+        """Start Playwright (once) and launch Chromium."""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=self.headless)
+    
+    async def _close_browser(self, browser: Browser) -> None:
+        try:
+            await browser.close()
+        except Exception:
+            logger.debug("Browser already closed", exc_info=True)
+    
+    async def _retire(self, browser: Browser) -> None:
+        """Stop leasing from ``browser``; close it once its sessions are back. Needs ``_lock``."""
+        if browser is self._browser:
+            self._browser = None
+            self._uses = 0
+        if self._leases.get(browser, 0) > 0:
+            self._retired.add(browser)
+        else:
+            self._leases.pop(browser, None)
+            self._retired.discard(browser)
+            await self._close_browser(browser)
+    
+    async def _return_lease(self, browser: Browser) -> None:
+        """Give back one lease on ``browser``, closing it if it was draining. Needs ``_lock``."""
+        self._leases[browser] = self._leases.get(browser, 1) - 1
+        if self._leases[browser] <= 0 and browser in self._retired:
+            await self._retire(browser)
+    
+    async def _lease_browser(self) -> Browser:
+        """Take a lease on a connected browser, relaunching or recycling it first if due."""
+        async with self._lock:
+            if self._browser is not None and not self._browser.is_connected():
+                logger.warning("Browser disconnected, relaunching")
+                await self._retire(self._browser)
+            if self._browser is None:
+                self._browser = await self._launch_browser()
+                self._uses = 0
+            self._uses += 1
+            self._leases[self._browser] = self._leases.get(self._browser, 0) + 1
+            return self._browser
+    
+    async def _open_session(self, browser: Browser) -> BrowserSession:
+        context = await browser.new_context()
+        try:
+            page = await context.new_page()
+            session = BrowserSession(context, page, self.policy)
+            await session.install_routing()
+        except Exception:
+            await context.close()
+            raise
+        return session
+    
+    async def acquire(self) -> BrowserSession:
+        """Lease a fresh, healthy session, waiting if the pool is exhausted."""
+        await self._semaphore.acquire()
+        try:
+            # A second try on a fresh browser if the first session is unusable
+            for _ in range(2):
+                browser = await self._lease_browser()
+                try:
+                    session = await self._open_session(browser)
+                except BaseException:
+                    async with self._lock:
+                        await self._return_lease(browser)
+                    raise
+                if session.is_healthy():
+                    break
+                logger.warning("New browser session is unhealthy; replacing the browser")
+                await session.close()
+                async with self._lock:
+                    await self._retire(browser)
+                    await self._return_lease(browser)
+            else:
+                raise RuntimeError("Could not open a healthy browser session")
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._session_browsers[session] = browser
+        self._active += 1
+        return session
+    
+    async def release(self, session: BrowserSession) -> None:
+        """Close a leased session; retire its browser if it is unhealthy or due for recycling."""
+        try:
+            healthy = session.is_healthy()
+            await session.close()
+            self._active -= 1
+            browser = self._session_browsers.pop(session, None)
+            if browser is None:
+                return
+            async with self._lock:
+                if not healthy:
+                    logger.warning("Browser session ended unhealthy; replacing the browser")
+                    await self._retire(browser)
+                elif browser is self._browser and self._uses >= self.max_uses:
+                    logger.info(f"Recycling browser after {self._uses} contexts")
+                    await self._retire(browser)
+                await self._return_lease(browser)
+        finally:
+            self._semaphore.release()
+    
+    async def stop(self) -> None:
+        """Close every browser and stop Playwright."""
+        async with self._lock:
+            browsers = set(self._leases) | self._retired
+            if self._browser is not None:
+                browsers.add(self._browser)
+            for browser in browsers:
+                await self._close_browser(browser)
+            self._browser = None
+            self._uses = 0
+            self._leases.clear()
+            self._retired.clear()
+            self._session_browsers.clear()
+            if self._playwright:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+# Process-wide pool shared by all agent runs
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """Get or create the process-wide browser pool."""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            headless=headless,
+            max_contexts=settings.AGENT_BROWSER_POOL_SIZE,
+            max_uses=settings.AGENT_BROWSER_MAX_USES,
+            policy=RequestPolicy.from_settings(),
+        )
+    return _browser_pool
 
 
-# Global browser manager instance (created per agent run)
-_browser_manager: Optional[BrowserManager] = None
+async def get_browser(deps) -> BrowserSession:
+    """Get the browser session for an agent run, leasing one on first use."""
+    if deps._browser is None:
+        deps._browser = await get_browser_pool(headless=deps.headless).acquire()
+    return deps._browser
 
 
-async def get_browser(headless: bool = True) -> BrowserManager:
-    """Get or create a browser manager instance."""
-    global _browser_manager
-    if _browser_manager is None:
-        _browser_manager = BrowserManager(headless=headless)
-    return _browser_manager
+async def release_browser(deps) -> None:
+    """Return an agent run's browser session to the pool."""
+    session = deps._browser
+    if session is not None:
+        deps._browser = None
+        await get_browser_pool(headless=deps.headless).release(session)
 
 
-async def cleanup_browser() -> None:
-    """Cleanup the global browser instance."""
-    global _browser_manager
-    if _browser_manager:
-        await _browser_manager.stop()
-        _browser_manager = None
+async def shutdown_browser_pool() -> None:
+    """Stop the process-wide browser pool (on application shutdown)."""
+    global _browser_pool
+    if _browser_pool:
+        await _browser_pool.stop()
+        _browser_pool = None
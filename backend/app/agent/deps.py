@@ -5,7 +5,10 @@ from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.agent.page_cache import PageSnapshot
+from app.agent.telemetry import RunProfile
 from app.core.config import settings
+from app.services.images import EncodedImage
 
 
 @dataclass
@@ -25,13 +28,22 @@ class AgentDeps:
     
     # Track created app IDs during the run
     created_app_ids: list[int] = field(default_factory=list)
+    # Apps the run created or edited (invalidates cached app lists and OG pages)
+    changed_app_ids: set[int] = field(default_factory=set)
     
     # Browser step tracking (limit: 10)
     browser_step_count: int = 0
     
-    # Track screenshots for auto-upload in create_app
-    saved_screenshots: list[str] = field(default_factory=list)
+    # Snapshot of the page last navigated to (None after click/scroll changed it)
+    current_page: Optional[PageSnapshot] = None
+    # URL served from the page cache that the real browser has not loaded yet
+    pending_navigation: Optional[str] = None
     
-    # Browser instance (lazy initialized)
+    # Track encoded screenshots for auto-upload in create_app
+    saved_screenshots: list[EncodedImage] = field(default_factory=list)
+    
+    # Token usage, tool latency and step counts for this run
+    profile: RunProfile = field(default_factory=RunProfile)
+    
+    # Browser session leased from the shared pool (lazy initialized)
     _browser: Optional[object] = field(default=None, repr=False)
-    _page: Optional[object] = field(default=None, repr=False)
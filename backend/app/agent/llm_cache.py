@@ -0,0 +1,174 @@
+"""
+Content-addressed cache of model requests and responses for the agent.
+
+Each model request is keyed by the SHA-256 of the model name, the message
+history and the tool schema, with volatile fields (timestamps, run ids, usage)
+stripped so identical conversations hash identically. Entries live in a local
+SQLite file and expire after a TTL.
+
+Modes (``LLM_CACHE_MODE``):
+- ``off``: no caching.
+- ``readwrite``: serve hits from the cache, call the model on a miss and
+  store the response. Re-runs and retries of the same post reuse responses.
+- ``replay``: serve hits only; a miss raises ``LLMCacheMiss`` instead of
+  calling the model, so runs are deterministic and network-free (tests).
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import TypeAdapter
+from pydantic_ai.messages import ModelMessage, ModelMessagesTypeAdapter, ModelResponse
+from pydantic_ai.models import Model, ModelRequestParameters
+from pydantic_ai.models.wrapper import WrapperModel
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.tools import ToolDefinition
+from pydantic_ai.usage import RequestUsage
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "readwrite", "replay")
+
+# Fields that differ between otherwise identical requests
+_VOLATILE_KEYS = frozenset({
+    "timestamp",
+    "run_id",
+    "conversation_id",
+    "usage",
+    "provider_response_id",
+    "provider_details",
+    "provider_url",
+})
+
+_response_adapter = TypeAdapter(ModelResponse)
+_tools_adapter = TypeAdapter(list[ToolDefinition])
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a request has no cached response."""
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v) for k, v in value.items() if k not in _VOLATILE_KEYS}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def cache_key(
+    model_name: str,
+    messages: list[ModelMessage],
+    model_request_parameters: ModelRequestParameters,
+) -> str:
+    """Stable hash of a model request."""
+    payload = {
+        "model": model_name,
+        "messages": _strip_volatile(ModelMessagesTypeAdapter.dump_python(messages, mode="json")),
+        "tools": _tools_adapter.dump_python(
+            list(model_request_parameters.function_tools), mode="json"
+        ),
+        "output_tools": _tools_adapter.dump_python(
+            list(model_request_parameters.output_tools), mode="json"
+        ),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed store of serialized model responses."""
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                "response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[ModelResponse]:
+        """Cached response for a key, or None if missing or expired. Blocking."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            return None
+        return _response_adapter.validate_json(response)
+
+    def set(self, key: str, model_name: str, response: ModelResponse) -> None:
+        """Store a response and prune expired entries. Blocking."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, model_name, _response_adapter.dump_json(response).decode(), now),
+            )
+            if self.ttl_seconds:
+                conn.execute(
+                    "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)
+                )
+            conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedModel(WrapperModel):
+    """Model wrapper that answers requests from an ``LLMResponseCache``."""
+
+    def __init__(self, wrapped: Model, cache: LLMResponseCache, mode: str = "readwrite"):
+        if mode not in CACHE_MODES or mode == "off":
+            raise ValueError(f"Unsupported LLM cache mode: {mode}")
+        super().__init__(wrapped)
+        self.cache = cache
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+
+    async def request(
+        self,
+        messages: list[ModelMessage],
+        model_settings: Optional[ModelSettings],
+        model_request_parameters: ModelRequestParameters,
+    ) -> ModelResponse:
+        key = cache_key(self.model_name, messages, model_request_parameters)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            self.hits += 1
+            # A cached answer costs no tokens
+            return dataclasses.replace(cached, usage=RequestUsage())
+
+        self.misses += 1
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No cached response for request {key[:12]} in replay mode")
+
+        response = await self.wrapped.request(messages, model_settings, model_request_parameters)
+        await asyncio.to_thread(self.cache.set, key, self.model_name, response)
+        return response
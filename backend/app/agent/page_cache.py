@@ -0,0 +1,198 @@
+"""
+Cache of pages the agent has visited, keyed by normalized URL.
+
+The same app link often shows up in several posts, and re-running a job
+visits every link again. A ``PageSnapshot`` records what the agent saw on a
+page: final URL, title, extracted text and a viewport screenshot of the page
+as loaded. On a hit, ``browser_navigate``/``browser_get_content``/
+``browser_screenshot`` answer from the snapshot without starting Chromium; the
+real browser only navigates when a tool needs the live page (click, scroll, or
+anything not cached yet).
+
+Snapshots live in a local SQLite file and expire after
+``AGENT_PAGE_CACHE_TTL_SECONDS`` (0, the default, disables the cache).
+Screenshot files are copied next to it and named after the page's normalized
+URL, so a snapshot never points into another session's temp directory.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.services.images import EncodedImage
+from app.utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageSnapshot:
+    """What the agent extracted from one page."""
+    url: str
+    final_url: str
+    title: str
+    content: Optional[str] = None
+    # EncodedImage fields of the viewport screenshot (files owned by the cache)
+    image: Optional[dict] = None
+
+    def screenshot(self) -> Optional[EncodedImage]:
+        """The cached screenshot if its files still exist, or None."""
+        if not self.image:
+            return None
+        image = EncodedImage(**self.image)
+        paths = [image.path, image.thumbnail_path, image.og_path]
+        if not all(Path(p).exists() for p in paths if p):
+            return None
+        return image
+
+
+def page_key(url: str) -> Optional[str]:
+    return normalize_url(url)
+
+
+class PageCache:
+    """SQLite-backed store of page snapshots. Methods are blocking."""
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.screenshot_dir = self.path.parent / f"{self.path.stem}_screenshots"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_snapshots ("
+                "key TEXT PRIMARY KEY, snapshot TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, url: str) -> Optional[PageSnapshot]:
+        """Snapshot for a URL, or None if missing or expired."""
+        key = page_key(url)
+        if not key:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT snapshot, created_at FROM page_snapshots WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        snapshot, created_at = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            return None
+        try:
+            return PageSnapshot(**json.loads(snapshot))
+        except (TypeError, ValueError):
+            logger.warning(f"Discarding unreadable page snapshot for {key}")
+            return None
+
+    def put(self, snapshot: PageSnapshot) -> None:
+        """Store a snapshot (replacing any older one) and prune expired entries."""
+        key = page_key(snapshot.url)
+        if not key:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO page_snapshots (key, snapshot, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(asdict(snapshot)), now),
+            )
+            expired = []
+            if self.ttl_seconds:
+                cutoff = now - self.ttl_seconds
+                expired = [
+                    k for (k,) in conn.execute("SELECT key FROM page_snapshots WHERE created_at < ?", (cutoff,))
+                ]
+                conn.execute("DELETE FROM page_snapshots WHERE created_at < ?", (cutoff,))
+            conn.commit()
+        for expired_key in expired:
+            self._remove_screenshot(expired_key)
+
+    def _screenshot_stem(self, key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    def _remove_screenshot(self, key: str) -> None:
+        if not self.screenshot_dir.is_dir():
+            return
+        for path in self.screenshot_dir.glob(f"{self._screenshot_stem(key)}*"):
+            path.unlink(missing_ok=True)
+
+    def store_screenshot(self, snapshot: PageSnapshot, image: EncodedImage) -> None:
+        """Copy a session's screenshot into the cache and attach it to the snapshot.
+
+        Files are named after the page's normalized URL and replaced
+        atomically, so re-caching a page overwrites its previous screenshot.
+        """
+        key = page_key(snapshot.url)
+        if not key:
+            return
+        self.screenshot_dir.mkdir(parents=True, exist_ok=True)
+        stem = self._screenshot_stem(key)
+
+        def copy(src: Optional[str], variant: str) -> Optional[str]:
+            if not src:
+                return None
+            dest = self.screenshot_dir / f"{stem}{variant}{Path(src).suffix}"
+            fd, tmp = tempfile.mkstemp(dir=self.screenshot_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, dest)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            return str(dest)
+
+        cached = replace(
+            image,
+            path=copy(image.path, ""),
+            thumbnail_path=copy(image.thumbnail_path, "_thumb"),
+            og_path=copy(image.og_path, "_og"),
+        )
+        snapshot.image = asdict(cached)
+
+    async def aget(self, url: str) -> Optional[PageSnapshot]:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aput(self, snapshot: PageSnapshot) -> None:
+        await asyncio.to_thread(self.put, snapshot)
+
+    async def astore_screenshot(self, snapshot: PageSnapshot, image: EncodedImage) -> None:
+        await asyncio.to_thread(self.store_screenshot, snapshot, image)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Process-wide cache (None when disabled)
+_page_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Get or create the process-wide page cache."""
+    global _page_cache
+    if settings.AGENT_PAGE_CACHE_TTL_SECONDS <= 0:
+        return None
+    if _page_cache is None:
+        _page_cache = PageCache(settings.AGENT_PAGE_CACHE_PATH, settings.AGENT_PAGE_CACHE_TTL_SECONDS)
+    return _page_cache
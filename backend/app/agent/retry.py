@@ -0,0 +1,243 @@
+"""
+Retry policy for agent runs.
+
+Errors are classified before deciding whether to retry:
+- ``rate_limited``: HTTP 429; wait at least the server's Retry-After.
+- ``transient``: network failures, timeouts and 5xx responses.
+- ``fatal``: validation errors, other 4xx responses and model misbehaviour.
+  These are deterministic, so the run fails immediately.
+
+Retries use capped exponential backoff with full jitter. All posts in an
+ingestion job draw from one ``RetryBudget``, and a ``CircuitBreaker`` pauses
+the job when the model endpoint keeps failing instead of burning through
+the remaining posts. Only errors raised by the model request itself count
+towards the breaker; a browser timeout or a failing tool request is retried
+but says nothing about the endpoint.
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+import openai
+from pydantic import ValidationError
+from pydantic_ai.exceptions import ModelAPIError, UnexpectedModelBehavior, UsageLimitExceeded, UserError
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.agent.llm_cache import LLMCacheMiss
+from app.core.config import settings
+
+RATE_LIMITED = "rate_limited"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+_RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+
+# Errors from the model endpoint: its request (openai client or pydantic-ai's
+# wrapper) or a response the agent could not use
+_MODEL_TYPES = (
+    openai.APIError,
+    ModelAPIError,
+    UnexpectedModelBehavior,
+)
+
+_TRANSIENT_TYPES = (
+    httpx.TransportError,
+    openai.APIConnectionError,
+    TimeoutError,
+    ConnectionError,
+)
+
+_FATAL_TYPES = (
+    ValidationError,
+    UnexpectedModelBehavior,
+    UsageLimitExceeded,
+    UserError,
+    LLMCacheMiss,
+    IntegrityError,
+    DataError,
+)
+
+
+@dataclass
+class RetryDecision:
+    """Outcome of classifying one failed attempt."""
+    kind: str
+    retry_after: Optional[float] = None
+    # Raised by the model request rather than by a tool, the browser or the DB
+    from_model: bool = False
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind != FATAL
+
+    @property
+    def endpoint_failure(self) -> bool:
+        """Whether the failure points at the model endpoint being unavailable."""
+        return self.from_model and self.kind in (RATE_LIMITED, TRANSIENT)
+
+
+def _retry_after_seconds(headers) -> Optional[float]:
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _headers_of(exc: BaseException):
+    headers = getattr(exc, "headers", None)
+    if headers:
+        return headers
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None)
+
+
+def _error_chain(exc: BaseException):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def classify_error(exc: BaseException) -> RetryDecision:
+    """Classify an exception raised by an agent run (or anything it wraps)."""
+    chain = list(_error_chain(exc))
+    from_model = any(isinstance(err, _MODEL_TYPES) for err in chain)
+    for err in chain:
+        status = getattr(err, "status_code", None)
+        if isinstance(status, int):
+            if status == 429:
+                return RetryDecision(RATE_LIMITED, _retry_after_seconds(_headers_of(err)), from_model)
+            if status in _RETRYABLE_STATUS or status >= 500:
+                return RetryDecision(TRANSIENT, _retry_after_seconds(_headers_of(err)), from_model)
+            if 400 <= status < 500:
+                return RetryDecision(FATAL, from_model=from_model)
+        if isinstance(err, _TRANSIENT_TYPES):
+            return RetryDecision(TRANSIENT, from_model=from_model)
+        if isinstance(err, _FATAL_TYPES):
+            return RetryDecision(FATAL, from_model=from_model)
+    # Unknown errors keep the previous behaviour of being retried
+    return RetryDecision(TRANSIENT, from_model=from_model)
+
+
+def backoff_delay(
+    attempt: int,
+    decision: RetryDecision,
+    base: Optional[float] = None,
+    cap: Optional[float] = None,
+) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After."""
+    base = settings.AGENT_RETRY_BASE_DELAY if base is None else base
+    cap = settings.AGENT_RETRY_MAX_DELAY if cap is None else cap
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if decision.retry_after is not None:
+        delay = max(delay, min(decision.retry_after, cap))
+    return delay
+
+
+class RetryBudget:
+    """Retries shared by every post of one job."""
+
+    def __init__(self, total: int):
+        self.remaining = total
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+class CircuitBreaker:
+    """Stops sending work to the model endpoint after repeated failures.
+
+    After ``failure_threshold`` consecutive endpoint failures the breaker
+    opens for ``cooldown`` seconds. Callers wait in ``wait_until_closed``;
+    afterwards one trial run is let through (half-open). A success closes the
+    breaker, a failure reopens it. A trial caller that ends without reaching
+    the model (cancelled, skipped, failed elsewhere) must hand the trial back
+    with ``release_trial`` so the next waiter can try.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._trial_task: Optional[asyncio.Task] = None
+
+    @property
+    def _trial_running(self) -> bool:
+        return self._trial_task is not None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def record_success(self) -> None:
+        """Record that the endpoint answered (even if the run failed for other reasons)."""
+        self.failures = 0
+        self.opened_at = None
+        self._trial_task = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+            self._trial_task = None
+
+    def release_trial(self) -> None:
+        """Give back the half-open trial if the current task holds it."""
+        if self._trial_task is not None and self._trial_task is asyncio.current_task():
+            self._trial_task = None
+
+    async def wait_until_closed(self, max_wait: Optional[float] = None) -> bool:
+        """Wait while the breaker is open. Returns False if ``max_wait`` ran out."""
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while self.is_open:
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining <= 0 and not self._trial_running:
+                # Half-open: let this caller through as the trial run
+                self._trial_task = asyncio.current_task()
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            wait = remaining if remaining > 0 else 0.5
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            await asyncio.sleep(max(wait, 0.01))
+        return True
+
+
+@dataclass
+class JobRetryState:
+    """Retry budget and circuit breaker shared by the posts of one job."""
+    budget: RetryBudget
+    breaker: CircuitBreaker
+
+    @classmethod
+    def from_settings(cls) -> "JobRetryState":
+        return cls(
+            budget=RetryBudget(settings.AGENT_JOB_RETRY_BUDGET),
+            breaker=CircuitBreaker(
+                failure_threshold=settings.AGENT_CIRCUIT_FAILURE_THRESHOLD,
+                cooldown=settings.AGENT_CIRCUIT_COOLDOWN_SECONDS,
+            ),
+        )
@@ -0,0 +1,183 @@
+"""
+Per-run telemetry for the submission agent.
+
+A ``RunProfile`` rides along in ``AgentDeps`` and records model token usage,
+per-tool call counts and latency histograms, browser steps used against the
+step limit, and retry attempts. Profiles are stored as plain dicts with the
+ingestion job results and can be rolled up with ``aggregate_profiles``.
+"""
+
+import functools
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterable, Optional
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def _bucket_index(elapsed_ms: float) -> int:
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+@dataclass
+class ToolStats:
+    """Call count, error count and latency distribution of one tool."""
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def record(self, elapsed_ms: float, error: bool = False) -> None:
+        self.calls += 1
+        self.errors += int(error)
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.histogram[_bucket_index(elapsed_ms)] += 1
+
+    def merge(self, other: dict) -> None:
+        self.calls += other.get("calls", 0)
+        self.errors += other.get("errors", 0)
+        self.total_ms += other.get("total_ms", 0.0)
+        self.max_ms = max(self.max_ms, other.get("max_ms", 0.0))
+        for i, count in enumerate(other.get("histogram", [])[:len(self.histogram)]):
+            self.histogram[i] += count
+
+    def percentile_ms(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (None if open-ended)."""
+        if not self.calls:
+            return None
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else None
+        return None
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "p50_ms": self.percentile_ms(0.5),
+            "p95_ms": self.percentile_ms(0.95),
+            "histogram": self.histogram,
+        }
+
+
+@dataclass
+class RunProfile:
+    """Structured profile of one ``run_agent`` call (all attempts)."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    model_requests: int = 0
+    attempts: int = 0
+    browser_steps: int = 0
+    browser_step_limit: int = 0
+    # Browser tool calls answered from the page cache
+    page_cache_hits: int = 0
+    duration_ms: float = 0.0
+    tools: dict[str, ToolStats] = field(default_factory=dict)
+    # Classification of each failed attempt (see app.agent.retry)
+    error_kinds: list[str] = field(default_factory=list)
+
+    def record_tool(self, name: str, elapsed_ms: float, error: bool = False) -> None:
+        self.tools.setdefault(name, ToolStats()).record(elapsed_ms, error)
+
+    def record_usage(self, usage: Any) -> None:
+        """Copy token totals from a pydantic-ai ``RunUsage``."""
+        self.input_tokens = usage.input_tokens or 0
+        self.output_tokens = usage.output_tokens or 0
+        self.model_requests = usage.requests or 0
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["retries"] = self.retries
+        data["duration_ms"] = round(self.duration_ms, 1)
+        data["tools"] = {
+            name: {**asdict(stats), "total_ms": round(stats.total_ms, 1), "max_ms": round(stats.max_ms, 1)}
+            for name, stats in self.tools.items()
+        }
+        return data
+
+
+def instrument_tool(func):
+    """Wrap an agent tool so each call is timed into ``ctx.deps.profile``.
+
+    A tool returning a dict with an ``error`` key, or raising, counts as an error.
+    ``functools.wraps`` keeps the signature and docstring the agent builds
+    the tool schema from.
+    """
+    @functools.wraps(func)
+    async def wrapper(ctx, *args, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = await func(ctx, *args, **kwargs)
+            error = isinstance(result, dict) and "error" in result
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            profile = getattr(ctx.deps, "profile", None)
+            if profile is not None:
+                profile.record_tool(func.__name__, elapsed_ms, error)
+
+    return wrapper
+
+
+def aggregate_profiles(profiles: Iterable[dict]) -> dict:
+    """Roll stored run profiles up into totals, averages and per-tool latency."""
+    runs = successes = 0
+    input_tokens = output_tokens = retries = browser_steps = at_step_limit = page_cache_hits = 0
+    duration_ms = 0.0
+    tools: dict[str, ToolStats] = {}
+    error_kinds: Counter = Counter()
+
+    for profile in profiles:
+        runs += 1
+        successes += int(bool(profile.get("success")))
+        input_tokens += profile.get("input_tokens", 0)
+        output_tokens += profile.get("output_tokens", 0)
+        retries += profile.get("retries", 0)
+        browser_steps += profile.get("browser_steps", 0)
+        limit = profile.get("browser_step_limit", 0)
+        at_step_limit += int(bool(limit) and profile.get("browser_steps", 0) >= limit)
+        page_cache_hits += profile.get("page_cache_hits", 0)
+        duration_ms += profile.get("duration_ms", 0.0)
+        error_kinds.update(profile.get("error_kinds") or [])
+        for name, stats in (profile.get("tools") or {}).items():
+            tools.setdefault(name, ToolStats()).merge(stats)
+
+    def avg(total: float) -> float:
+        return round(total / runs, 1) if runs else 0.0
+
+    return {
+        "runs": runs,
+        "successes": successes,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "avg_input_tokens": avg(input_tokens),
+        "avg_output_tokens": avg(output_tokens),
+        "retries": retries,
+        "error_kinds": dict(error_kinds),
+        "avg_browser_steps": avg(browser_steps),
+        "runs_at_browser_step_limit": at_step_limit,
+        "page_cache_hits": page_cache_hits,
+        "avg_duration_ms": avg(duration_ms),
+        "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+        "tools": {
+            name: stats.summary()
+            for name, stats in sorted(tools.items(), key=lambda item: -item[1].total_ms)
+        },
+    }
@@ -4,15 +4,19 @@ import re
 from pathlib import Path
 from typing import Optional
 
-import httpx
 from pydantic_ai import RunContext
 from sqlalchemy import select, func, or_
 from sqlalchemy.orm import selectinload
 
-from app.models import App, Tool, Tag, AppMedia, AppStatus
+from app.models import App, Tool, Tag, AppMedia, AppStatus, utcnow
 from app.agent.deps import AgentDeps
 from app.agent.browser import get_browser
-from app.core.config import settings
+from app.agent.page_cache import PageSnapshot, get_page_cache
+from app.services.images import EncodedImage
+from app.services.media_upload import get_media_uploader
+from app.services.media_refs import media_urls, retain_media
+from app.services.slugs import add_with_unique
+from app.services.taxonomy import taxonomy_cache
 from app.utils import normalize_url
 
 
@@ -45,17 +49,12 @@ async def get_tags_and_tools(ctx: RunContext[AgentDeps]) -> dict:
     
     Use these IDs when creating apps.
     """
-    # Fetch tools if not cached
+    # Per-run copy first, then the process-wide taxonomy cache
     if not ctx.deps.tools_list:
-        result = await ctx.deps.db.execute(select(Tool).order_by(Tool.id))
-        tools = result.scalars().all()
-        ctx.deps.tools_list = [{"id": t.id, "name": t.name} for t in tools]
+        ctx.deps.tools_list = (await taxonomy_cache.tools(ctx.deps.db)).data
     
-    # Fetch tags if not cached
     if not ctx.deps.tags_list:
-        result = await ctx.deps.db.execute(select(Tag).order_by(Tag.id))
-        tags = result.scalars().all()
-        ctx.deps.tags_list = [{"id": t.id, "name": t.name} for t in tags]
+        ctx.deps.tags_list = (await taxonomy_cache.tags(ctx.deps.db)).data
     
     return {
         "tags": ctx.deps.tags_list,
@@ -72,23 +71,7 @@ async def get_my_apps(ctx: RunContext[AgentDeps]) -> list[dict]:
     if ctx.deps.user_apps:
         return ctx.deps.user_apps
     
-    result = await ctx.deps.db.execute(
-        select(App)
-        .filter(App.creator_id == ctx.deps.user_id)
-        .order_by(App.created_at.desc())
-        .limit(100)
-    )
-    apps = result.scalars().all()
-    ctx.deps.user_apps = [
-        {
-            "id": a.id,
-            "title": a.title,
-            "slug": a.slug,
-            "status": a.status.value if a.status else None,
-            "app_url": a.app_url,
-        }
-        for a in apps
-    ]
+    ctx.deps.user_apps = (await taxonomy_cache.user_apps(ctx.deps.db, ctx.deps.user_id)).data
     return ctx.deps.user_apps
 
 
@@ -194,20 +177,6 @@ async def create_app(
     if app_status == AppStatus.LIVE and not app_url:
         return {"error": "app_url is required when status is 'Live'"}
     
-    # Generate unique slug
-    base_slug = _generate_slug(title)
-    slug = base_slug
-    counter = 1
-    
-    while True:
-        existing = await ctx.deps.db.execute(
-            select(App).filter(App.slug == slug)
-        )
-        if not existing.scalar():
-            break
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
     # Create app
     # Agent-submitted apps are always marked as not owned by the submitter
     # since admin is submitting on behalf of someone else
@@ -217,13 +186,17 @@ async def create_app(
         prompt_text=prompt_text,
         prd_text=prd_text,
         status=app_status,
-        slug=slug,
         app_url=app_url,
         youtube_url=youtube_url,
         post_url=post_url,
         is_agent_submitted=True,
         is_owner=False,
+        tools=[],
+        tags=[],
     )
+    # One prefix query picks a free slug; a concurrent collision is retried.
+    # Inserted before tools/tags so the slug savepoint holds only this row.
+    await add_with_unique(ctx.deps.db, app, "slug", App.slug, _generate_slug(title))
     
     # Add tools
     if tool_ids:
@@ -239,22 +212,20 @@ async def create_app(
         )
         app.tags = list(tags_result.scalars().all())
     
-    ctx.deps.db.add(app)
     await ctx.deps.db.flush()
     
     # Track created app
     ctx.deps.created_app_ids.append(app.id)
+    ctx.deps.changed_app_ids.add(app.id)
     
     # Auto-upload saved screenshots
     media_uploaded = 0
     media_errors = []
     
-    for screenshot_path in ctx.deps.saved_screenshots:
-        upload_result = await _upload_and_attach_media(ctx, app.id, screenshot_path)
-        if upload_result.get("success"):
-            media_uploaded += 1
-        else:
-            media_errors.append(f"{Path(screenshot_path).name}: {upload_result.get('error', 'Unknown error')}")
+    if ctx.deps.saved_screenshots:
+        upload_result = await _upload_and_attach_media(ctx, app.id, ctx.deps.saved_screenshots)
+        media_uploaded = upload_result["uploaded"]
+        media_errors = upload_result["errors"]
     
     # Clear screenshots after upload attempt
     ctx.deps.saved_screenshots.clear()
@@ -318,19 +289,6 @@ async def update_app(
     # Update fields
     if title is not None:
         app.title = title
-        # Update slug too
-        base_slug = _generate_slug(title)
-        slug = base_slug
-        counter = 1
-        while True:
-            existing = await ctx.deps.db.execute(
-                select(App).filter(App.slug == slug, App.id != app_id)
-            )
-            if not existing.scalar():
-                break
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        app.slug = slug
     
     if prompt_text is not None:
         app.prompt_text = prompt_text
@@ -361,8 +319,15 @@ async def update_app(
             select(Tag).filter(Tag.id.in_(tag_ids))
         )
         app.tags = list(tags_result.scalars().all())
+    app.updated_at = utcnow()
     
     await ctx.deps.db.flush()
+    if title is not None:
+        # Update slug too; flushed on its own so a collision keeps the other edits
+        await add_with_unique(
+            ctx.deps.db, app, "slug", App.slug, _generate_slug(title), exclude=App.id != app_id
+        )
+    ctx.deps.changed_app_ids.add(app_id)
     
     return {
         "success": True,
@@ -373,125 +338,64 @@ async def update_app(
 
 # Private helper functions for media upload (used internally by create_app)
 
-async def _get_presigned_url(filename: str, content_type: str) -> dict:
-    """Get a presigned URL for uploading media to S3 (internal helper)."""
-    import boto3
-    from botocore.config import Config
-    import uuid
-    
-    if not settings.S3_BUCKET or not settings.AWS_ACCESS_KEY_ID:
-        return {"error": "S3 not configured"}
-    
-    # Generate unique file key
-    ext = Path(filename).suffix or ".png"
-    file_key = f"media/{uuid.uuid4()}{ext}"
-    
-    # Create S3 client
-    s3_config = Config(signature_version='s3v4')
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_REGION,
-        endpoint_url=settings.S3_ENDPOINT_URL,
-        config=s3_config,
-    )
+async def _upload_and_attach_media(ctx: RunContext[AgentDeps], app_id: int, images: list[EncodedImage]) -> dict:
+    """Upload encoded screenshots and their variants, then attach them to an app (internal helper).
     
-    # Generate presigned URL for upload
-    upload_url = s3_client.generate_presigned_url(
-        'put_object',
-        Params={
-            'Bucket': settings.S3_BUCKET,
-            'Key': file_key,
-            'ContentType': content_type,
-        },
-        ExpiresIn=3600,
-    )
-    
-    # Generate download URL
-    if settings.S3_ENDPOINT_URL:
-        download_url = f"{settings.S3_ENDPOINT_URL}/{settings.S3_BUCKET}/{file_key}"
-    else:
-        download_url = f"https://{settings.S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
+    All files are uploaded concurrently through the shared media uploader;
+    AppMedia records are created afterwards in one flush, each taking a
+    reference on the (possibly shared) content-addressed objects it uses. A failed variant
+    upload is not fatal; a failed main image is reported as an error.
     
-    return {
-        "success": True,
-        "upload_url": upload_url,
-        "download_url": download_url,
-        "file_key": file_key,
-    }
-
-
-async def _upload_file_to_s3(file_path: str, upload_url: str, content_type: str) -> dict:
-    """Upload a file to S3 using a presigned URL (internal helper)."""
-    path = Path(file_path)
-    if not path.exists():
-        return {"error": f"File not found: {file_path}"}
-    
-    try:
-        file_data = path.read_bytes()
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                upload_url,
-                content=file_data,
-                headers={"Content-Type": content_type},
-                timeout=120.0,
-            )
-            response.raise_for_status()
-        
-        return {
-            "success": True,
-            "file_path": file_path,
-            "size_bytes": len(file_data),
-        }
-    except Exception as e:
-        return {"error": f"Upload failed: {str(e)}"}
-
-
-async def _upload_and_attach_media(ctx: RunContext[AgentDeps], app_id: int, file_path: str) -> dict:
-    """Upload a file to S3 and attach it to an app (internal helper).
-    
-    Combines presigned URL generation, S3 upload, and AppMedia record creation.
+    Returns:
+        Dict with the number of uploaded images and a list of error strings.
     """
-    path = Path(file_path)
-    filename = path.name
-    
-    # Determine content type from extension
-    ext = path.suffix.lower()
-    content_type_map = {
-        ".png": "image/png",
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".gif": "image/gif",
-        ".webp": "image/webp",
-    }
-    content_type = content_type_map.get(ext, "image/png")
-    
-    # Get presigned URL
-    presigned = await _get_presigned_url(filename, content_type)
-    if not presigned.get("success"):
-        return presigned
+    files = [
+        f for image in images
+        for f in (image.path, image.thumbnail_path, image.og_path) if f
+    ]
+    results = await get_media_uploader().upload_files(files, ctx.deps.db)
+    outcomes = dict(zip(files, results))
+    
+    uploaded = 0
+    error_messages = []
+    referenced_urls = []
+    for image in images:
+        main = outcomes[image.path]
+        if not main.get("success"):
+            error_messages.append(f"{Path(image.path).name}: {main.get('error', 'Unknown error')}")
+            continue
+        media = AppMedia(
+            app_id=app_id,
+            media_url=main["download_url"],
+            thumbnail_url=outcomes.get(image.thumbnail_path, {}).get("download_url"),
+            og_image_url=outcomes.get(image.og_path, {}).get("download_url"),
+            width=image.width,
+            height=image.height,
+            size_bytes=image.size_bytes,
+        )
+        ctx.deps.db.add(media)
+        referenced_urls.extend(media_urls(media))
+        uploaded += 1
     
-    # Upload file
-    upload_result = await _upload_file_to_s3(file_path, presigned["upload_url"], content_type)
-    if not upload_result.get("success"):
-        return upload_result
+    if uploaded:
+        await retain_media(ctx.deps.db, referenced_urls)
+        await ctx.deps.db.flush()
     
-    # Create media record
-    media = AppMedia(app_id=app_id, media_url=presigned["download_url"])
-    ctx.deps.db.add(media)
-    await ctx.deps.db.flush()
-    
-    return {
-        "success": True,
-        "media_id": media.id,
-        "media_url": presigned["download_url"],
-    }
+    return {"uploaded": uploaded, "errors": error_messages}
 
 
 # Browser tools
 
+async def _live_browser(ctx: RunContext[AgentDeps]):
+    """Browser session on the current page, loading it first if it was served from the page cache."""
+    browser = await get_browser(ctx.deps)
+    url = ctx.deps.pending_navigation
+    if url:
+        ctx.deps.pending_navigation = None
+        await browser.navigate(url)
+    return browser
+
+
 async def browser_navigate(ctx: RunContext[AgentDeps], url: str) -> dict:
     """Navigate to a URL in the browser.
     
@@ -507,14 +411,32 @@ async def browser_navigate(ctx: RunContext[AgentDeps], url: str) -> dict:
     if limit_error:
         return limit_error
     
-    browser = await get_browser(headless=ctx.deps.headless)
-    return await browser.navigate(url)
+    page_cache = get_page_cache()
+    snapshot = await page_cache.aget(url) if page_cache else None
+    if snapshot is not None:
+        # Load lazily: only tools that need the live page start the browser
+        ctx.deps.current_page = snapshot
+        ctx.deps.pending_navigation = url
+        ctx.deps.profile.page_cache_hits += 1
+        return {"success": True, "url": snapshot.final_url, "title": snapshot.title, "cached": True}
+    
+    browser = await get_browser(ctx.deps)
+    ctx.deps.pending_navigation = None
+    result = await browser.navigate(url)
+    ctx.deps.current_page = None
+    if result.get("success"):
+        ctx.deps.current_page = PageSnapshot(url=url, final_url=result["url"], title=result["title"])
+        if page_cache:
+            await page_cache.aput(ctx.deps.current_page)
+    return result
 
 
 async def browser_screenshot(ctx: RunContext[AgentDeps], name: str) -> dict:
     """Take a screenshot of the current page.
     
-    Screenshots are automatically uploaded when you call create_app.
+    Screenshots are automatically uploaded when you call create_app. A page
+    that was just loaded (no clicks or scrolls yet) may be answered from the
+    page cache with the screenshot taken on an earlier visit.
     
     Args:
         name: Name for the screenshot file (e.g., "main-page", "feature-1")
@@ -526,12 +448,32 @@ async def browser_screenshot(ctx: RunContext[AgentDeps], name: str) -> dict:
     if limit_error:
         return limit_error
     
-    browser = await get_browser(headless=ctx.deps.headless)
+    page = ctx.deps.current_page
+    image = page.screenshot() if page else None
+    if image is not None:
+        if image not in ctx.deps.saved_screenshots:
+            ctx.deps.saved_screenshots.append(image)
+        ctx.deps.profile.page_cache_hits += 1
+        return {
+            "success": True,
+            "file_path": image.path,
+            "width": image.width,
+            "height": image.height,
+            "size_bytes": image.size_bytes,
+            "cached": True,
+        }
+    
+    browser = await _live_browser(ctx)
     result = await browser.take_screenshot(name)
     
     # Track screenshot for auto-upload in create_app
-    if result.get("success") and result.get("file_path"):
-        ctx.deps.saved_screenshots.append(result["file_path"])
+    image = result.pop("image", None)
+    if result.get("success") and image is not None:
+        ctx.deps.saved_screenshots.append(image)
+        page_cache = get_page_cache()
+        if page is not None and page_cache:
+            await page_cache.astore_screenshot(page, image)
+            await page_cache.aput(page)
     
     return result
 
@@ -548,8 +490,24 @@ async def browser_get_content(ctx: RunContext[AgentDeps]) -> dict:
     if limit_error:
         return limit_error
     
-    browser = await get_browser(headless=ctx.deps.headless)
-    return await browser.get_page_content()
+    page = ctx.deps.current_page
+    if page is not None and page.content is not None:
+        ctx.deps.profile.page_cache_hits += 1
+        return {
+            "success": True,
+            "title": page.title,
+            "url": page.final_url,
+            "content": page.content,
+            "cached": True,
+        }
+    
+    browser = await _live_browser(ctx)
+    result = await browser.get_page_content()
+    page_cache = get_page_cache()
+    if result.get("success") and page is not None and page_cache:
+        page.content = result["content"]
+        await page_cache.aput(page)
+    return result
 
 
 async def browser_click(ctx: RunContext[AgentDeps], selector: str) -> dict:
@@ -565,7 +523,9 @@ async def browser_click(ctx: RunContext[AgentDeps], selector: str) -> dict:
     if limit_error:
         return limit_error
     
-    browser = await get_browser(headless=ctx.deps.headless)
+    browser = await _live_browser(ctx)
+    # The page now differs from its cached snapshot
+    ctx.deps.current_page = None
     return await browser.click(selector)
 
 
@@ -582,7 +542,8 @@ async def browser_scroll(ctx: RunContext[AgentDeps], direction: str = "down") ->
     if limit_error:
         return limit_error
     
-    browser = await get_browser(headless=ctx.deps.headless)
+    browser = await _live_browser(ctx)
+    ctx.deps.current_page = None
     return await browser.scroll(direction)
 
 
@@ -0,0 +1,233 @@
+"""
+Response compression negotiated per request (brotli or gzip).
+
+nginx only gzips ``/api/`` for a fixed list of types, and development or
+direct-to-backend deployments got no compression at all, so large
+``prd_text``-heavy feeds crossed the network uncompressed. This ASGI middleware
+compresses complete response bodies of text-like types once they reach
+``COMPRESSION_MIN_SIZE`` bytes. Brotli (a declared dependency) is used when
+the client accepts it; gzip otherwise, or if the ``brotli`` wheel is missing.
+
+Streaming responses (sitemap pages on a cache miss, event streams) pass
+through untouched: the middleware only compresses a body that arrived in a
+single message.
+
+Compressed bytes for anonymous requests are kept in a small LRU keyed by the
+encoding and a digest of the body. Hot anonymous pages (the public feed,
+cached OG pages and sitemaps) are identical for every visitor, so they are
+compressed once per encoding rather than on every request. Per-user responses
+are compressed but not cached.
+
+ETags are left as they are: every validator in the app is compared weakly
+and no range requests are served, and a 304 (which has no body to compress)
+must carry the same tag as the 200 it revalidates. ``Vary: Accept-Encoding``
+keeps shared caches from mixing the encodings.
+"""
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # declared dependency; degrade to gzip rather than fail
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "image/svg+xml",
+}
+
+# Bodies at least this large are compressed in a worker thread
+THREAD_THRESHOLD = 256 * 1024
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Encodings we can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an ``Accept-Encoding`` header."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type in COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+def compress(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[tuple[str, bytes], bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(encoding: str, body: bytes) -> tuple[str, bytes]:
+        return encoding, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: tuple[str, bytes]) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: tuple[str, bytes], data: bytes) -> None:
+        # A single entry may use at most an eighth of the budget
+        if len(data) * 8 > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+compressed_cache = CompressedCache(settings.COMPRESSION_CACHE_MAX_BYTES)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache: Optional[CompressedCache] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        responder = _Responder(
+            self,
+            send,
+            encoding=negotiate(headers.get("accept-encoding", "")),
+            anonymous="authorization" not in headers,
+        )
+        await self.app(scope, receive, responder.send)
+
+    async def encode(self, body: bytes, encoding: str, cacheable: bool) -> bytes:
+        key = None
+        if cacheable and self.cache is not None:
+            key = CompressedCache.key(encoding, body)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        if len(body) >= THREAD_THRESHOLD:
+            data = await anyio.to_thread.run_sync(compress, body, encoding, self.gzip_level, self.brotli_quality)
+        else:
+            data = compress(body, encoding, self.gzip_level, self.brotli_quality)
+        if key is not None:
+            self.cache.put(key, data)
+        return data
+
+
+class _Responder:
+    """Holds back ``http.response.start`` until the body shows whether to compress."""
+
+    def __init__(self, middleware: CompressionMiddleware, send: Send, encoding: Optional[str], anonymous: bool):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.anonymous = anonymous
+        self.start: Optional[Message] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            # pathsend, zerocopysend, trailers...: flush the held start, stop buffering
+            self.passthrough = True
+            if self.start is not None:
+                start, self.start = self.start, None
+                await self._send(start)
+            await self._send(message)
+            return
+
+        headers = MutableHeaders(raw=list(self.start.get("headers", [])))
+        start, self.start = {**self.start, "headers": headers.raw}, None
+        body = message.get("body", b"")
+        if message.get("more_body", False) or not is_compressible(headers.get("content-type")):
+            # Streaming or binary: send as is
+            self.passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if (
+            self.encoding is not None
+            and len(body) >= self.middleware.minimum_size
+            and "content-encoding" not in headers
+            and "no-transform" not in headers.get("cache-control", "")
+        ):
+            body = await self.middleware.encode(body, self.encoding, cacheable=self.anonymous)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+            message = {**message, "body": body}
+        await self._send(start)
+        await self._send(message)
@@ -0,0 +1,61 @@
+"""
+Conditional GET support.
+
+Read endpoints declare a *stamp* dependency: a cheap query returning values
+that change whenever the response would (``updated_at`` columns, child row
+counts, the viewer's id). ``conditional(stamp)`` turns the stamp into a weak
+ETag, answers a matching ``If-None-Match`` with 304 before the endpoint runs
+(so nothing is loaded or serialized), and otherwise adds the ETag to the
+endpoint's response::
+
+    @router.get("/{app_id}", dependencies=[Depends(conditional(app_stamp))])
+
+A stamp of ``None`` (missing or hidden row) skips validation so the endpoint
+can produce its usual 404/403.
+"""
+import hashlib
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+# Responses may depend on the viewer; browsers must revalidate before reuse
+DEFAULT_CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(stamp: Any) -> str:
+    """Weak ETag for a version stamp (any value with a stable ``repr``)."""
+    return f'W/"{hashlib.sha256(repr(stamp).encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str, cache_control: str = DEFAULT_CACHE_CONTROL) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def conditional(
+    stamp: Callable[..., Awaitable[Any]],
+    cache_control: str = DEFAULT_CACHE_CONTROL,
+) -> Callable[..., Awaitable[None]]:
+    """Dependency validating ``If-None-Match`` against ``stamp``'s weak ETag."""
+
+    async def check(request: Request, response: Response, value: Any = Depends(stamp)) -> None:
+        if value is None:
+            return
+        etag = weak_etag(value)
+        headers = {"ETag": etag, "Cache-Control": cache_control}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            # FastAPI sends no body for 304 exceptions
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return check
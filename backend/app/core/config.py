@@ -14,6 +14,25 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30  # 30 days
     
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./vibe_hub.db")
+    # Optional read replica for read-only endpoints (unset: everything uses DATABASE_URL)
+    DATABASE_READ_URL: Optional[str] = os.getenv("DATABASE_READ_URL") or None
+    # Clients read from the primary for this long after a write; replica retry delay after a failure
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    READ_REPLICA_RETRY_SECONDS: float = float(os.getenv("READ_REPLICA_RETRY_SECONDS", "30"))
+    # Connection pool for API requests (PostgreSQL only)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Server-side statement_timeout per connection (0 disables)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    # asyncpg prepared statement cache per connection; 0 when behind pgbouncer in transaction mode
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+    # Separate pool for the ingestion worker and link prober
+    WORKER_DB_POOL_SIZE: int = int(os.getenv("WORKER_DB_POOL_SIZE", "5"))
+    WORKER_DB_MAX_OVERFLOW: int = int(os.getenv("WORKER_DB_MAX_OVERFLOW", "5"))
+    WORKER_DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("WORKER_DB_STATEMENT_TIMEOUT_MS", "120000"))
     
     # CORS settings - comma-separated list of allowed origins
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000")
@@ -23,6 +42,81 @@ class Settings(BaseSettings):
     AGENT_API_KEY: Optional[str] = os.getenv("AGENT_API_KEY")
     AGENT_MODEL: str = os.getenv("AGENT_MODEL", "gpt-4o")
     AGENT_HEADLESS: bool = os.getenv("AGENT_HEADLESS", "true").lower() == "true"
+    # Concurrent agent runs share one Chromium process with this many isolated contexts
+    AGENT_BROWSER_POOL_SIZE: int = int(os.getenv("AGENT_BROWSER_POOL_SIZE", "3"))
+    # Relaunch Chromium after it has served this many contexts
+    AGENT_BROWSER_MAX_USES: int = int(os.getenv("AGENT_BROWSER_MAX_USES", "50"))
+    # Agent page request policy: comma-separated Playwright resource types and hosts to block
+    AGENT_BLOCKED_RESOURCE_TYPES: str = os.getenv("AGENT_BLOCKED_RESOURCE_TYPES", "media,font")
+    AGENT_BLOCKED_HOSTS: str = os.getenv(
+        "AGENT_BLOCKED_HOSTS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,"
+        "connect.facebook.net,hotjar.com,segment.io,segment.com,mixpanel.com,clarity.ms,"
+        "intercom.io,fullstory.com,amplitude.com,plausible.io,posthog.com",
+    )
+    # Cap on bytes transferred per agent run (0 = unlimited)
+    AGENT_MAX_TRANSFER_BYTES: int = int(os.getenv("AGENT_MAX_TRANSFER_BYTES", str(15 * 1024 * 1024)))
+    # "domcontentloaded" or "networkidle" (bounded by AGENT_NETWORK_IDLE_DEADLINE_MS)
+    AGENT_WAIT_STRATEGY: str = os.getenv("AGENT_WAIT_STRATEGY", "networkidle")
+    AGENT_NETWORK_IDLE_DEADLINE_MS: int = int(os.getenv("AGENT_NETWORK_IDLE_DEADLINE_MS", "5000"))
+    AGENT_NAVIGATION_TIMEOUT_MS: int = int(os.getenv("AGENT_NAVIGATION_TIMEOUT_MS", "20000"))
+    # Agent retries: per-run attempts, jittered exponential backoff (seconds), shared per-job budget
+    AGENT_MAX_RETRIES: int = int(os.getenv("AGENT_MAX_RETRIES", "3"))
+    AGENT_RETRY_BASE_DELAY: float = float(os.getenv("AGENT_RETRY_BASE_DELAY", "2"))
+    AGENT_RETRY_MAX_DELAY: float = float(os.getenv("AGENT_RETRY_MAX_DELAY", "60"))
+    AGENT_JOB_RETRY_BUDGET: int = int(os.getenv("AGENT_JOB_RETRY_BUDGET", "20"))
+    # Pause a job after this many consecutive model endpoint failures
+    AGENT_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("AGENT_CIRCUIT_FAILURE_THRESHOLD", "3"))
+    AGENT_CIRCUIT_COOLDOWN_SECONDS: float = float(os.getenv("AGENT_CIRCUIT_COOLDOWN_SECONDS", "60"))
+    AGENT_CIRCUIT_MAX_PAUSE_SECONDS: float = float(os.getenv("AGENT_CIRCUIT_MAX_PAUSE_SECONDS", "900"))
+    # Pages visited by the agent (title, text, screenshot) by normalized URL; TTL 0 (default) disables
+    AGENT_PAGE_CACHE_PATH: str = os.getenv("AGENT_PAGE_CACHE_PATH", "data/page_cache.sqlite3")
+    AGENT_PAGE_CACHE_TTL_SECONDS: int = int(os.getenv("AGENT_PAGE_CACHE_TTL_SECONDS", "0"))
+    # Process-level cache of tags, tools and the agent's app list (seconds)
+    TAXONOMY_CACHE_TTL_SECONDS: float = float(os.getenv("TAXONOMY_CACHE_TTL_SECONDS", "300"))
+    # Rendered Open Graph pages per process: lifetime (seconds) and LRU size
+    OG_CACHE_TTL_SECONDS: float = float(os.getenv("OG_CACHE_TTL_SECONDS", "300"))
+    OG_CACHE_MAX_ENTRIES: int = int(os.getenv("OG_CACHE_MAX_ENTRIES", "5000"))
+    # Generated 1200x630 app cards, stored by content hash
+    OG_IMAGE_CACHE_DIR: str = os.getenv("OG_IMAGE_CACHE_DIR", "data/og_images")
+    OG_IMAGE_CACHE_MAX_BYTES: int = int(os.getenv("OG_IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    # Hosts (besides the media bucket) that card screenshots may be fetched from, e.g. a CDN
+    OG_IMAGE_FETCH_HOSTS: str = os.getenv("OG_IMAGE_FETCH_HOSTS", "")
+    # Sitemaps: ids per /sitemaps/*-{n}.xml page, and how long a built page is reused
+    SITEMAP_PAGE_SIZE: int = int(os.getenv("SITEMAP_PAGE_SIZE", "10000"))
+    SITEMAP_CACHE_TTL_SECONDS: float = float(os.getenv("SITEMAP_CACHE_TTL_SECONDS", "3600"))
+    # Facet counts for the app list filters, per filter signature: lifetime (seconds) and LRU size
+    FACET_CACHE_TTL_SECONDS: float = float(os.getenv("FACET_CACHE_TTL_SECONDS", "60"))
+    FACET_CACHE_MAX_ENTRIES: int = int(os.getenv("FACET_CACHE_MAX_ENTRIES", "2000"))
+    # Response compression (brotli when installed, else gzip) for bodies of at least COMPRESSION_MIN_SIZE bytes
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+    # Compressed bodies of anonymous responses kept per process (bytes)
+    COMPRESSION_CACHE_MAX_BYTES: int = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Model response cache: "off", "readwrite", or "replay" (cache hits only, no model calls)
+    LLM_CACHE_MODE: str = os.getenv("LLM_CACHE_MODE", "off")
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3")
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Media encoding for agent screenshots: "webp" or "jpeg"
+    MEDIA_IMAGE_FORMAT: str = os.getenv("MEDIA_IMAGE_FORMAT", "webp")
+    MEDIA_IMAGE_QUALITY: int = int(os.getenv("MEDIA_IMAGE_QUALITY", "80"))
+    MEDIA_THUMBNAIL_WIDTH: int = int(os.getenv("MEDIA_THUMBNAIL_WIDTH", "640"))
+    IMAGE_ENCODE_WORKERS: int = int(os.getenv("IMAGE_ENCODE_WORKERS", "2"))
+    # Concurrent S3 uploads and per-upload retries for agent media
+    MEDIA_UPLOAD_CONCURRENCY: int = int(os.getenv("MEDIA_UPLOAD_CONCURRENCY", "4"))
+    MEDIA_UPLOAD_RETRIES: int = int(os.getenv("MEDIA_UPLOAD_RETRIES", "3"))
+    # Unreferenced media objects are deleted from the bucket after this many seconds
+    MEDIA_GC_GRACE_SECONDS: int = int(os.getenv("MEDIA_GC_GRACE_SECONDS", "3600"))
+    # Background dead-link prober for app_urls (interval 0 disables)
+    LINK_PROBE_INTERVAL_SECONDS: int = int(os.getenv("LINK_PROBE_INTERVAL_SECONDS", str(6 * 3600)))
+    LINK_PROBE_BATCH_SIZE: int = int(os.getenv("LINK_PROBE_BATCH_SIZE", "500"))
+    LINK_PROBE_CONCURRENCY: int = int(os.getenv("LINK_PROBE_CONCURRENCY", "20"))
+    LINK_PROBE_PER_HOST: int = int(os.getenv("LINK_PROBE_PER_HOST", "2"))
+    LINK_PROBE_TIMEOUT_SECONDS: float = float(os.getenv("LINK_PROBE_TIMEOUT_SECONDS", "10"))
+    # File a dead app report after this many consecutive failed checks
+    LINK_PROBE_FAILURE_THRESHOLD: int = int(os.getenv("LINK_PROBE_FAILURE_THRESHOLD", "3"))
     
     @property
     def cors_origins_list(self) -> List[str]:
@@ -32,15 +126,38 @@ class Settings(BaseSettings):
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
     
     @property
-    def async_database_url(self) -> str:
-        """Convert DATABASE_URL to async driver format."""
-        url = self.DATABASE_URL
+    def agent_blocked_resource_types_list(self) -> List[str]:
+        """Parse AGENT_BLOCKED_RESOURCE_TYPES into a list."""
+        return [t.strip() for t in self.AGENT_BLOCKED_RESOURCE_TYPES.split(",") if t.strip()]
+    
+    @property
+    def agent_blocked_hosts_list(self) -> List[str]:
+        """Parse AGENT_BLOCKED_HOSTS into a list of lowercase hosts."""
+        return [h.strip().lower() for h in self.AGENT_BLOCKED_HOSTS.split(",") if h.strip()]
+    
+    @property
+    def og_image_fetch_hosts_list(self) -> List[str]:
+        """Parse OG_IMAGE_FETCH_HOSTS into a list of lowercase hosts."""
+        return [h.strip().lower() for h in self.OG_IMAGE_FETCH_HOSTS.split(",") if h.strip()]
+    
+    @staticmethod
+    def _async_url(url: str) -> str:
         if url.startswith("postgresql://"):
             return url.replace("postgresql://", "postgresql+asyncpg://", 1)
         elif url.startswith("sqlite://"):
             return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
         return url
     
+    @property
+    def async_database_url(self) -> str:
+        """Convert DATABASE_URL to async driver format."""
+        return self._async_url(self.DATABASE_URL)
+    
+    @property
+    def async_database_read_url(self) -> Optional[str]:
+        """Convert DATABASE_READ_URL to async driver format (None without a replica)."""
+        return self._async_url(self.DATABASE_READ_URL) if self.DATABASE_READ_URL else None
+    
     # S3 Settings
     S3_BUCKET: Optional[str] = os.getenv("S3_BUCKET")
     AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
@@ -0,0 +1,48 @@
+"""
+JSON responses that skip ``response_model`` validation.
+
+For large lists built from database rows, validating every item against its
+Pydantic schema (walking ORM attributes through ``from_attributes``) costs
+more than the query. Hot endpoints can build JSON-ready dicts themselves and
+return ``FastJSONResponse``. The bytes are the same as Pydantic's
+``dump_json`` for the schema, so the route can keep its ``response_model``
+for documentation.
+
+Encoding uses orjson (a declared dependency). The stdlib encoder is only a
+fallback for environments where the wheel is unavailable; it produces
+identical output for the values we emit.
+"""
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # declared dependency; fall back rather than fail
+    orjson = None
+
+
+def format_datetime(value: Optional[datetime]) -> Optional[str]:
+    """ISO 8601 exactly as Pydantic serializes it (UTC as ``Z``)."""
+    if value is None:
+        return None
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON (no spaces, non-ASCII kept as is)."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` for pre-built payloads; datetimes must already be strings."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
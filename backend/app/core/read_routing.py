@@ -0,0 +1,119 @@
+"""
+Read-your-writes pinning and replica health for read-replica routing.
+
+When ``DATABASE_READ_URL`` is set, ``get_read_db`` serves read-only endpoints
+from the replica. Replication lag would make a user's own change vanish on
+the next page load, so after any successful write request the client is
+pinned to the primary for ``READ_YOUR_WRITES_SECONDS``:
+
+- browsers get a short-lived ``db_primary_pin`` cookie, which works across
+  worker processes;
+- API clients that don't keep cookies (agents using ``X-API-Key`` or bearer
+  tokens) are pinned in-process by a digest of their credential.
+
+``replica_health`` remembers that the replica failed to hand out a
+connection and sends reads to the primary for ``READ_REPLICA_RETRY_SECONDS``
+before trying it again.
+"""
+import hashlib
+import time
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PIN_COOKIE = "db_primary_pin"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def credential_key(headers: Headers) -> Optional[str]:
+    """Digest of the request's credential, if it carries one."""
+    credential = headers.get("authorization") or headers.get("x-api-key")
+    if not credential:
+        return None
+    return hashlib.sha256(credential.encode()).hexdigest()
+
+
+class PrimaryPins:
+    """Process-local primary pins for clients without cookies."""
+
+    def __init__(self):
+        self._until: dict[str, float] = {}
+
+    def pin(self, key: str, seconds: float) -> None:
+        now = time.monotonic()
+        if len(self._until) > 10_000:
+            self._until = {k: until for k, until in self._until.items() if until > now}
+        self._until[key] = now + seconds
+
+    def is_pinned(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        until = self._until.get(key)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._until[key]
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._until.clear()
+
+
+class ReplicaHealth:
+    """Circuit breaker for the read replica."""
+
+    def __init__(self):
+        self.down_until = 0.0
+        self.failures = 0
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, seconds: float) -> None:
+        self.failures += 1
+        self.down_until = time.monotonic() + seconds
+
+    def reset(self) -> None:
+        self.down_until = 0.0
+        self.failures = 0
+
+
+primary_pins = PrimaryPins()
+replica_health = ReplicaHealth()
+
+
+def wants_primary(headers: Headers, cookies: dict) -> bool:
+    """Whether this client wrote recently and must read from the primary."""
+    return PIN_COOKIE in cookies or primary_pins.is_pinned(credential_key(headers))
+
+
+class ReadYourWritesMiddleware:
+    """Pins clients to the primary after a successful write request."""
+
+    def __init__(self, app: ASGIApp, pin_seconds: float):
+        self.app = app
+        self.pin_seconds = pin_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_pin(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                key = credential_key(Headers(scope=scope))
+                if key is not None:
+                    primary_pins.pin(key, self.pin_seconds)
+                headers = MutableHeaders(raw=list(message.get("headers", [])))
+                headers.append(
+                    "Set-Cookie",
+                    f"{PIN_COOKIE}=1; Max-Age={max(1, round(self.pin_seconds))}; Path=/; HttpOnly; SameSite=Lax",
+                )
+                message = {**message, "headers": headers.raw}
+            await send(message)
+
+        await self.app(scope, receive, send_with_pin)
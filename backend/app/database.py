@@ -1,28 +1,202 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+"""
+Async engines and sessions.
+
+API requests and the background workers (ingestion jobs, link prober) use
+separate engines, so a job that holds sessions for the length of an agent run
+cannot exhaust the pool that serves requests. Pool size, overflow, timeouts,
+recycling, pre-ping, the per-statement timeout and asyncpg's prepared
+statement cache come from ``Settings``; the pool options only apply to
+PostgreSQL (SQLite keeps SQLAlchemy's defaults).
+
+With ``DATABASE_READ_URL`` set, ``get_read_db`` hands read-only endpoints a
+session on a replica engine (sized like the API pool). It falls back to the
+primary session when the client wrote recently (see ``app.core.read_routing``)
+or when the replica cannot hand out a connection. Endpoints that fill the
+process caches (taxonomy, OG pages, facet counts) use the primary instead:
+a miss right after an invalidation would otherwise store the replica's stale
+rows for every client until the TTL.
+
+Each engine records checkout metrics (``pool_metrics``): connections opened
+and invalidated, checkouts, connections in use and their peak, and how long
+connections are held between checkout and checkin.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
 from typing import AsyncGenerator
+
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 from app.core.config import settings
+from app.core.read_routing import replica_health, wants_primary
+
+logger = logging.getLogger(__name__)
 
 # Database URL from settings - use async version
 SQLALCHEMY_DATABASE_URL = settings.async_database_url
 
-# Create async engine
+# Determine dialect at startup (avoids issues with checking during async requests)
+IS_POSTGRES = SQLALCHEMY_DATABASE_URL.startswith("postgresql")
+
+
+@dataclass
+class PoolMetrics:
+    """Checkout counters for one engine's pool."""
+    connects: int = 0
+    invalidations: int = 0
+    checkouts: int = 0
+    in_use: int = 0
+    peak_in_use: int = 0
+    total_hold_seconds: float = 0.0
+    max_hold_seconds: float = 0.0
+
+    def on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.monotonic()
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.in_use -= 1
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        held = time.monotonic() - checked_out_at
+        self.total_hold_seconds += held
+        self.max_hold_seconds = max(self.max_hold_seconds, held)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def attach(self, engine: AsyncEngine) -> None:
+        target = engine.sync_engine
+        event.listen(target, "connect", self.on_connect)
+        event.listen(target, "checkout", self.on_checkout)
+        event.listen(target, "checkin", self.on_checkin)
+        event.listen(target, "invalidate", self.on_invalidate)
+
+    def snapshot(self, engine: AsyncEngine) -> dict:
+        """Counters plus the pool's own view of its connections."""
+        data = asdict(self)
+        data["mean_hold_seconds"] = self.total_hold_seconds / self.checkouts if self.checkouts else 0.0
+        pool = engine.pool
+        for name in ("size", "checkedout", "checkedin", "overflow"):
+            method = getattr(pool, name, None)
+            data[f"pool_{name}"] = method() if callable(method) else None
+        return data
+
+
+def engine_options(pool_size: int, max_overflow: int, statement_timeout_ms: int) -> dict:
+    """Keyword arguments for ``create_async_engine``."""
+    options = {"echo": False, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not IS_POSTGRES:
+        return options
+    connect_args = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+    if settings.DB_PREPARED_STATEMENT_CACHE_SIZE == 0:
+        # Behind a transaction-mode pooler (pgbouncer) asyncpg must not cache either
+        connect_args["statement_cache_size"] = 0
+    if statement_timeout_ms > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)}
+    options.update(
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        connect_args=connect_args,
+    )
+    return options
+
+
+def _sessionmaker(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+# Engine for API requests
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    echo=False,
+    **engine_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS),
 )
 
-# Determine dialect at startup (avoids issues with checking during async requests)
-IS_POSTGRES = SQLALCHEMY_DATABASE_URL.startswith("postgresql")
+# Engine for background workers; its own pool so long-held sessions don't starve requests
+worker_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL,
+    **engine_options(
+        settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW, settings.WORKER_DB_STATEMENT_TIMEOUT_MS
+    ),
+)
 
-# Create async session maker
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+# Engine for read-only endpoints on the replica, if one is configured
+read_engine = (
+    create_async_engine(
+        settings.async_database_read_url,
+        **engine_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, settings.DB_STATEMENT_TIMEOUT_MS),
+    )
+    if settings.async_database_read_url
+    else None
 )
 
+engines = {"api": engine, "worker": worker_engine}
+if read_engine is not None:
+    engines["read"] = read_engine
+pool_metrics = {name: PoolMetrics() for name in engines}
+for name, pooled in engines.items():
+    pool_metrics[name].attach(pooled)
+
+# Create async session makers
+AsyncSessionLocal = _sessionmaker(engine)
+WorkerSessionLocal = _sessionmaker(worker_engine)
+ReadSessionLocal = _sessionmaker(read_engine) if read_engine is not None else None
+
+
+def pool_stats() -> dict:
+    """Current metrics of every pool, keyed ``api``, ``worker`` (and ``read``)."""
+    return {name: pool_metrics[name].snapshot(pooled) for name, pooled in engines.items()}
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db(
+    request: Request,
+    primary: AsyncSession = Depends(get_db),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints: the replica when usable, else the primary."""
+    if (
+        ReadSessionLocal is None
+        or not replica_health.available()
+        or wants_primary(request.headers, request.cookies)
+    ):
+        yield primary
+        return
+
+    session = ReadSessionLocal()
+    try:
+        # Check out a connection now, so a dead replica falls back before the endpoint runs
+        await session.connection()
+    except (DBAPIError, OSError, asyncio.TimeoutError):
+        logger.warning("Read replica unavailable; using the primary", exc_info=True)
+        replica_health.mark_down(settings.READ_REPLICA_RETRY_SECONDS)
+        await session.close()
+        yield primary
+        return
+    async with session:
+        yield session
+
+
+async def dispose_engines() -> None:
+    for pooled in engines.values():
+        await pooled.dispose()
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import re
+from collections import Counter
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 
@@ -13,15 +14,24 @@ from app.routers import (
     auth, users, apps, comments, reviews, 
     likes, implementations, collections, 
     follows, notifications, tools, tags, media,
-    ownership, feedback, agent, og
+    ownership, feedback, agent, og, sitemap, health
 )
 from app.routers.jobs import router as jobs_router
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware, compressed_cache
+from app.core.read_routing import ReadYourWritesMiddleware
 from app.core.logfire_config import configure_logfire
-from app.database import AsyncSessionLocal
+from app.database import WorkerSessionLocal, dispose_engines
 from app.models import IngestionJob, JobStatus, User, App
 from app.agent.agent import run_agent
+from app.agent.retry import JobRetryState
+from app.agent.browser import shutdown_browser_pool
+from app.services.media_upload import close_media_uploader
+from app.services.link_prober import close_link_prober, get_link_prober, run_link_checks
+from app.services.media_refs import GC_BATCH_SIZE, delete_unreferenced
+from app.services.storage import is_s3_configured
 from app.agent.deps import AgentDeps
+from app.utils import normalize_url
 
 # Initialize Logfire observability (sends data when LOGFIRE_TOKEN is set)
 configure_logfire()
@@ -79,42 +89,105 @@ If you create an app listing, make sure to:
 """
 
 
-async def check_post_processed(db, post_url: str) -> bool:
-    """Check if a post has already been processed."""
-    result = await db.execute(select(App.id).filter(App.post_url == post_url).limit(1))
-    return result.scalar() is not None
+def _post_permalink(post: dict) -> str:
+    """Return the absolute permalink used as an app's post_url."""
+    permalink = post.get("permalink", "")
+    if not permalink.startswith("http"):
+        permalink = f"https://reddit.com{permalink}"
+    return permalink
 
 
-async def check_urls_exist(db, urls: list[str]) -> list[str]:
-    """Check which URLs already exist as app_url in the database."""
-    if not urls:
-        return []
-    filters = [App.app_url.ilike(f"%{url}%") for url in urls]
-    result = await db.execute(select(App.app_url).filter(or_(*filters)))
-    existing = result.scalars().all()
-    return existing
+async def find_processed_posts(db, post_urls: list[str]) -> set[str]:
+    """Return the subset of post_urls that already produced an app."""
+    if not post_urls:
+        return set()
+    result = await db.execute(
+        select(App.post_url).filter(App.post_url.in_(set(post_urls)))
+    )
+    return set(result.scalars().all())
 
 
-async def process_single_post(db, user_data: dict, post: dict) -> dict:
-    """Process a single post through the agent."""
-    permalink = post.get("permalink", "")
-    if not permalink.startswith("http"):
-        permalink = f"https://reddit.com{permalink}"
-    selftext = post.get("selftext", "")
+async def find_existing_app_urls(db, normalized_urls: list[str]) -> dict[str, str]:
+    """Map each normalized URL to a stored app_url listing the same app.
+    
+    A stored URL matches when its normalized form equals the URL or extends
+    it by a path ("app.com" matches "app.com/play" but not "myapp.com" or
+    "app.com.evil.io"). One query for the whole batch against the indexed
+    ``App.app_url_normalized`` column.
+    """
+    if not normalized_urls:
+        return {}
+    urls = set(normalized_urls)
+    column = App.app_url_normalized
+    result = await db.execute(
+        select(App.app_url, column).filter(
+            or_(column.in_(urls), *(column.startswith(f"{url}/", autoescape=True) for url in urls))
+        )
+    )
+    stored = result.all()
+    
+    matches = {}
+    for url in normalized_urls:
+        for app_url, normalized_app_url in stored:
+            if normalized_app_url == url or normalized_app_url.startswith(f"{url}/"):
+                matches[url] = app_url
+                break
+    return matches
+
+
+async def prefilter_posts(db, posts: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Split a job's posts into ones worth an agent run and skipped ones.
     
-    # Get URLs from extracted_urls or extract from selftext
-    urls = post.get("extracted_urls", []) or extract_urls(selftext)
+    Extracts and normalizes URLs for every post, drops duplicates within the
+    batch, then resolves already-ingested permalinks and already-listed app
+    URLs with two set-based queries.
     
-    if not urls:
-        return {"skipped": True, "reason": "no_urls"}
+    Returns:
+        (pending_posts, skipped) where each skipped entry is
+        {"post": post, "reason": str, ...}.
+    """
+    candidates = []
+    skipped = []
+    seen_permalinks = set()
+    seen_urls = set()
     
-    if await check_post_processed(db, permalink):
-        return {"skipped": True, "reason": "post_exists"}
+    for post in posts:
+        permalink = _post_permalink(post)
+        urls = post.get("extracted_urls", []) or extract_urls(post.get("selftext", ""))
+        normalized = list(dict.fromkeys(u for u in (normalize_url(url) for url in urls) if u))
+        
+        if not normalized:
+            skipped.append({"post": post, "reason": "no_urls"})
+            continue
+        if permalink in seen_permalinks or seen_urls.intersection(normalized):
+            skipped.append({"post": post, "reason": "duplicate_in_batch"})
+            continue
+        
+        seen_permalinks.add(permalink)
+        seen_urls.update(normalized)
+        candidates.append((post, permalink, normalized))
     
-    existing_urls = await check_urls_exist(db, urls)
-    if existing_urls:
-        return {"skipped": True, "reason": "url_exists", "existing": existing_urls}
+    processed = await find_processed_posts(db, [permalink for _, permalink, _ in candidates])
+    existing_urls = await find_existing_app_urls(
+        db, [url for _, permalink, urls in candidates if permalink not in processed for url in urls]
+    )
+    
+    pending = []
+    for post, permalink, urls in candidates:
+        if permalink in processed:
+            skipped.append({"post": post, "reason": "post_exists"})
+            continue
+        existing = [existing_urls[url] for url in urls if url in existing_urls]
+        if existing:
+            skipped.append({"post": post, "reason": "url_exists", "existing": existing})
+            continue
+        pending.append(post)
     
+    return pending, skipped
+
+
+async def process_single_post(db, user_data: dict, post: dict, retry_state: JobRetryState | None = None) -> dict:
+    """Run the agent on a post that already passed prefilter_posts."""
     prompt = build_agent_prompt(post)
     deps = AgentDeps(
         db=db,
@@ -123,13 +196,13 @@ async def process_single_post(db, user_data: dict, post: dict) -> dict:
         is_admin=user_data["is_admin"],
     )
     
-    result = await run_agent(prompt, deps)
+    result = await run_agent(prompt, deps, retry_state=retry_state)
     return result
 
 
 async def process_job(job_id: int):
     """Process a single ingestion job."""
-    async with AsyncSessionLocal() as db:
+    async with WorkerSessionLocal() as db:
         # Fetch job
         result = await db.execute(select(IngestionJob).filter(IngestionJob.id == job_id))
         job = result.scalar()
@@ -174,43 +247,117 @@ async def process_job(job_id: int):
         await db.commit()
         
         try:
-            for i, post in enumerate(posts):
-                # Check for cancellation
-                await db.refresh(job)
-                if job.cancel_requested:
-                    job.status = JobStatus.CANCELLED
-                    add_log(f"Cancelled at post {i+1}/{len(posts)}")
-                    job.completed_at = datetime.now(timezone.utc)
-                    await db.commit()
-                    return
-                
-                title = post.get("title", "Unknown")[:60]
-                add_log(f"[{i+1}/{len(posts)}] Processing: {title}...")
-                await db.commit()
-                
+            # Pre-filter the whole batch before any agent run and record skips in bulk
+            posts, skipped = await prefilter_posts(db, posts)
+            if skipped:
+                reasons = Counter(item["reason"] for item in skipped)
+                job.skipped_posts += len(skipped)
+                job.processed_posts += len(skipped)
+                add_log(
+                    f"Pre-filter skipped {len(skipped)} posts: "
+                    + ", ".join(f"{reason}={count}" for reason, count in sorted(reasons.items()))
+                )
+            add_log(f"{len(posts)} posts queued for the agent")
+            await db.commit()
+            
+            # Posts run concurrently, one pooled browser context each. The job
+            # session is shared, so every access to it goes through job_lock.
+            job_lock = asyncio.Lock()
+            semaphore = asyncio.Semaphore(max(1, settings.AGENT_BROWSER_POOL_SIZE))
+            cancelled_at: list[int] = []
+            # Retry budget and model endpoint circuit breaker shared by all posts
+            retry_state = JobRetryState.from_settings()
+            endpoint_down: list[int] = []
+            
+            async def run_post(i: int, post: dict) -> None:
                 try:
-                    result = await process_single_post(db, user_data, post)
+                    async with semaphore:
+                        if retry_state.breaker.is_open and not endpoint_down:
+                            async with job_lock:
+                                add_log(f"  [{i+1}] Model endpoint failing; pausing job")
+                                await db.commit()
+                            if not await retry_state.breaker.wait_until_closed(settings.AGENT_CIRCUIT_MAX_PAUSE_SECONDS):
+                                endpoint_down.append(i)
+                        async with job_lock:
+                            # Check for cancellation
+                            if cancelled_at or endpoint_down:
+                                return
+                            await db.refresh(job)
+                            if job.cancel_requested:
+                                cancelled_at.append(i)
+                                return
+                            title = post.get("title", "Unknown")[:60]
+                            add_log(f"[{i+1}/{len(posts)}] Processing: {title}...")
+                            await db.commit()
+                    
+                        result = None
+                        error = None
+                        try:
+                            # Each concurrent run gets its own session for the agent's writes
+                            async with WorkerSessionLocal() as post_db:
+                                result = await process_single_post(post_db, user_data, post, retry_state)
+                        except Exception as e:
+                            error = e
+                            logger.exception(f"Error processing post in job {job_id}")
                     
-                    if result.get("skipped"):
-                        job.skipped_posts += 1
-                        add_log(f"  Skipped: {result.get('reason')}")
-                    elif result.get("success"):
-                        app_ids = result.get("app_ids", [])
-                        job.created_apps += len(app_ids)
-                        job.created_app_ids = job.created_app_ids + app_ids  # New list for change detection
-                        add_log(f"  Created apps: {app_ids}")
-                    else:
-                        job.error_count += 1
-                        error = result.get("error", "Unknown error")[:200]
-                        add_log(f"  Error: {error}")
+                        async with job_lock:
+                            profile = (result or {}).get("profile")
+                            if profile is not None:
+                                entry = {"post": i + 1, "title": title, "success": bool(result.get("success")), **profile}
+                                job.run_profiles = (job.run_profiles or []) + [entry]  # New list for change detection
                         
-                except Exception as e:
+                            if error is not None:
+                                job.error_count += 1
+                                add_log(f"  [{i+1}] Exception: {str(error)[:200]}")
+                            elif result.get("success"):
+                                app_ids = result.get("app_ids", [])
+                                job.created_apps += len(app_ids)
+                                job.created_app_ids = job.created_app_ids + app_ids  # New list for change detection
+                                add_log(f"  [{i+1}] Created apps: {app_ids}")
+                            else:
+                                job.error_count += 1
+                                message = result.get("error", "Unknown error")[:200]
+                                add_log(f"  [{i+1}] Error: {message}")
+                        
+                            job.processed_posts += 1
+                            await db.commit()
+                finally:
+                    # A half-open trial that ended without reaching the model goes back to the breaker
+                    retry_state.breaker.release_trial()
+            
+            # One post's failure must not end the job while its siblings still run
+            outcomes = await asyncio.gather(
+                *(run_post(i, post) for i, post in enumerate(posts)), return_exceptions=True
+            )
+            failed = [(i, e) for i, e in enumerate(outcomes) if isinstance(e, BaseException)]
+            if failed:
+                # Drop whatever a failed post left half-written on the job session
+                await db.rollback()
+                await db.refresh(job)
+                for i, e in failed:
+                    logger.error(f"Post {i+1} of job {job_id} failed", exc_info=e)
                     job.error_count += 1
-                    add_log(f"  Exception: {str(e)[:200]}")
-                    logger.exception(f"Error processing post in job {job_id}")
-                
-                job.processed_posts += 1
+                    job.processed_posts += 1
+                    add_log(f"  [{i+1}] Failed: {str(e)[:200] or type(e).__name__}")
+                await db.commit()
+            
+            if endpoint_down:
+                job.status = JobStatus.FAILED
+                job.error_message = "Model endpoint unavailable"
+                add_log(
+                    f"Stopped at post {min(endpoint_down)+1}/{len(posts)}: model endpoint still failing "
+                    f"after {settings.AGENT_CIRCUIT_MAX_PAUSE_SECONDS:.0f}s pause"
+                )
+                job.completed_at = datetime.now(timezone.utc)
                 await db.commit()
+                return
+            
+            if cancelled_at:
+                job.status = JobStatus.CANCELLED
+                add_log(f"Cancelled at post {min(cancelled_at)+1}/{len(posts)}")
+                job.completed_at = datetime.now(timezone.utc)
+                await db.commit()
+                return
             
             job.status = JobStatus.COMPLETED
             add_log(f"Completed. Created {job.created_apps} apps, skipped {job.skipped_posts}, errors {job.error_count}")
@@ -228,7 +375,7 @@ async def process_job(job_id: int):
 async def cleanup_old_jobs():
     """Delete jobs older than 30 days."""
     cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-    async with AsyncSessionLocal() as db:
+    async with WorkerSessionLocal() as db:
         result = await db.execute(
             delete(IngestionJob).where(IngestionJob.created_at < cutoff)
         )
@@ -248,7 +395,7 @@ async def job_worker():
     while _worker_running:
         try:
             # Poll for pending jobs
-            async with AsyncSessionLocal() as db:
+            async with WorkerSessionLocal() as db:
                 result = await db.execute(
                     select(IngestionJob.id)
                     .filter(IngestionJob.status == JobStatus.PENDING)
@@ -275,22 +422,77 @@ async def job_worker():
     logger.info("Ingestion job worker stopped")
 
 
+# How often the link prober looks for app URLs that are due a check
+LINK_PROBE_POLL_SECONDS = 300
+
+
+async def link_probe_worker():
+    """Background loop that re-checks app URLs every LINK_PROBE_INTERVAL_SECONDS."""
+    logger.info("Link prober started")
+    while True:
+        try:
+            async with WorkerSessionLocal() as db:
+                summary = await run_link_checks(db, get_link_prober())
+            if summary["checked"]:
+                logger.info(
+                    f"Link prober checked {summary['checked']} URLs: "
+                    f"{summary['failing']} failing, {summary['reported']} reported"
+                )
+            # A full batch means more URLs are due; keep going
+            if summary["checked"] >= settings.LINK_PROBE_BATCH_SIZE:
+                continue
+        except Exception as e:
+            logger.exception(f"Error in link prober: {e}")
+        
+        await asyncio.sleep(min(LINK_PROBE_POLL_SECONDS, settings.LINK_PROBE_INTERVAL_SECONDS))
+
+
+# How often released media objects are collected
+MEDIA_GC_POLL_SECONDS = 600
+
+
+async def media_gc_worker():
+    """Background loop deleting media objects unreferenced past the grace period."""
+    while True:
+        try:
+            async with WorkerSessionLocal() as db:
+                deleted = await delete_unreferenced(db)
+            if deleted:
+                logger.info(f"Deleted {deleted} unreferenced media objects")
+            if deleted >= GC_BATCH_SIZE:
+                continue
+        except Exception as e:
+            logger.exception(f"Error in media GC: {e}")
+        
+        await asyncio.sleep(MEDIA_GC_POLL_SECONDS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown."""
-    # Startup: launch background worker
+    # Startup: launch background workers
     worker_task = asyncio.create_task(job_worker())
+    background_tasks = [worker_task]
+    if settings.LINK_PROBE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(link_probe_worker()))
+    if is_s3_configured():
+        background_tasks.append(asyncio.create_task(media_gc_worker()))
     
     yield
     
-    # Shutdown: stop worker
+    # Shutdown: stop workers
     global _worker_running
     _worker_running = False
-    worker_task.cancel()
-    try:
-        await worker_task
-    except asyncio.CancelledError:
-        pass
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await shutdown_browser_pool()
+    await close_media_uploader()
+    await close_link_prober()
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -310,6 +512,18 @@ app.add_middleware(
     expose_headers=["X-Newest-App-Id"],
 )
 
+if settings.DATABASE_READ_URL:
+    app.add_middleware(ReadYourWritesMiddleware, pin_seconds=settings.READ_YOUR_WRITES_SECONDS)
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache=compressed_cache,
+    )
+
 # Register routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(users.router, prefix="/users", tags=["users"])
@@ -328,6 +542,8 @@ app.include_router(ownership.router, tags=["ownership"])
 app.include_router(feedback.router, tags=["feedback"])
 app.include_router(agent.router, tags=["agent"])
 app.include_router(og.router, prefix="/og", tags=["og"])
+app.include_router(sitemap.router, tags=["sitemap"])
+app.include_router(health.router, prefix="/health", tags=["health"])
 app.include_router(jobs_router)
 
 @app.get("/")
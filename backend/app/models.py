@@ -1,13 +1,20 @@
 import enum
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional
-from sqlalchemy import JSON, ForeignKey, Float, Table, Text, DateTime, func, String, Column, Enum, Boolean, UniqueConstraint
+from sqlalchemy import JSON, ForeignKey, Float, Table, Text, DateTime, func, String, Column, Enum, Boolean, UniqueConstraint, Index, text
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column, validates
+
+from app.utils import normalize_url
 
 class Base(DeclarativeBase):
     pass
 
+
+def utcnow() -> datetime:
+    """Python-side timestamp, so updated_at has sub-second precision on every backend."""
+    return datetime.now(timezone.utc)
+
 # Association tables
 app_tools = Table(
     "app_tools",
@@ -71,6 +78,8 @@ class User(Base):
     google_id: Mapped[Optional[str]] = mapped_column(String(100), unique=True, index=True, nullable=True)
     github_id: Mapped[Optional[str]] = mapped_column(String(100), unique=True, index=True, nullable=True)
     api_key: Mapped[Optional[str]] = mapped_column(String(255), unique=True, index=True, nullable=True)
+    # Bumped on every row update; part of the ETag version stamps
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow)
 
     apps: Mapped[List["App"]] = relationship("App", back_populates="creator")
     comments: Mapped[List["Comment"]] = relationship("Comment", back_populates="user", cascade="all, delete-orphan")
@@ -130,8 +139,34 @@ class AppMedia(Base):
     app_id: Mapped[int] = mapped_column(ForeignKey("apps.id"), index=True)
     media_url: Mapped[str] = mapped_column(String(512))
     
+    # Derived variants and encoding metadata (set for processed uploads)
+    thumbnail_url: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    og_image_url: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    width: Mapped[Optional[int]] = mapped_column(nullable=True)
+    height: Mapped[Optional[int]] = mapped_column(nullable=True)
+    size_bytes: Mapped[Optional[int]] = mapped_column(nullable=True)
+    
     app: Mapped["App"] = relationship("App", back_populates="media")
 
+class MediaObject(Base):
+    """A content-addressed object in the media bucket.
+
+    Objects are keyed by the SHA-256 of their bytes, so identical uploads share
+    one object. ``ref_count`` tracks how many AppMedia URLs point at it; the
+    object is deleted from storage once the count has stayed at zero for
+    ``MEDIA_GC_GRACE_SECONDS``.
+    """
+    __tablename__ = "media_objects"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    file_key: Mapped[str] = mapped_column(String(512), unique=True)
+    url: Mapped[str] = mapped_column(String(512), unique=True, index=True)
+    sha256: Mapped[str] = mapped_column(String(64), index=True)
+    ref_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    # When ref_count last dropped to zero; the object is deleted after a grace period
+    released_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
 class App(Base):
     __tablename__ = "apps"
 
@@ -146,6 +181,8 @@ class App(Base):
     
     # New fields for v2.0
     app_url: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    # normalize_url(app_url), kept in sync by _normalize_app_url; duplicate lookups match on it
+    app_url_normalized: Mapped[Optional[str]] = mapped_column(String(512), nullable=True, index=True)
     youtube_url: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
     is_agent_submitted: Mapped[bool] = mapped_column(Boolean, default=False)
     slug: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
@@ -162,6 +199,8 @@ class App(Base):
     
     status: Mapped[AppStatus] = mapped_column(Enum(AppStatus), default=AppStatus.CONCEPT, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Bumped on every row update; part of the ETag version stamps
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow)
 
     # Relationships
     creator: Mapped["User"] = relationship("User", back_populates="apps")
@@ -176,6 +215,24 @@ class App(Base):
     parent: Mapped[Optional["App"]] = relationship("App", remote_side=[id], back_populates="forks")
     forks: Mapped[List["App"]] = relationship("App", back_populates="parent")
 
+    @validates("app_url")
+    def _normalize_app_url(self, key, value):
+        self.app_url_normalized = normalize_url(value)
+        return value
+
+    __table_args__ = (
+        # Profile app lists: one creator, newest first
+        Index("ix_apps_creator_id_created_at", "creator_id", "created_at"),
+        # Default feed and newest-app polling skip dead apps
+        Index(
+            "ix_apps_live_created_at",
+            "created_at",
+            "id",
+            postgresql_where=text("is_dead = false"),
+            sqlite_where=text("is_dead = 0"),
+        ),
+    )
+
 class Implementation(Base):
     __tablename__ = "implementations"
 
@@ -222,6 +279,8 @@ class Comment(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     content: Mapped[str] = mapped_column(Text)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Bumped on every row update; part of the ETag version stamps
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow)
     
     # Counter cache for performance
     score: Mapped[int] = mapped_column(default=0)
@@ -234,6 +293,9 @@ class Comment(Base):
     parent: Mapped[Optional["Comment"]] = relationship("Comment", remote_side=[id], back_populates="replies")
     replies: Mapped[List["Comment"]] = relationship("Comment", back_populates="parent", cascade="all, delete-orphan")
 
+    # Thread listing: one app's comments, newest first
+    __table_args__ = (Index("ix_comments_app_id_created_at", "app_id", "created_at"),)
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -257,8 +319,12 @@ class Like(Base):
     app: Mapped["App"] = relationship("App", back_populates="likes")
     user: Mapped["User"] = relationship("User", back_populates="likes")
 
-    # Ensure a user can only like an app once
-    __table_args__ = (UniqueConstraint("app_id", "user_id", name="uq_app_like"),)
+    __table_args__ = (
+        # Ensure a user can only like an app once
+        UniqueConstraint("app_id", "user_id", name="uq_app_like"),
+        # The viewer's likes (liked status, liked-by filters) start from the user
+        Index("ix_likes_user_id_app_id", "user_id", "app_id"),
+    )
 
 class CommentVote(Base):
     __tablename__ = "comment_votes"
@@ -282,6 +348,8 @@ class Collection(Base):
     owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     is_public: Mapped[bool] = mapped_column(default=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Bumped on every row update; part of the ETag version stamps
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow)
 
     owner: Mapped["User"] = relationship("User", back_populates="collections")
     apps: Mapped[List["App"]] = relationship("App", secondary=collection_apps)
@@ -298,6 +366,9 @@ class Notification(Base):
 
     user: Mapped["User"] = relationship("User", back_populates="notifications")
 
+    # A user's notifications, newest first
+    __table_args__ = (Index("ix_notifications_user_id_created_at", "user_id", "created_at"),)
+
 
 class Feedback(Base):
     __tablename__ = "feedback"
@@ -315,14 +386,40 @@ class DeadAppReport(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     app_id: Mapped[int] = mapped_column(ForeignKey("apps.id"), index=True)
-    reporter_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    # None for reports filed automatically by the link prober
+    reporter_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True, index=True)
     reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     status: Mapped[ReportStatus] = mapped_column(Enum(ReportStatus), default=ReportStatus.PENDING, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     resolved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
 
     app: Mapped["App"] = relationship("App")
-    reporter: Mapped["User"] = relationship("User")
+    reporter: Mapped[Optional["User"]] = relationship("User")
+
+    # Pending reports of one app (duplicate check, resolving)
+    __table_args__ = (Index("ix_dead_app_reports_app_id_status", "app_id", "status"),)
+
+
+class LinkCheck(Base):
+    """Latest background health check of an app's ``app_url``."""
+    __tablename__ = "link_checks"
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    app_id: Mapped[int] = mapped_column(ForeignKey("apps.id", ondelete="CASCADE"), unique=True, index=True)
+    url: Mapped[str] = mapped_column(String(512), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(nullable=True)
+    latency_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Validators from the last response, sent back as conditional request headers
+    etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    consecutive_failures: Mapped[int] = mapped_column(default=0, index=True)
+    checked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    last_ok_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Set when a dead report was filed for the current failure streak
+    reported_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    app: Mapped["App"] = relationship("App")
 
 
 class JobStatus(str, enum.Enum):
@@ -362,6 +459,8 @@ class IngestionJob(Base):
     created_app_ids: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     log_entries: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # Per-post agent telemetry (tokens, tool latency, browser steps, retries)
+    run_profiles: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
     
     # Cancellation support
     cancel_requested: Mapped[bool] = mapped_column(default=False, index=True)
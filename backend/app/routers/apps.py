@@ -1,19 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc, func, distinct
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db, IS_POSTGRES
-from app.models import App, User, Tool, Tag, AppMedia, AppStatus, Like, Comment, Review, DeadAppReport, ReportStatus
+from app.core.conditional import conditional, etag_matches, not_modified
+from app.core.fastjson import FastJSONResponse
+from app.database import get_db, get_read_db, IS_POSTGRES
+from app.models import App, User, Tool, Tag, AppMedia, AppStatus, Like, Comment, Review, DeadAppReport, ReportStatus, LinkCheck, utcnow
 from app.schemas import schemas
 from app.routers.auth import get_current_user, get_current_user_optional, require_admin
-from app.utils import slugify, generate_unique_slug, normalize_url
+from app.utils import slugify
 from app.services.telegram import notify_app_created, notify_dead_link_report
+from app.services.media_refs import media_urls, release_media, retain_media
+from app.services.slugs import SLUG_MAX_LENGTH, add_with_unique
+from app.services.app_payloads import APP_COLUMNS, app_payloads
+from app.services.facets import AppFilter, app_filter, cached_facets, invalidate_facets
+from app.services.og_cache import app_tag, og_cache
+from app.services.taxonomy import taxonomy_cache, user_apps_key
 
 router = APIRouter()
 
+# Facet counts don't depend on the viewer; browsers revalidate via the ETag
+FACETS_CACHE_CONTROL = "public, no-cache"
+
 
 async def get_app_counts(db: AsyncSession, app_id: int) -> tuple[int, int]:
     """Get likes and comments counts for a single app."""
@@ -62,22 +73,12 @@ def app_to_schema(
 
 @router.get("/", response_model=List[schemas.App])
 async def get_apps(
-    response: Response,
     skip: int = 0,
     limit: int = 20,
-    tool_id: Optional[List[int]] = Query(None),
-    tag_id: Optional[List[int]] = Query(None),
-    tool: Optional[str] = None,
-    tag: Optional[str] = None,
-    search: Optional[str] = None,
-    app_url: Optional[str] = Query(None, description="Filter by app URL (normalized match)"),
-    status: Optional[AppStatus] = None,
-    creator_id: Optional[int] = None,
-    liked_by_user_id: Optional[int] = None,
-    include_dead: bool = Query(False, description="Include dead apps in results"),
+    filters: AppFilter = Depends(app_filter),
     sort_by: str = Query("trending", enum=["trending", "newest", "top_rated", "likes"]),
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Query for the newest app ID (efficient single-row query for polling)
     newest_result = await db.execute(
@@ -87,80 +88,15 @@ async def get_apps(
         .limit(1)
     )
     newest_app_id = newest_result.scalar()
-    if newest_app_id:
-        response.headers["X-Newest-App-Id"] = str(newest_app_id)
-    
-    # Base query with eager loading of media, tools, tags and creator
-    query = select(App).options(
-        selectinload(App.tools), 
-        selectinload(App.tags), 
-        selectinload(App.media),
-        selectinload(App.creator)
-    )
-    
-    # Filter out dead apps by default
-    if not include_dead:
-        query = query.filter(App.is_dead == False)
-    
-    # 1. Joins for filtering and sorting
-    if tool_id or tool:
-        query = query.join(App.tools)
-    if tag_id or tag:
-        query = query.join(App.tags)
-        
-    # 2. Apply Filters
-    if tool_id:
-        query = query.filter(Tool.id.in_(tool_id))
-    elif tool:
-        tool_names = [t.strip() for t in tool.split(",") if t.strip()]
-        if len(tool_names) > 1:
-            query = query.filter(Tool.name.in_(tool_names))
-        else:
-            query = query.filter(Tool.name.ilike(f"%{tool_names[0]}%"))
-        
-    if tag_id:
-        query = query.filter(Tag.id.in_(tag_id))
-    elif tag:
-        tag_names = [t.strip() for t in tag.split(",") if t.strip()]
-        if len(tag_names) > 1:
-            query = query.filter(Tag.name.in_(tag_names))
-        else:
-            query = query.filter(Tag.name.ilike(f"%{tag_names[0]}%"))
-        
-    if search:
-        query = query.filter(
-            (App.title.ilike(f"%{search}%")) |
-            (App.prompt_text.ilike(f"%{search}%")) | 
-            (App.prd_text.ilike(f"%{search}%")) |
-            (App.app_url.ilike(f"%{search}%"))
-        )
-    
-    # Filter by normalized app_url for duplicate detection
-    if app_url:
-        normalized_input = normalize_url(app_url)
-        if normalized_input:
-            # Match apps where normalized URL contains our normalized input
-            # This handles variations like http vs https, www vs non-www
-            query = query.filter(App.app_url.isnot(None))
-            # Use ILIKE for case-insensitive partial matching on the URL
-            query = query.filter(App.app_url.ilike(f"%{normalized_input}%"))
-        
-    if status:
-        query = query.filter(App.status == status)
-
-    if creator_id:
-        query = query.filter(App.creator_id == creator_id)
+    headers = {"X-Newest-App-Id": str(newest_app_id)} if newest_app_id else {}
     
-    if liked_by_user_id:
-        query = query.filter(App.likes.any(Like.user_id == liked_by_user_id))
-    
-    # 3. Apply Sorting & Grouping
-    # We always group by App.id to avoid duplicates from many-to-many joins
-    query = query.group_by(App.id)
+    # Plain columns; media, tools, tags, creator and counts are batched in app_payloads.
+    # Tag/tool filters are EXISTS subqueries, so only the aggregate sorts need GROUP BY.
+    query = select(*APP_COLUMNS).filter(*filters.clauses())
     
     if sort_by == "trending":
         # Trending = (Likes + Comments * 2) / (Age + 2)^1.8
-        query = query.outerjoin(App.likes).outerjoin(App.comments)
+        query = query.outerjoin(App.likes).outerjoin(App.comments).group_by(App.id)
         
         likes_count = func.count(distinct(Like.id))
         comments_count = func.count(distinct(Comment.id))
@@ -177,13 +113,13 @@ async def get_apps(
         query = query.order_by(desc(trending_score), desc(App.id))
         
     elif sort_by == "top_rated":
-        query = query.outerjoin(App.reviews)
+        query = query.outerjoin(App.reviews).group_by(App.id)
         # Average score, default to 0 if no reviews
         avg_score = func.coalesce(func.avg(Review.score), 0)
         query = query.order_by(desc(avg_score), desc(App.created_at), desc(App.id))
         
     elif sort_by == "likes":
-        query = query.outerjoin(App.likes)
+        query = query.outerjoin(App.likes).group_by(App.id)
         query = query.order_by(desc(func.count(distinct(Like.id))), desc(App.created_at), desc(App.id))
         
     elif sort_by == "newest":
@@ -194,52 +130,28 @@ async def get_apps(
         
     query = query.offset(skip).limit(limit)
     result = await db.execute(query)
-    apps = result.scalars().all()
-    
-    # Get counts for all apps in a single query
-    app_ids = [a.id for a in apps]
-    
-    if app_ids:
-        # Get likes counts
-        likes_result = await db.execute(
-            select(Like.app_id, func.count(Like.id))
-            .filter(Like.app_id.in_(app_ids))
-            .group_by(Like.app_id)
-        )
-        likes_map = dict(likes_result.all())
-        
-        # Get comments counts
-        comments_result = await db.execute(
-            select(Comment.app_id, func.count(Comment.id))
-            .filter(Comment.app_id.in_(app_ids))
-            .group_by(Comment.app_id)
-        )
-        comments_map = dict(comments_result.all())
-    else:
-        likes_map = {}
-        comments_map = {}
-    
-    # Get liked status if user is logged in
-    liked_app_ids = set()
-    if current_user:
-        if app_ids:
-            likes_q = await db.execute(
-                select(Like.app_id)
-                .filter(Like.app_id.in_(app_ids))
-                .filter(Like.user_id == current_user.id)
-            )
-            liked_app_ids = set(likes_q.scalars().all())
+    payloads = await app_payloads(db, result.all(), current_user.id if current_user else None)
+    # Already in schemas.App's shape; skip response_model re-validation
+    return FastJSONResponse(payloads, headers=headers)
 
-    # Convert to response with counts
-    return [
-        app_to_schema(
-            app, 
-            likes_count=likes_map.get(app.id, 0),
-            comments_count=comments_map.get(app.id, 0),
-            is_liked=(app.id in liked_app_ids)
-        )
-        for app in apps
-    ]
+@router.get("/facets", response_model=schemas.AppFacets)
+async def get_app_facets(
+    request: Request,
+    filters: AppFilter = Depends(app_filter),
+    db: AsyncSession = Depends(get_db)
+):
+    """Per-tag and per-tool app counts for the current filter, with an ETag.
+
+    Counts are cached for every client, so misses are computed on the primary.
+    """
+    page = await cached_facets(db, filters)
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return not_modified(page.etag, cache_control=FACETS_CACHE_CONTROL)
+    return Response(
+        content=page.body,
+        media_type="application/json",
+        headers={"ETag": page.etag, "Cache-Control": FACETS_CACHE_CONTROL},
+    )
 
 @router.post("/", response_model=schemas.App)
 async def create_app(
@@ -247,18 +159,6 @@ async def create_app(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    
-    # Generate slug
-    base_slug = slugify(app_in.title)
-    slug = base_slug
-    
-    # Check for uniqueness (simple loop for now, ideally handle with DB constraint exception)
-    # Since we are in async, we can do a check.
-    # Note: efficient way is to catch IntegrityError but for user feedback check is okay.
-    existing = await db.execute(select(App).filter(App.slug == slug))
-    if existing.scalar_one_or_none():
-        slug = generate_unique_slug(base_slug)
-
     db_app = App(
         creator_id=current_user.id,
         title=app_in.title,
@@ -271,8 +171,11 @@ async def create_app(
         is_agent_submitted=app_in.is_agent_submitted,
         is_owner=app_in.is_owner,
         parent_app_id=app_in.parent_app_id,
-        slug=slug
+        tools=[],
+        tags=[],
     )
+    # Insert first so the slug savepoint holds only this row
+    await add_with_unique(db, db_app, "slug", App.slug, slugify(app_in.title), max_length=SLUG_MAX_LENGTH)
     
     # Add tools and tags
     if app_in.tool_ids:
@@ -284,8 +187,9 @@ async def create_app(
         tags = result.scalars().all()
         db_app.tags = tags
         
-    db.add(db_app)
     await db.commit()
+    taxonomy_cache.invalidate(user_apps_key(current_user.id))
+    invalidate_facets()
     # Reload with eager loading
     result = await db.execute(
         select(App)
@@ -295,10 +199,45 @@ async def create_app(
     app = result.scalars().first()
     return app_to_schema(app, likes_count=0, comments_count=0, is_liked=False)
 
-@router.get("/{app_identifier}", response_model=schemas.App)
+async def app_stamp(
+    app_identifier: str,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """Version stamp of everything ``get_app`` returns, in one query (None if missing)."""
+    if app_identifier.isdigit():
+        app_filter = App.id == int(app_identifier)
+    else:
+        app_filter = App.slug == app_identifier
+    result = await db.execute(
+        select(
+            App.id,
+            App.updated_at,
+            User.updated_at,
+            select(func.count(Like.id)).where(Like.app_id == App.id).scalar_subquery(),
+            select(func.max(Like.id)).where(Like.app_id == App.id).scalar_subquery(),
+            select(func.count(Comment.id)).where(Comment.app_id == App.id).scalar_subquery(),
+            select(func.count(AppMedia.id)).where(AppMedia.app_id == App.id).scalar_subquery(),
+            select(func.max(AppMedia.id)).where(AppMedia.app_id == App.id).scalar_subquery(),
+        )
+        .join(User, User.id == App.creator_id)
+        .filter(app_filter)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    # Tag and tool names are embedded too
+    tags, tools = await taxonomy_cache.tags(db), await taxonomy_cache.tools(db)
+    return (*row, tags.etag, tools.etag, current_user.id if current_user else None)
+
+@router.get(
+    "/{app_identifier}",
+    response_model=schemas.App,
+    dependencies=[Depends(conditional(app_stamp))],
+)
 async def get_app(
     app_identifier: str, 
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: Optional[User] = Depends(get_current_user_optional)
 ):
     # Try to parse as integer ID first
@@ -370,9 +309,14 @@ async def update_app(
 
     for field, value in update_data.items():
         setattr(db_app, field, value)
+    # Tool/tag changes alone don't update the row; bump the ETag stamp explicitly
+    db_app.updated_at = utcnow()
     
     db.add(db_app)
     await db.commit()
+    taxonomy_cache.invalidate(user_apps_key(current_user.id))
+    og_cache.invalidate(app_tag(app_id))
+    invalidate_facets()
     # Reload to ensure serialization works
     result = await db.execute(
         select(App)
@@ -397,7 +341,7 @@ async def delete_app(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(select(App).filter(App.id == app_id))
+    result = await db.execute(select(App).options(selectinload(App.media)).filter(App.id == app_id))
     db_app = result.scalars().first()
     
     if not db_app:
@@ -405,9 +349,13 @@ async def delete_app(
     if db_app.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    await release_media(db, [u for m in db_app.media for u in media_urls(m)])
     # Cascade delete is handled by DB relationships usually, but let's be safe or check models
     await db.delete(db_app)
     await db.commit()
+    taxonomy_cache.invalidate(user_apps_key(current_user.id))
+    og_cache.invalidate(app_tag(app_id))
+    invalidate_facets()
     return None
 
 @router.post("/{app_id}/fork", response_model=schemas.App)
@@ -425,10 +373,6 @@ async def fork_app(
     if not parent_app:
         raise HTTPException(status_code=404, detail="Parent app not found")
     
-    # Generate slug for fork
-    base_slug = slugify(f"{parent_app.title}-fork")
-    slug = generate_unique_slug(base_slug) # Always unique for forks likely
-
     # Simple fork: copy title and prompt and set parent
     db_app = App(
         creator_id=current_user.id,
@@ -438,15 +382,19 @@ async def fork_app(
         extra_specs=parent_app.extra_specs,
         status=AppStatus.CONCEPT,
         parent_app_id=parent_app.id,
-        slug=slug
+        tools=[],
+        tags=[],
     )
+    base_slug = slugify(f"{parent_app.title}-fork")
+    await add_with_unique(db, db_app, "slug", App.slug, base_slug, max_length=SLUG_MAX_LENGTH)
     
     # Inherit tools and tags? PRD doesn't specify, but often useful
     db_app.tools = parent_app.tools
     db_app.tags = parent_app.tags
     
-    db.add(db_app)
     await db.commit()
+    taxonomy_cache.invalidate(user_apps_key(current_user.id))
+    invalidate_facets()
     # Reload with eager loading
     result = await db.execute(
         select(App)
@@ -470,7 +418,9 @@ async def add_app_media(
     
     db_media = AppMedia(**media_in.model_dump(), app_id=app_id)
     db.add(db_media)
+    await retain_media(db, media_urls(db_media))
     await db.commit()
+    og_cache.invalidate(app_tag(app_id))
     await db.refresh(db_media)
     return db_media
 
@@ -497,8 +447,10 @@ async def delete_app_media(
     if not db_media:
         raise HTTPException(status_code=404, detail="Media not found")
     
+    await release_media(db, media_urls(db_media))
     await db.delete(db_media)
     await db.commit()
+    og_cache.invalidate(app_tag(app_id))
     return None
 
 
@@ -589,6 +541,22 @@ async def get_pending_dead_reports(
     return response
 
 
+@router.get("/link-checks/failing", response_model=List[schemas.LinkCheck])
+async def get_failing_link_checks(
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apps whose URL failed its latest background checks (admin only), worst first."""
+    result = await db.execute(
+        select(LinkCheck)
+        .filter(LinkCheck.consecutive_failures > 0)
+        .order_by(desc(LinkCheck.consecutive_failures), desc(LinkCheck.checked_at))
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
 @router.put("/dead-reports/{report_id}/resolve", response_model=schemas.DeadAppReport)
 async def resolve_dead_report(
     report_id: int,
@@ -637,5 +605,7 @@ async def resolve_dead_report(
             db_app.is_dead = True
     
     await db.commit()
+    if resolve_in.status == ReportStatus.CONFIRMED:
+        invalidate_facets()
     await db.refresh(db_report)
     return db_report
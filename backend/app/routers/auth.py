@@ -14,6 +14,7 @@ from app.schemas import schemas
 from app.core import security
 from app.core.security import SECRET_KEY, ALGORITHM, generate_api_key
 from app.core.config import settings
+from app.services.slugs import USERNAME_MAX_LENGTH, add_with_unique
 from app.services.telegram import notify_new_user
 
 router = APIRouter()
@@ -165,26 +166,19 @@ async def google_login(request: schemas.SocialLoginRequest, db: AsyncSession = D
             if not user.avatar:
                 user.avatar = avatar
         else:
-            # Ensure unique username
-            base_username = name.replace(" ", "").lower()
-            username = base_username
-            counter = 1
-            while True:
-                result = await db.execute(select(User).filter(User.username == username))
-                if not result.scalars().first():
-                    break
-                username = f"{base_username}{counter}"
-                counter += 1
-            
             user = User(
                 email=email,
-                username=username,
                 google_id=google_id,
                 api_key=generate_api_key(),
                 avatar=avatar,
                 reputation_score=0.0
             )
-            db.add(user)
+            # Ensure unique username
+            await add_with_unique(
+                db, user, "username", User.username, name.replace(" ", "").lower(),
+                separator="", max_length=USERNAME_MAX_LENGTH,
+            )
+            username = user.username
             is_new_user = True
         await db.commit()
         if is_new_user:
@@ -270,26 +264,19 @@ async def github_login(request: schemas.SocialLoginRequest, db: AsyncSession = D
             if not user.avatar:
                 user.avatar = avatar
         else:
-            # Ensure unique username
-            base_username = username_github.lower()
-            username = base_username
-            counter = 1
-            while True:
-                result = await db.execute(select(User).filter(User.username == username))
-                if not result.scalars().first():
-                    break
-                username = f"{base_username}{counter}"
-                counter += 1
-                
             user = User(
                 email=email,
-                username=username,
                 github_id=github_id,
                 api_key=generate_api_key(),
                 avatar=avatar,
                 reputation_score=0.0
             )
-            db.add(user)
+            # Ensure unique username
+            await add_with_unique(
+                db, user, "username", User.username, username_github.lower(),
+                separator="", max_length=USERNAME_MAX_LENGTH,
+            )
+            username = user.username
             is_new_user = True
         await db.commit()
         if is_new_user:
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
 
+from app.core.conditional import conditional
 from app.database import get_db
-from app.models import Collection, User, App, collection_apps
+from app.models import AppMedia, Collection, User, App, collection_apps, utcnow
 from app.schemas import schemas
 from app.routers.auth import get_current_user, get_current_user_optional
+from app.services.taxonomy import taxonomy_cache
 
 router = APIRouter()
 
@@ -36,13 +38,47 @@ async def create_collection(
         .options(
             selectinload(Collection.apps).selectinload(App.tools),
             selectinload(Collection.apps).selectinload(App.tags),
-            selectinload(Collection.apps).selectinload(App.media)
+            selectinload(Collection.apps).selectinload(App.media),
+            selectinload(Collection.apps).selectinload(App.creator)
         )
         .filter(Collection.id == db_col.id)
     )
     return result.scalars().first()
 
-@router.get("/{col_id}", response_model=schemas.Collection)
+async def collection_stamp(
+    col_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """Version stamp of a collection and its apps (None if missing or private to someone else)."""
+    member_apps = select(collection_apps.c.app_id).where(collection_apps.c.collection_id == Collection.id)
+    result = await db.execute(
+        select(
+            Collection.updated_at,
+            Collection.owner_id,
+            Collection.is_public,
+            select(func.count(App.id)).where(App.id.in_(member_apps)).scalar_subquery(),
+            select(func.max(App.updated_at)).where(App.id.in_(member_apps)).scalar_subquery(),
+            select(func.max(User.updated_at))
+            .join(App, App.creator_id == User.id)
+            .where(App.id.in_(member_apps)).scalar_subquery(),
+            select(func.count(AppMedia.id)).where(AppMedia.app_id.in_(member_apps)).scalar_subquery(),
+            select(func.max(AppMedia.id)).where(AppMedia.app_id.in_(member_apps)).scalar_subquery(),
+        ).filter(Collection.id == col_id)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    if not row.is_public and (not current_user or row.owner_id != current_user.id):
+        return None
+    tags, tools = await taxonomy_cache.tags(db), await taxonomy_cache.tools(db)
+    return (*row, tags.etag, tools.etag)
+
+@router.get(
+    "/{col_id}",
+    response_model=schemas.Collection,
+    dependencies=[Depends(conditional(collection_stamp))],
+)
 async def get_collection(
     col_id: int, 
     db: AsyncSession = Depends(get_db),
@@ -53,7 +89,8 @@ async def get_collection(
         .options(
             selectinload(Collection.apps).selectinload(App.tools),
             selectinload(Collection.apps).selectinload(App.tags),
-            selectinload(Collection.apps).selectinload(App.media)
+            selectinload(Collection.apps).selectinload(App.media),
+            selectinload(Collection.apps).selectinload(App.creator)
         )
         .filter(Collection.id == col_id)
     )
@@ -90,6 +127,8 @@ async def add_to_collection(
     
     if app not in col.apps:
         col.apps.append(app)
+        # Membership changes don't update the row; bump the ETag stamp explicitly
+        col.updated_at = utcnow()
         db.add(col)
         await db.commit()
         
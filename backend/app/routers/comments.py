@@ -4,7 +4,8 @@ from sqlalchemy import select, func, and_
 from sqlalchemy.orm import selectinload
 from typing import List
 
-from app.database import get_db
+from app.core.conditional import conditional
+from app.database import get_db, get_read_db
 from app.models import Comment, User, App, Notification, NotificationType, CommentVote
 from app.schemas import schemas
 from app.routers.auth import get_current_user, get_current_user_optional
@@ -13,11 +14,37 @@ from app.services.telegram import notify_comment
 
 router = APIRouter()
 
-@router.get("/apps/{app_id}/comments", response_model=List[schemas.CommentWithReplies])
+async def comments_stamp(
+    app_id: int,
+    current_user: User | None = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Version stamp of an app's comment threads as seen by the viewer.
+
+    Edits and vote score changes bump ``Comment.updated_at``; commenter profile
+    changes bump ``User.updated_at``. The viewer's id covers ``user_vote``.
+    """
+    result = await db.execute(
+        select(
+            func.count(Comment.id),
+            func.max(Comment.id),
+            func.max(Comment.updated_at),
+            func.max(User.updated_at),
+        )
+        .join(User, User.id == Comment.user_id)
+        .filter(Comment.app_id == app_id)
+    )
+    return (*result.one(), current_user.id if current_user else None)
+
+@router.get(
+    "/apps/{app_id}/comments",
+    response_model=List[schemas.CommentWithReplies],
+    dependencies=[Depends(conditional(comments_stamp))],
+)
 async def get_app_comments(
     app_id: int,
     current_user: User | None = Depends(get_current_user_optional),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Fetch comments with replies
     result = await db.execute(
@@ -0,0 +1,23 @@
+"""Liveness check and database pool metrics."""
+from fastapi import APIRouter, Depends
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db, pool_stats
+from app.models import User
+from app.routers.auth import require_admin
+
+router = APIRouter()
+
+
+@router.get("/")
+async def health(db: AsyncSession = Depends(get_db)):
+    """Round trip to the database through the API pool."""
+    await db.execute(text("SELECT 1"))
+    return {"status": "ok"}
+
+
+@router.get("/db-pool")
+async def db_pool(_: User = Depends(require_admin)):
+    """Checkout metrics of the API and worker connection pools (admin only)."""
+    return pool_stats()
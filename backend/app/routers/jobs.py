@@ -5,9 +5,11 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 
+from app.agent.telemetry import aggregate_profiles
 from app.database import get_db
 from app.models import User, IngestionJob, JobStatus
 from app.routers.auth import require_admin
@@ -34,8 +36,8 @@ class IngestionJobCreate(BaseModel):
     subreddit: str = "SideProject"
 
 
-class IngestionJobResponse(BaseModel):
-    """Response for a single job."""
+class IngestionJobSummary(BaseModel):
+    """Lean job representation for listings (no log entries)."""
     id: int
     status: JobStatus
     subreddit: str
@@ -46,7 +48,6 @@ class IngestionJobResponse(BaseModel):
     error_count: int
     created_app_ids: list[int] | None
     error_message: str | None
-    log_entries: list[str] | None
     cancel_requested: bool
     created_by_id: int
     created_at: datetime
@@ -56,10 +57,17 @@ class IngestionJobResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class IngestionJobResponse(IngestionJobSummary):
+    """Response for a single job."""
+    log_entries: list[str] | None
+    run_profiles: list[dict] | None = None
+
+
 class IngestionJobListResponse(BaseModel):
     """Response for listing jobs."""
-    jobs: list[IngestionJobResponse]
+    jobs: list[IngestionJobSummary]
     total: int
+    next_before_id: int | None = None
 
 
 class JobCreateResponse(BaseModel):
@@ -126,37 +134,91 @@ async def list_ingestion_jobs(
     status_filter: Optional[JobStatus] = None,
     limit: int = 20,
     offset: int = 0,
+    before_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
     admin_user: User = Depends(require_admin),
 ):
     """
-    List ingestion jobs.
+    List ingestion jobs, newest first.
     
     Admin-only endpoint. Optionally filter by status.
-    """
-    query = select(IngestionJob).order_by(desc(IngestionJob.created_at))
     
+    Pass ``before_id`` (the ``next_before_id`` of the previous page) for
+    keyset pagination; ``offset`` is still honoured when no cursor is given.
+    The large ``posts_data``/``log_entries``/``run_profiles`` JSON columns are
+    never loaded here.
+    """
+    filters = []
     if status_filter:
-        query = query.filter(IngestionJob.status == status_filter)
+        filters.append(IngestionJob.status == status_filter)
     
     # Get total count
-    count_query = select(IngestionJob)
-    if status_filter:
-        count_query = count_query.filter(IngestionJob.status == status_filter)
-    result = await db.execute(count_query)
-    total = len(result.scalars().all())
+    result = await db.execute(
+        select(func.count()).select_from(IngestionJob).filter(*filters)
+    )
+    total = result.scalar() or 0
+    
+    # Ids are assigned in creation order, so id desc matches created_at desc
+    # and gives a stable, indexed keyset cursor.
+    query = (
+        select(IngestionJob)
+        .options(
+            defer(IngestionJob.posts_data),
+            defer(IngestionJob.log_entries),
+            defer(IngestionJob.run_profiles),
+        )
+        .filter(*filters)
+        .order_by(desc(IngestionJob.id))
+    )
+    if before_id is not None:
+        query = query.filter(IngestionJob.id < before_id)
+    else:
+        query = query.offset(offset)
     
     # Get paginated results
-    query = query.offset(offset).limit(limit)
-    result = await db.execute(query)
+    result = await db.execute(query.limit(limit))
     jobs = result.scalars().all()
     
+    next_before_id = jobs[-1].id if len(jobs) == limit else None
+    
     return IngestionJobListResponse(
-        jobs=[IngestionJobResponse.model_validate(job) for job in jobs],
+        jobs=[IngestionJobSummary.model_validate(job) for job in jobs],
         total=total,
+        next_before_id=next_before_id,
     )
 
 
+@router.get("/ingestion/telemetry")
+async def get_agent_telemetry(
+    job_id: Optional[int] = None,
+    last_jobs: int = 20,
+    db: AsyncSession = Depends(get_db),
+    admin_user: User = Depends(require_admin),
+):
+    """
+    Aggregate agent run profiles: tokens, per-tool latency, browser steps, retries.
+    
+    Admin-only endpoint. Covers one job when ``job_id`` is given, otherwise
+    the ``last_jobs`` most recent jobs.
+    """
+    query = select(IngestionJob.run_profiles)
+    if job_id is not None:
+        query = query.filter(IngestionJob.id == job_id)
+    else:
+        query = query.order_by(desc(IngestionJob.id)).limit(max(1, min(last_jobs, 200)))
+    
+    result = await db.execute(query)
+    job_profiles = result.scalars().all()
+    if job_id is not None and not job_profiles:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found",
+        )
+    
+    profiles = [p for profiles in job_profiles for p in (profiles or [])]
+    return {"jobs": len(job_profiles), **aggregate_profiles(profiles)}
+
+
 @router.get("/ingestion/{job_id}", response_model=IngestionJobResponse)
 async def get_ingestion_job(
     job_id: int,
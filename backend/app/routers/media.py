@@ -1,71 +1,121 @@
+import asyncio
+import uuid
+
 from fastapi import APIRouter, HTTPException, Depends
-import boto3
 from botocore.exceptions import ClientError
-from botocore.config import Config
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.database import get_db
 from app.routers.auth import get_current_user
 from app.models import User
-from app.schemas.schemas import MediaResponse, PresignedUrlRequest
-import uuid
+from app.schemas.schemas import (
+    MediaResponse, MediaBatchResponse, PresignedUrlRequest, PresignedUrlBatchRequest,
+)
+from app.services.storage import (
+    build_download_url, content_key, is_s3_configured, is_sha256, presign_put,
+)
+from app.services.media_refs import hold_existing
 
 router = APIRouter()
 
-def get_s3_client():
-    return boto3.client(
-        "s3",
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        region_name=settings.AWS_REGION,
-        endpoint_url=settings.S3_ENDPOINT_URL,
-        config=Config(
-            signature_version='s3v4',
-            s3={'addressing_style': 'path'}
+# Upper bound on URLs handed out by one batch request
+MAX_PRESIGN_BATCH = 20
+
+
+def _file_key(user_id: int, request: PresignedUrlRequest) -> str:
+    file_extension = request.filename.split(".")[-1] if "." in request.filename else "jpg"
+    if request.sha256:
+        return content_key(request.sha256, file_extension)
+    return f"users/{user_id}/{uuid.uuid4()}.{file_extension}"
+
+
+async def _held_keys(db: AsyncSession, keys: list[str]) -> set[str]:
+    """Content keys already registered, held against GC until the client references them."""
+    held = await hold_existing(db, keys)
+    await db.commit()
+    return held
+
+
+def _presign(request: PresignedUrlRequest, file_key: str, exists: bool) -> dict:
+    """Sign one upload URL. Blocking (boto3); call via a worker thread.
+
+    Requests carrying a SHA-256 get a shared content-addressed key, a URL that
+    only accepts bytes matching that digest, and ``exists`` if the object is
+    already registered in ``media_objects``.
+    """
+    return {
+        "upload_url": presign_put(file_key, request.content_type, sha256=request.sha256),
+        "download_url": build_download_url(file_key),
+        "file_key": file_key,
+        "exists": exists,
+    }
+
+
+def _validate_digests(requests: list[PresignedUrlRequest]):
+    for r in requests:
+        if r.sha256 is not None:
+            r.sha256 = r.sha256.lower()
+            if not is_sha256(r.sha256):
+                raise HTTPException(status_code=400, detail="sha256 must be a hex SHA-256 digest")
+
+
+def _ensure_s3_configured():
+    if not is_s3_configured():
+        raise HTTPException(
+            status_code=500,
+            detail="S3 is not configured"
         )
-    )
+
 
 @router.post("/presigned-url", response_model=MediaResponse)
 async def get_presigned_url(
     request: PresignedUrlRequest,
     current_user: User = Depends(get_current_user),
-    s3_client = Depends(get_s3_client)
+    db: AsyncSession = Depends(get_db),
+):
+    _validate_digests([request])
+    _ensure_s3_configured()
+    file_key = _file_key(current_user.id, request)
+    held = await _held_keys(db, [file_key])
+
+    try:
+        return await asyncio.to_thread(_presign, request, file_key, file_key in held)
+    except ClientError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Could not generate presigned URL: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error: {str(e)}"
+        )
+
+
+@router.post("/presigned-urls", response_model=MediaBatchResponse)
+async def get_presigned_urls(
+    request: PresignedUrlBatchRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
-    if not settings.S3_BUCKET or not settings.AWS_ACCESS_KEY_ID or not settings.AWS_SECRET_ACCESS_KEY:
+    """Presigned PUT URLs for several files in one round trip (gallery uploads)."""
+    if not request.files:
+        raise HTTPException(status_code=400, detail="No files requested")
+    if len(request.files) > MAX_PRESIGN_BATCH:
         raise HTTPException(
-            status_code=500,
-            detail="S3 is not configured"
+            status_code=400,
+            detail=f"At most {MAX_PRESIGN_BATCH} files per request"
         )
-    
+    _validate_digests(request.files)
+    _ensure_s3_configured()
+    file_keys = [_file_key(current_user.id, f) for f in request.files]
+    held = await _held_keys(db, file_keys)
+
+    def sign_all() -> list[dict]:
+        return [_presign(f, key, key in held) for f, key in zip(request.files, file_keys)]
+
     try:
-        # Generate a unique filename
-        file_extension = request.filename.split(".")[-1] if "." in request.filename else "jpg"
-        file_key = f"users/{current_user.id}/{uuid.uuid4()}.{file_extension}"
-        
-        # Generate presigned URL for PUT request
-        presigned_url = s3_client.generate_presigned_url(
-            'put_object',
-            Params={
-                'Bucket': settings.S3_BUCKET,
-                'Key': file_key,
-                'ContentType': request.content_type
-            },
-            ExpiresIn=3600
-        )
-        
-        # Construct the download URL
-        if settings.S3_ENDPOINT_URL:
-            # For S3-compatible services like MinIO or DigitalOcean Spaces
-            # Remove trailing slash from endpoint if present
-            base_url = settings.S3_ENDPOINT_URL.rstrip('/')
-            download_url = f"{base_url}/{settings.S3_BUCKET}/{file_key}"
-        else:
-            # Standard AWS S3 URL
-            download_url = f"https://{settings.S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
-        
-        return {
-            "upload_url": presigned_url,
-            "download_url": download_url,
-            "file_key": file_key
-        }
+        return {"items": await asyncio.to_thread(sign_all)}
     except ClientError as e:
         raise HTTPException(
             status_code=400,
@@ -4,29 +4,43 @@ Open Graph meta tags endpoint for social media sharing.
 Social media crawlers (Telegram, WhatsApp, Discord, Twitter, Facebook, etc.) 
 don't execute JavaScript, so they can't see the dynamically loaded content in SPAs.
 This endpoint serves HTML pages with proper OG meta tags for each app.
+Rendered pages are cached per process (see app.services.og_cache) and carry
+a strong ETag, so crawler bursts and revalidations skip the database.
 """
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from html import escape
+from typing import Optional
 
-from app.database import get_db
-from app.models import App
+from app.core.conditional import etag_matches, not_modified
+from app.database import get_db, get_read_db
+from app.models import App, User
+from app.services.og_cache import RenderedPage, app_tag, og_cache, user_tag
+from app.services.og_images import app_card, app_card_hash
 
 router = APIRouter()
 
 BASE_URL = "https://show-your.app"
 DEFAULT_OG_IMAGE = f"{BASE_URL}/og-image.png"
 
+# Shared caches (nginx, crawlers) may reuse a page this long without revalidating
+OG_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+# Card URLs embedded in pages are versioned by hash, so images can be kept longer
+OG_IMAGE_CACHE_CONTROL = "public, max-age=86400"
+# Cards served for an unversioned URL or a version that isn't current
+OG_IMAGE_UNVERSIONED_CACHE_CONTROL = "public, max-age=60"
+
 
 def get_app_og_image(app: App) -> str:
-    """Get the best image for OG sharing from app media."""
-    if app.media and len(app.media) > 0:
-        # Use the first media image
-        return app.media[0].media_url
-    return DEFAULT_OG_IMAGE
+    """URL of the app's generated 1200x630 card.
+
+    The card hash is part of the URL so crawlers fetch the image again when
+    the title, creator or first screenshot changes.
+    """
+    return f"{BASE_URL}/api/og/apps/{app.slug}/image.png?v={app_card_hash(app)}"
 
 
 def get_app_description(app: App) -> str:
@@ -99,17 +113,9 @@ def generate_og_html(
 </html>"""
 
 
-@router.get("/apps/{slug}", response_class=HTMLResponse)
-async def get_app_og(slug: str, db: AsyncSession = Depends(get_db)):
-    """
-    Serve Open Graph meta tags for an app.
-    This endpoint is hit by social media crawlers to get preview data.
-    """
-    # Try to find the app
-    query = select(App).options(
-        selectinload(App.media),
-        selectinload(App.creator)
-    )
+async def _find_app(db: AsyncSession, slug: str) -> Optional[App]:
+    """Look an app up by slug or numeric id, with what its page and card need."""
+    query = select(App).options(selectinload(App.media), selectinload(App.creator))
     
     if slug.isdigit():
         query = query.filter(App.id == int(slug))
@@ -117,7 +123,32 @@ async def get_app_og(slug: str, db: AsyncSession = Depends(get_db)):
         query = query.filter(App.slug == slug)
     
     result = await db.execute(query)
-    app = result.scalars().first()
+    return result.scalars().first()
+
+
+def _cached_response(request: Request, page: RenderedPage) -> Response:
+    """The rendered page, or 304 if the client already has it."""
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return not_modified(page.etag, cache_control=OG_CACHE_CONTROL)
+    return HTMLResponse(content=page.body, headers={"ETag": page.etag, "Cache-Control": OG_CACHE_CONTROL})
+
+
+@router.get("/apps/{slug}", response_class=HTMLResponse)
+async def get_app_og(slug: str, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Serve Open Graph meta tags for an app.
+    This endpoint is hit by social media crawlers to get preview data.
+    Rendered pages are cached per slug; cache hits never query the database.
+    Misses render from the primary, so a lagging replica can't refill the
+    cache with a page an edit just invalidated.
+    """
+    key = f"app:{slug}"
+    page = og_cache.get(key)
+    if page is not None:
+        return _cached_response(request, page)
+    version = og_cache.version
+    
+    app = await _find_app(db, slug)
     
     if not app:
         # Return generic OG tags for 404
@@ -137,23 +168,65 @@ async def get_app_og(slug: str, db: AsyncSession = Depends(get_db)):
     description = get_app_description(app)
     image = get_app_og_image(app)
     
-    return HTMLResponse(
-        content=generate_og_html(
-            title=title,
-            description=description,
-            image=image,
-            url=app_url,
-            og_type="article"
-        )
+    html = generate_og_html(
+        title=title,
+        description=description,
+        image=image,
+        url=app_url,
+        og_type="article"
+    )
+    page = og_cache.put(key, html, tags=[app_tag(app.id)], version=version)
+    return _cached_response(request, page)
+
+
+@router.get("/apps/{slug}/image.png")
+async def get_app_og_card(
+    slug: str,
+    request: Request,
+    v: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    primary: AsyncSession = Depends(get_db),
+):
+    """
+    Serve the app's 1200x630 preview card (title, creator, screenshot crop).
+    Cards are rendered once per content hash and then served from disk.
+    
+    Pages (rendered from the primary) link ``?v=<card hash>``. When a lagging
+    replica doesn't have that version yet the app is re-read from the
+    primary, and only a card matching the requested version is cached long.
+    """
+    app = await _find_app(db, slug)
+    if v and db is not primary and (app is None or app_card_hash(app) != v):
+        app = await _find_app(primary, slug)
+    if not app:
+        raise HTTPException(status_code=404, detail="App not found")
+    
+    card_hash = app_card_hash(app)
+    cache_control = OG_IMAGE_CACHE_CONTROL if v == card_hash else OG_IMAGE_UNVERSIONED_CACHE_CONTROL
+    etag = f'"{card_hash}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control=cache_control)
+    
+    path, digest = await app_card(app)
+    if digest != card_hash:
+        cache_control = OG_IMAGE_UNVERSIONED_CACHE_CONTROL
+    return FileResponse(
+        path,
+        media_type="image/png",
+        headers={"ETag": f'"{digest}"', "Cache-Control": cache_control},
     )
 
 
 @router.get("/users/{username}", response_class=HTMLResponse)
-async def get_user_og(username: str, db: AsyncSession = Depends(get_db)):
+async def get_user_og(username: str, request: Request, db: AsyncSession = Depends(get_db)):
     """
-    Serve Open Graph meta tags for a user profile.
+    Serve Open Graph meta tags for a user profile (cached like app pages).
     """
-    from app.models import User
+    key = f"user:{username}"
+    page = og_cache.get(key)
+    if page is not None:
+        return _cached_response(request, page)
+    version = og_cache.version
     
     result = await db.execute(
         select(User).filter(User.username == username)
@@ -176,12 +249,12 @@ async def get_user_og(username: str, db: AsyncSession = Depends(get_db)):
     description = user.bio if user.bio else f"Check out {user.username}'s AI apps on Show Your App."
     image = user.avatar if user.avatar else DEFAULT_OG_IMAGE
     
-    return HTMLResponse(
-        content=generate_og_html(
-            title=title,
-            description=description,
-            image=image,
-            url=user_url,
-            og_type="profile"
-        )
+    html = generate_og_html(
+        title=title,
+        description=description,
+        image=image,
+        url=user_url,
+        og_type="profile"
     )
+    page = og_cache.put(key, html, tags=[user_tag(user.id)], version=version)
+    return _cached_response(request, page)
@@ -9,6 +9,9 @@ from app.database import get_db
 from app.models import App, User, OwnershipClaim, ClaimStatus, Notification, NotificationType
 from app.schemas import schemas
 from app.routers.auth import get_current_user, require_admin
+from app.services.facets import invalidate_facets
+from app.services.og_cache import app_tag, og_cache
+from app.services.taxonomy import taxonomy_cache, user_apps_key
 from app.services.telegram import notify_ownership_claim
 
 router = APIRouter()
@@ -123,6 +126,7 @@ async def resolve_claim(
     
     claim.status = status
     claim.resolved_at = datetime.now()
+    previous_creator_id = claim.app.creator_id
     
     if status == ClaimStatus.APPROVED:
         # Transfer ownership
@@ -150,5 +154,14 @@ async def resolve_claim(
         db.add(notification)
 
     await db.commit()
+
+    if status == ClaimStatus.APPROVED:
+        # The app moved between profiles: drop its OG card, both users'
+        # app lists and the facet counts (is_owner changed).
+        og_cache.invalidate(app_tag(claim.app_id))
+        taxonomy_cache.invalidate(user_apps_key(previous_creator_id))
+        taxonomy_cache.invalidate(user_apps_key(claim.claimant_id))
+        invalidate_facets()
+
     await db.refresh(claim)
     return claim
@@ -0,0 +1,237 @@
+"""
+Dynamic sitemaps for search engines.
+
+``/sitemap.xml`` is a sitemap index pointing at the static pages and at
+``/sitemaps/apps-{n}.xml`` / ``/sitemaps/users-{n}.xml``. Page ``n`` covers a
+fixed id range (``SITEMAP_PAGE_SIZE`` ids), so new rows only ever land in the
+last page and earlier pages stay cacheable.
+
+Pages are streamed from a server-side cursor and kept in a per-process cache
+keyed by a stamp of their id range (row count, highest id, newest
+``updated_at``). A new, edited or deleted row changes only its own page's
+stamp, so only that page is rebuilt; ``updated_at`` is also each URL's
+``lastmod``. Entries expire after ``SITEMAP_CACHE_TTL_SECONDS`` regardless.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from xml.sax.saxutils import escape
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.conditional import etag_matches, not_modified
+from app.core.config import settings
+from app.database import get_db
+from app.models import App, User
+from app.routers.og import BASE_URL
+from app.services.og_cache import RenderCache
+
+router = APIRouter()
+
+XML_HEADER = b'<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = b"</urlset>\n"
+SITEMAP_CACHE_CONTROL = "public, max-age=3600"
+
+# (path, changefreq, priority)
+STATIC_PAGES = [
+    ("/", "daily", "1.0"),
+    ("/login", "monthly", "0.5"),
+    ("/agent-instructions", "weekly", "0.8"),
+]
+
+# Rows fetched per round trip while streaming a page
+STREAM_BATCH_SIZE = 1000
+
+sitemap_cache = RenderCache(ttl_seconds=settings.SITEMAP_CACHE_TTL_SECONDS, max_entries=1000)
+
+
+@dataclass(frozen=True)
+class Source:
+    """One kind of page listed in the sitemap."""
+    name: str
+    id_column: object
+    loc_column: object
+    path_prefix: str
+    lastmod_column: Optional[object] = None
+    filters: tuple = ()
+
+
+SOURCES = {
+    "apps": Source(
+        name="apps",
+        id_column=App.id,
+        loc_column=App.slug,
+        path_prefix="/apps/",
+        lastmod_column=App.updated_at,
+        filters=(App.is_dead == False, App.slug.isnot(None)),
+    ),
+    "users": Source(
+        name="users",
+        id_column=User.id,
+        loc_column=User.username,
+        path_prefix="/users/",
+        lastmod_column=User.updated_at,
+    ),
+}
+
+
+@dataclass(frozen=True)
+class PageStamp:
+    count: int
+    max_id: int
+    lastmod: Optional[datetime]
+
+
+def _page_size() -> int:
+    # The sitemap protocol allows at most 50,000 URLs per file
+    return max(1, min(settings.SITEMAP_PAGE_SIZE, 50_000))
+
+
+def _id_range(page: int, size: int) -> tuple[int, int]:
+    return (page - 1) * size + 1, page * size
+
+
+def _format_lastmod(value: Optional[datetime]) -> str:
+    if value is None:
+        return ""
+    return f"<lastmod>{value.date().isoformat()}</lastmod>"
+
+
+def _stamp_columns(source: Source) -> list:
+    lastmod = func.max(source.lastmod_column) if source.lastmod_column is not None else None
+    columns = [func.count(), func.max(source.id_column)]
+    if lastmod is not None:
+        columns.append(lastmod)
+    return columns
+
+
+def _to_stamp(row) -> PageStamp:
+    return PageStamp(count=row[0], max_id=row[1], lastmod=row[2] if len(row) > 2 else None)
+
+
+async def page_stamps(db: AsyncSession, source: Source, size: int) -> dict[int, PageStamp]:
+    """Stamps of every non-empty page in one aggregate query."""
+    page = ((source.id_column - 1) // size + 1).label("page")
+    result = await db.execute(
+        select(page, *_stamp_columns(source)).filter(*source.filters).group_by(page).order_by(page)
+    )
+    return {row[0]: _to_stamp(row[1:]) for row in result.all()}
+
+
+async def page_stamp(db: AsyncSession, source: Source, page: int, size: int) -> Optional[PageStamp]:
+    low, high = _id_range(page, size)
+    result = await db.execute(
+        select(*_stamp_columns(source)).filter(*source.filters, source.id_column.between(low, high))
+    )
+    stamp = _to_stamp(result.one())
+    return stamp if stamp.count else None
+
+
+async def _stream_urls(db: AsyncSession, source: Source, page: int, size: int) -> AsyncIterator[bytes]:
+    """Stream ``<url>`` entries for one page from a server-side cursor."""
+    low, high = _id_range(page, size)
+    columns = [source.loc_column]
+    if source.lastmod_column is not None:
+        columns.append(source.lastmod_column)
+    result = await db.stream(
+        select(*columns)
+        .filter(*source.filters, source.id_column.between(low, high))
+        .order_by(source.id_column)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield "".join(
+            f"<url><loc>{escape(BASE_URL + source.path_prefix + row[0])}</loc>"
+            f"{_format_lastmod(row[1] if len(row) > 1 else None)}</url>\n"
+            for row in rows
+        ).encode()
+
+
+async def _stream_and_cache(key: str, chunks: AsyncIterator[bytes], version: int) -> AsyncIterator[bytes]:
+    """Pass chunks through and cache the whole document once it completed."""
+    body = []
+    for part in (XML_HEADER, URLSET_OPEN):
+        body.append(part)
+        yield part
+    async for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    body.append(URLSET_CLOSE)
+    yield URLSET_CLOSE
+    sitemap_cache.put(key, b"".join(body), tags=(), version=version)
+
+
+def _cached_xml(request: Request, body: bytes, etag: str) -> Response:
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, cache_control=SITEMAP_CACHE_CONTROL)
+    return Response(content=body, media_type="application/xml", headers={"ETag": etag, "Cache-Control": SITEMAP_CACHE_CONTROL})
+
+
+@router.get("/sitemap.xml")
+async def get_sitemap_index(request: Request, db: AsyncSession = Depends(get_db)):
+    """Sitemap index listing every sitemap page with its lastmod."""
+    size = _page_size()
+    stamps = {name: await page_stamps(db, source, size) for name, source in SOURCES.items()}
+    key = "index:" + hashlib.sha256(repr((size, stamps)).encode()).hexdigest()
+    page = sitemap_cache.get(key)
+    if page is None:
+        version = sitemap_cache.version
+        entries = [f"<sitemap><loc>{BASE_URL}/sitemaps/pages.xml</loc></sitemap>"]
+        for name, pages in stamps.items():
+            for n, stamp in pages.items():
+                entries.append(
+                    f"<sitemap><loc>{BASE_URL}/sitemaps/{name}-{n}.xml</loc>{_format_lastmod(stamp.lastmod)}</sitemap>"
+                )
+        body = (
+            XML_HEADER.decode()
+            + '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + "\n".join(entries)
+            + "\n</sitemapindex>\n"
+        )
+        page = sitemap_cache.put(key, body, tags=(), version=version)
+    return _cached_xml(request, page.body, page.etag)
+
+
+@router.get("/sitemaps/pages.xml")
+async def get_static_sitemap():
+    """The site's fixed pages."""
+    urls = "".join(
+        f"<url><loc>{BASE_URL}{path}</loc><changefreq>{freq}</changefreq><priority>{priority}</priority></url>\n"
+        for path, freq, priority in STATIC_PAGES
+    )
+    body = XML_HEADER + URLSET_OPEN + urls.encode() + URLSET_CLOSE
+    return Response(content=body, media_type="application/xml", headers={"Cache-Control": SITEMAP_CACHE_CONTROL})
+
+
+async def _sitemap_page(source: Source, page: int, request: Request, db: AsyncSession) -> Response:
+    size = _page_size()
+    stamp = await page_stamp(db, source, page, size) if page >= 1 else None
+    if stamp is None:
+        raise HTTPException(status_code=404, detail="Sitemap page not found")
+
+    key = f"{source.name}-{page}:{size}:{stamp}"
+    cached = sitemap_cache.get(key)
+    if cached is not None:
+        return _cached_xml(request, cached.body, cached.etag)
+    return StreamingResponse(
+        _stream_and_cache(key, _stream_urls(db, source, page, size), sitemap_cache.version),
+        media_type="application/xml",
+        headers={"Cache-Control": SITEMAP_CACHE_CONTROL},
+    )
+
+
+@router.get("/sitemaps/apps-{page}.xml")
+async def get_apps_sitemap(page: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """App pages with an id in page ``page``'s range."""
+    return await _sitemap_page(SOURCES["apps"], page, request, db)
+
+
+@router.get("/sitemaps/users-{page}.xml")
+async def get_users_sitemap(page: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """User profiles with an id in page ``page``'s range."""
+    return await _sitemap_page(SOURCES["users"], page, request, db)
@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError
 from typing import List
 
+from app.core.conditional import etag_matches, not_modified
 from app.database import get_db
 from app.models import Tag, User, app_tags
 from app.schemas import schemas
 from app.routers.auth import require_admin
+from app.services.facets import invalidate_facets
+from app.services.taxonomy import TAGS, taxonomy_cache
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Tag])
-async def get_tags(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Tag))
-    return result.scalars().all()
+async def get_tags(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """List all tags, served from the taxonomy cache with an ETag.
+
+    Cache misses read the primary: a lagging replica would store stale rows
+    under the version an admin change just bumped.
+    """
+    entry = await taxonomy_cache.tags(db)
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return not_modified(entry.etag, cache_control="no-cache")
+    response.headers.update({"ETag": entry.etag, "Cache-Control": "no-cache"})
+    return entry.data
 
 @router.get("/with-counts", response_model=List[schemas.TagWithCount])
 async def get_tags_with_counts(db: AsyncSession = Depends(get_db)):
@@ -55,6 +66,7 @@ async def create_tag(
     db_tag = Tag(name=tag_in.name)
     db.add(db_tag)
     await db.commit()
+    taxonomy_cache.invalidate(TAGS)
     await db.refresh(db_tag)
     return db_tag
 
@@ -86,6 +98,8 @@ async def update_tag(
     
     tag.name = tag_in.name
     await db.commit()
+    taxonomy_cache.invalidate(TAGS)
+    invalidate_facets()
     await db.refresh(tag)
     return tag
 
@@ -106,4 +120,6 @@ async def delete_tag(
     
     await db.delete(tag)
     await db.commit()
+    taxonomy_cache.invalidate(TAGS)
+    invalidate_facets()
     return None
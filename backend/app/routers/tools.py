@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 from sqlalchemy.exc import IntegrityError
 from typing import List
 
+from app.core.conditional import etag_matches, not_modified
 from app.database import get_db
 from app.models import Tool, User, app_tools
 from app.schemas import schemas
 from app.routers.auth import require_admin
+from app.services.facets import invalidate_facets
+from app.services.taxonomy import TOOLS, taxonomy_cache
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Tool])
-async def get_tools(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Tool))
-    return result.scalars().all()
+async def get_tools(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """List all tools, served from the taxonomy cache with an ETag.
+
+    Cache misses read the primary: a lagging replica would store stale rows
+    under the version an admin change just bumped.
+    """
+    entry = await taxonomy_cache.tools(db)
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return not_modified(entry.etag, cache_control="no-cache")
+    response.headers.update({"ETag": entry.etag, "Cache-Control": "no-cache"})
+    return entry.data
 
 @router.get("/with-counts", response_model=List[schemas.ToolWithCount])
 async def get_tools_with_counts(db: AsyncSession = Depends(get_db)):
@@ -55,6 +66,7 @@ async def create_tool(
     db_tool = Tool(name=tool_in.name)
     db.add(db_tool)
     await db.commit()
+    taxonomy_cache.invalidate(TOOLS)
     await db.refresh(db_tool)
     return db_tool
 
@@ -86,6 +98,8 @@ async def update_tool(
     
     tool.name = tool_in.name
     await db.commit()
+    taxonomy_cache.invalidate(TOOLS)
+    invalidate_facets()
     await db.refresh(tool)
     return tool
 
@@ -106,4 +120,6 @@ async def delete_tool(
     
     await db.delete(tool)
     await db.commit()
+    taxonomy_cache.invalidate(TOOLS)
+    invalidate_facets()
     return None
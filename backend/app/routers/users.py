@@ -1,25 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 from typing import List
 
-from app.database import get_db
-from app.models import User, UserLink
+from app.core.conditional import conditional
+from app.database import get_db, get_read_db
+from app.models import App, User, UserLink
 from app.schemas import schemas
 from app.routers.auth import get_current_user
+from app.services.og_cache import app_tag, og_cache, user_tag
 
 router = APIRouter()
 
-@router.get("/{user_identifier}", response_model=schemas.UserPublic)
-async def get_user(user_identifier: str, db: AsyncSession = Depends(get_db)):
+def _user_filter(user_identifier: str):
     if user_identifier.isdigit():
-        query = select(User).where(User.id == int(user_identifier))
-    else:
-        query = select(User).where(User.username == user_identifier)
-        
+        return User.id == int(user_identifier)
+    return User.username == user_identifier
+
+async def user_stamp(user_identifier: str, db: AsyncSession = Depends(get_read_db)):
+    """Version stamp of a public profile and its links (None if missing)."""
+    result = await db.execute(
+        select(
+            User.id,
+            User.updated_at,
+            select(func.count(UserLink.id)).where(UserLink.user_id == User.id).scalar_subquery(),
+            select(func.max(UserLink.id)).where(UserLink.user_id == User.id).scalar_subquery(),
+        ).filter(_user_filter(user_identifier))
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+@router.get(
+    "/{user_identifier}",
+    response_model=schemas.UserPublic,
+    dependencies=[Depends(conditional(user_stamp, cache_control="no-cache"))],
+)
+async def get_user(user_identifier: str, db: AsyncSession = Depends(get_read_db)):
     result = await db.execute(
-        query.options(selectinload(User.links))
+        select(User).where(_user_filter(user_identifier)).options(selectinload(User.links))
     )
     user = result.scalars().first()
     if user is None:
@@ -42,6 +61,11 @@ async def update_user(
     
     db.add(current_user)
     await db.commit()
+    og_cache.invalidate(user_tag(current_user.id))
+    if "username" in update_data:
+        # App pages embed the creator's name in their card URL
+        app_ids = (await db.execute(select(App.id).filter(App.creator_id == current_user.id))).scalars().all()
+        og_cache.invalidate(*(app_tag(app_id) for app_id in app_ids))
     # Reload with eager loading
     result = await db.execute(
         select(User).options(selectinload(User.links)).filter(User.id == current_user.id)
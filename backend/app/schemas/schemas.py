@@ -70,6 +70,17 @@ class Tag(TagBase):
 class TagWithCount(Tag):
     app_count: int = 0
 
+# Facet counts for the app list filters
+class FacetCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+class AppFacets(BaseModel):
+    total: int
+    tags: List[FacetCount] = []
+    tools: List[FacetCount] = []
+
 # App Creator (for embedding in App)
 class AppCreator(BaseModel):
     id: int
@@ -84,6 +95,11 @@ class AppMediaBase(BaseModel):
 class AppMedia(AppMediaBase):
     id: int
     app_id: int
+    thumbnail_url: Optional[str] = None
+    og_image_url: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    size_bytes: Optional[int] = None
     model_config = ConfigDict(from_attributes=True)
 
 # App
@@ -247,10 +263,20 @@ class MediaResponse(BaseModel):
     upload_url: str
     download_url: str
     file_key: str
+    # True when a content-addressed object already exists and the upload can be skipped
+    exists: bool = False
 
 class PresignedUrlRequest(BaseModel):
     filename: str
     content_type: str
+    # Hex SHA-256 of the file; when given, the object is keyed by content hash
+    sha256: Optional[str] = None
+
+class PresignedUrlBatchRequest(BaseModel):
+    files: List[PresignedUrlRequest]
+
+class MediaBatchResponse(BaseModel):
+    items: List[MediaResponse]
 
 class AppPublic(BaseModel):
     id: int
@@ -313,7 +339,7 @@ class DeadAppReportCreate(BaseModel):
 class DeadAppReport(BaseModel):
     id: int
     app_id: int
-    reporter_id: int
+    reporter_id: Optional[int] = None  # None when filed by the link prober
     reason: Optional[str] = None
     status: ReportStatus
     created_at: datetime
@@ -327,3 +353,15 @@ class DeadAppReportWithDetails(DeadAppReport):
 
 class DeadAppReportResolve(BaseModel):
     status: ReportStatus  # Must be CONFIRMED or DISMISSED
+
+class LinkCheck(BaseModel):
+    app_id: int
+    url: str
+    status_code: Optional[int] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    consecutive_failures: int = 0
+    checked_at: Optional[datetime] = None
+    last_ok_at: Optional[datetime] = None
+    reported_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
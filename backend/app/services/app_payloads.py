@@ -0,0 +1,139 @@
+"""
+Build ``schemas.App`` payloads straight from row tuples.
+
+The app feed is the busiest endpoint. Loading ``App`` entities with their
+relationships and validating each one against ``schemas.App`` (plus the nested
+media/tool/tag/creator models) took longer than the queries themselves. Here
+the list query selects plain columns, the children come from one batched
+query each, and the result is a list of dicts with the same keys, key order
+and value formats as ``schemas.App``. Encoding them with
+``FastJSONResponse`` produces the bytes ``response_model`` would.
+
+Keep ``APP_FIELDS`` and the nested field lists in the schema's field order;
+``tests/test_fast_json.py`` compares both paths byte for byte.
+"""
+from collections import defaultdict
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.fastjson import format_datetime
+from app.models import App, AppMedia, Comment, Like, Tag, Tool, User, app_tags, app_tools
+
+# Columns selected by list queries, in ``schemas.App`` field order
+APP_COLUMNS = (
+    App.title,
+    App.prompt_text,
+    App.prd_text,
+    App.extra_specs,
+    App.status,
+    App.app_url,
+    App.youtube_url,
+    App.is_agent_submitted,
+    App.is_owner,
+    App.id,
+    App.slug,
+    App.creator_id,
+    App.parent_app_id,
+    App.created_at,
+    App.is_dead,
+)
+
+MEDIA_COLUMNS = (
+    AppMedia.media_url,
+    AppMedia.id,
+    AppMedia.app_id,
+    AppMedia.thumbnail_url,
+    AppMedia.og_image_url,
+    AppMedia.width,
+    AppMedia.height,
+    AppMedia.size_bytes,
+)
+MEDIA_FIELDS = tuple(column.key for column in MEDIA_COLUMNS)
+
+
+async def _media_by_app(db: AsyncSession, app_ids: list[int]) -> dict[int, list[dict]]:
+    result = await db.execute(
+        select(*MEDIA_COLUMNS).filter(AppMedia.app_id.in_(app_ids)).order_by(AppMedia.id)
+    )
+    media = defaultdict(list)
+    for row in result.all():
+        media[row.app_id].append(dict(zip(MEDIA_FIELDS, row)))
+    return media
+
+
+async def _names_by_app(db: AsyncSession, model, link, link_column, app_ids: list[int]) -> dict[int, list[dict]]:
+    """Tools or tags of each app as ``{"name", "id"}`` dicts."""
+    result = await db.execute(
+        select(link.c.app_id, model.name, model.id)
+        .join(model, model.id == link_column)
+        .filter(link.c.app_id.in_(app_ids))
+        .order_by(model.id)
+    )
+    names = defaultdict(list)
+    for app_id, name, item_id in result.all():
+        names[app_id].append({"name": name, "id": item_id})
+    return names
+
+
+async def _counts(db: AsyncSession, model, app_ids: list[int]) -> dict[int, int]:
+    result = await db.execute(
+        select(model.app_id, func.count(model.id)).filter(model.app_id.in_(app_ids)).group_by(model.app_id)
+    )
+    return dict(result.all())
+
+
+async def app_payloads(db: AsyncSession, rows: Sequence, viewer_id: Optional[int] = None) -> list[dict]:
+    """Serialize ``APP_COLUMNS`` rows as ``schemas.App`` dicts, keeping their order."""
+    if not rows:
+        return []
+    app_ids = [row.id for row in rows]
+    creator_ids = {row.creator_id for row in rows}
+
+    media = await _media_by_app(db, app_ids)
+    tools = await _names_by_app(db, Tool, app_tools, app_tools.c.tool_id, app_ids)
+    tags = await _names_by_app(db, Tag, app_tags, app_tags.c.tag_id, app_ids)
+    creators_result = await db.execute(
+        select(User.id, User.username, User.avatar).filter(User.id.in_(creator_ids))
+    )
+    creators = {
+        user_id: {"id": user_id, "username": username, "avatar": avatar}
+        for user_id, username, avatar in creators_result.all()
+    }
+    likes = await _counts(db, Like, app_ids)
+    comments = await _counts(db, Comment, app_ids)
+    liked: Iterable[int] = ()
+    if viewer_id is not None:
+        liked_result = await db.execute(
+            select(Like.app_id).filter(Like.app_id.in_(app_ids), Like.user_id == viewer_id)
+        )
+        liked = set(liked_result.scalars().all())
+
+    return [
+        {
+            "title": row.title,
+            "prompt_text": row.prompt_text,
+            "prd_text": row.prd_text,
+            "extra_specs": row.extra_specs,
+            "status": row.status.value,
+            "app_url": row.app_url,
+            "youtube_url": row.youtube_url,
+            "is_agent_submitted": row.is_agent_submitted,
+            "is_owner": row.is_owner,
+            "id": row.id,
+            "slug": row.slug,
+            "creator_id": row.creator_id,
+            "parent_app_id": row.parent_app_id,
+            "created_at": format_datetime(row.created_at),
+            "media": media.get(row.id, []),
+            "tools": tools.get(row.id, []),
+            "tags": tags.get(row.id, []),
+            "creator": creators.get(row.creator_id),
+            "likes_count": likes.get(row.id, 0),
+            "comments_count": comments.get(row.id, 0),
+            "is_liked": row.id in liked,
+            "is_dead": row.is_dead,
+        }
+        for row in rows
+    ]
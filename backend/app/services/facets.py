@@ -0,0 +1,214 @@
+"""
+App list filters and tag/tool facet counts.
+
+``AppFilter`` holds the filter parameters shared by ``GET /apps/`` and
+``GET /apps/facets`` and turns them into WHERE clauses. Tag and tool filters
+are ``EXISTS`` subqueries on the association tables rather than joins, so the
+app query needs no ``GROUP BY`` to remove duplicates, and ``match`` picks the
+semantics within a group:
+
+- ``any`` (default): apps with at least one of the selected tags (tools);
+- ``all``: apps with every selected tag (tool), one ``EXISTS`` per value.
+
+Selected tags and selected tools always combine with AND.
+
+``facet_counts`` returns how many apps of the current result set carry each
+tag and tool, plus the total, from a single aggregate query. Results are
+kept in ``facet_cache`` per filter signature and dropped by
+``invalidate_facets`` whenever apps, or their tags and tools, change.
+``liked_by_user_id`` results are not cached, because every like would change
+them.
+"""
+import time
+from dataclasses import dataclass
+from typing import List, Literal, Optional
+
+from fastapi import Query
+from sqlalchemy import exists, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.fastjson import dumps
+from app.models import App, AppStatus, Like, Tag, Tool, app_tags, app_tools
+from app.services.og_cache import RenderCache, RenderedPage, body_etag
+from app.services.taxonomy import taxonomy_cache
+from app.utils import normalize_url
+
+Match = Literal["any", "all"]
+
+FACETS_TAG = "facets"
+
+facet_cache = RenderCache(
+    ttl_seconds=settings.FACET_CACHE_TTL_SECONDS,
+    max_entries=settings.FACET_CACHE_MAX_ENTRIES,
+)
+
+
+def invalidate_facets() -> None:
+    """Drop every cached facet count (call after committing an app change)."""
+    facet_cache.invalidate(FACETS_TAG)
+
+
+def _split_names(value: Optional[str]) -> tuple[str, ...]:
+    if not value:
+        return ()
+    return tuple(name.strip() for name in value.split(",") if name.strip())
+
+
+@dataclass(frozen=True)
+class AppFilter:
+    tool_ids: tuple[int, ...] = ()
+    tag_ids: tuple[int, ...] = ()
+    tool_names: tuple[str, ...] = ()
+    tag_names: tuple[str, ...] = ()
+    match: Match = "any"
+    search: Optional[str] = None
+    app_url: Optional[str] = None
+    status: Optional[AppStatus] = None
+    creator_id: Optional[int] = None
+    liked_by_user_id: Optional[int] = None
+    include_dead: bool = False
+
+    @property
+    def signature(self) -> str:
+        """Cache key; equal filters (in any parameter order) share it."""
+        return repr(self)
+
+    def clauses(self) -> list:
+        clauses = []
+        if not self.include_dead:
+            clauses.append(App.is_dead == False)
+
+        if self.tool_ids:
+            clauses += self._id_clauses(app_tools, app_tools.c.tool_id, self.tool_ids)
+        elif self.tool_names:
+            clauses += self._name_clauses(app_tools, app_tools.c.tool_id, Tool, self.tool_names)
+        if self.tag_ids:
+            clauses += self._id_clauses(app_tags, app_tags.c.tag_id, self.tag_ids)
+        elif self.tag_names:
+            clauses += self._name_clauses(app_tags, app_tags.c.tag_id, Tag, self.tag_names)
+
+        if self.search:
+            pattern = f"%{self.search}%"
+            clauses.append(
+                App.title.ilike(pattern)
+                | App.prompt_text.ilike(pattern)
+                | App.prd_text.ilike(pattern)
+                | App.app_url.ilike(pattern)
+            )
+        if self.app_url:
+            # Normalized URL contained in the stored one (http/https, www variants)
+            clauses.append(App.app_url.isnot(None))
+            clauses.append(App.app_url.ilike(f"%{self.app_url}%"))
+        if self.status:
+            clauses.append(App.status == self.status)
+        if self.creator_id:
+            clauses.append(App.creator_id == self.creator_id)
+        if self.liked_by_user_id:
+            clauses.append(App.likes.any(Like.user_id == self.liked_by_user_id))
+        return clauses
+
+    def _id_clauses(self, link, column, ids: tuple[int, ...]) -> list:
+        if self.match == "all":
+            return [exists().where(link.c.app_id == App.id, column == item_id) for item_id in ids]
+        return [exists().where(link.c.app_id == App.id, column.in_(ids))]
+
+    def _name_clauses(self, link, column, model, names: tuple[str, ...]) -> list:
+        def has(condition):
+            return (
+                select(literal(1))
+                .select_from(link.join(model, model.id == column))
+                .where(link.c.app_id == App.id, condition)
+                .exists()
+            )
+
+        if len(names) == 1:
+            # A single name is a partial, case-insensitive match
+            return [has(model.name.ilike(f"%{names[0]}%"))]
+        if self.match == "all":
+            return [has(model.name == name) for name in names]
+        return [has(model.name.in_(names))]
+
+
+def app_filter(
+    tool_id: Optional[List[int]] = Query(None),
+    tag_id: Optional[List[int]] = Query(None),
+    tool: Optional[str] = None,
+    tag: Optional[str] = None,
+    match: Match = Query("any", description="Selected tags (tools) must all match, or any of them"),
+    search: Optional[str] = None,
+    app_url: Optional[str] = Query(None, description="Filter by app URL (normalized match)"),
+    status: Optional[AppStatus] = None,
+    creator_id: Optional[int] = None,
+    liked_by_user_id: Optional[int] = None,
+    include_dead: bool = Query(False, description="Include dead apps in results"),
+) -> AppFilter:
+    """Dependency collecting the app list filter parameters."""
+    return AppFilter(
+        tool_ids=tuple(sorted(set(tool_id or ()))),
+        tag_ids=tuple(sorted(set(tag_id or ()))),
+        tool_names=tuple(sorted(set(_split_names(tool)))),
+        tag_names=tuple(sorted(set(_split_names(tag)))),
+        match=match,
+        search=search or None,
+        app_url=normalize_url(app_url) if app_url else None,
+        status=status,
+        creator_id=creator_id,
+        liked_by_user_id=liked_by_user_id,
+        include_dead=include_dead,
+    )
+
+
+def _counted(counts: dict[int, int], taxonomy: list[dict]) -> list[dict]:
+    names = {item["id"]: item["name"] for item in taxonomy}
+    items = [
+        {"id": item_id, "name": names[item_id], "count": count}
+        for item_id, count in counts.items()
+        if item_id in names
+    ]
+    return sorted(items, key=lambda item: (-item["count"], item["name"].lower()))
+
+
+async def facet_counts(db: AsyncSession, filters: AppFilter) -> dict:
+    """Total and per-tag/per-tool app counts of the filtered set, in one query."""
+    matching = select(App.id.label("id")).filter(*filters.clauses()).cte("matching")
+    matching_ids = select(matching.c.id)
+    query = union_all(
+        select(literal("total").label("kind"), literal(0).label("id"), func.count().label("n"))
+        .select_from(matching),
+        select(literal("tag"), app_tags.c.tag_id, func.count())
+        .where(app_tags.c.app_id.in_(matching_ids))
+        .group_by(app_tags.c.tag_id),
+        select(literal("tool"), app_tools.c.tool_id, func.count())
+        .where(app_tools.c.app_id.in_(matching_ids))
+        .group_by(app_tools.c.tool_id),
+    )
+    result = await db.execute(query)
+
+    total = 0
+    counts = {"tag": {}, "tool": {}}
+    for kind, item_id, n in result.all():
+        if kind == "total":
+            total = n
+        else:
+            counts[kind][item_id] = n
+    tags, tools = await taxonomy_cache.tags(db), await taxonomy_cache.tools(db)
+    return {
+        "total": total,
+        "tags": _counted(counts["tag"], tags.data),
+        "tools": _counted(counts["tool"], tools.data),
+    }
+
+
+async def cached_facets(db: AsyncSession, filters: AppFilter) -> RenderedPage:
+    """Facet counts rendered as JSON, from ``facet_cache`` when possible."""
+    if filters.liked_by_user_id:
+        body = dumps(await facet_counts(db, filters))
+        return RenderedPage(body=body, etag=body_etag(body), loaded_at=time.monotonic())
+
+    page = facet_cache.get(filters.signature)
+    if page is not None:
+        return page
+    version = facet_cache.version
+    body = dumps(await facet_counts(db, filters))
+    return facet_cache.put(filters.signature, body, tags=(FACETS_TAG,), version=version)
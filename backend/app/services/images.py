@@ -0,0 +1,116 @@
+"""
+Image post-processing for agent screenshots.
+
+Screenshots are captured losslessly, then encoded to the configured format
+(WebP or JPEG) together with a feed-sized thumbnail and a 1200x630 Open Graph
+variant. Encoding is CPU-bound, so it runs in a small thread pool instead of
+on the event loop.
+"""
+
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+OG_SIZE = (1200, 630)
+
+FORMAT_EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg"}
+FORMAT_CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+T = TypeVar("T")
+
+
+@dataclass
+class EncodedImage:
+    """An encoded screenshot and its derived variants on local disk."""
+    path: str
+    content_type: str
+    width: int
+    height: int
+    size_bytes: int
+    thumbnail_path: Optional[str] = None
+    og_path: Optional[str] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_ENCODE_WORKERS,
+            thread_name_prefix="image-encode",
+        )
+    return _executor
+
+
+def _save(img: Image.Image, path: Path, fmt: str, quality: int) -> None:
+    if fmt == "jpeg":
+        img.convert("RGB").save(path, "JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(path, "WEBP", quality=quality, method=4)
+
+
+def encode_image(
+    data: bytes,
+    out_dir: Path,
+    name: str,
+    fmt: Optional[str] = None,
+    quality: Optional[int] = None,
+    thumbnail_width: Optional[int] = None,
+) -> EncodedImage:
+    """Encode raw image bytes into the main image, a thumbnail and an OG card.
+
+    Writes ``{name}{ext}``, ``{name}.thumb{ext}`` and ``{name}.og{ext}`` into
+    ``out_dir``. Blocking; use ``encode_image_async`` from async code.
+    """
+    fmt = (fmt or settings.MEDIA_IMAGE_FORMAT).lower()
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unsupported image format: {fmt}")
+    quality = quality or settings.MEDIA_IMAGE_QUALITY
+    thumbnail_width = thumbnail_width or settings.MEDIA_THUMBNAIL_WIDTH
+    ext = FORMAT_EXTENSIONS[fmt]
+
+    with Image.open(io.BytesIO(data)) as src:
+        img = src.convert("RGBA" if src.mode in ("RGBA", "LA", "P") and fmt == "webp" else "RGB")
+
+    main_path = out_dir / f"{name}{ext}"
+    _save(img, main_path, fmt, quality)
+
+    thumb = img.copy()
+    if thumb.width > thumbnail_width:
+        thumb.thumbnail((thumbnail_width, thumb.height), Image.Resampling.LANCZOS)
+    thumb_path = out_dir / f"{name}.thumb{ext}"
+    _save(thumb, thumb_path, fmt, quality)
+
+    # Crop from the top: the hero section is what matters in a screenshot
+    og = ImageOps.fit(img, OG_SIZE, method=Image.Resampling.LANCZOS, centering=(0.5, 0.0))
+    og_path = out_dir / f"{name}.og{ext}"
+    _save(og, og_path, fmt, quality)
+
+    return EncodedImage(
+        path=str(main_path),
+        content_type=FORMAT_CONTENT_TYPES[fmt],
+        width=img.width,
+        height=img.height,
+        size_bytes=main_path.stat().st_size,
+        thumbnail_path=str(thumb_path),
+        og_path=str(og_path),
+    )
+
+
+async def run_image_task(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run blocking Pillow work in the encoding thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), lambda: fn(*args, **kwargs))
+
+
+async def encode_image_async(data: bytes, out_dir: Path, name: str, **kwargs) -> EncodedImage:
+    """Run ``encode_image`` in the encoding thread pool."""
+    return await run_image_task(encode_image, data, out_dir, name, **kwargs)
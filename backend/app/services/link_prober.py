@@ -0,0 +1,301 @@
+"""
+Background health checks of app URLs.
+
+Dead apps used to be found only through user reports. ``run_link_checks``
+probes every live app's ``app_url`` that is due for a check and records the
+status, latency and consecutive-failure count in ``link_checks``. After
+``LINK_PROBE_FAILURE_THRESHOLD`` failures in a row it files a ``DeadAppReport``
+(without a reporter) for admins to resolve as usual; one report per failure
+streak.
+
+Probes share one pooled ``httpx.AsyncClient`` with a global and a per-host
+concurrency limit. Each probe sends HEAD with the stored ETag/Last-Modified
+as conditional headers, and falls back to GET (without reading the body)
+when HEAD fails, since many servers mishandle HEAD.
+
+``app_url`` is user input and probes run inside the cluster, so every
+request (redirects included) to a host that is or resolves to a private,
+loopback, link-local or otherwise non-global address is refused.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import urlparse
+
+import httpx
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import App, DeadAppReport, LinkCheck, ReportStatus
+from app.services.telegram import notify_dead_link_report
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "ShowYourAppLinkChecker/1.0 (+https://show-your.app)"
+
+# Auth walls, bot protection and rate limits still mean the server is up
+ALIVE_STATUSES = frozenset({401, 403, 429})
+
+
+def is_alive(status_code: int) -> bool:
+    return status_code < 400 or status_code in ALIVE_STATUSES
+
+
+class BlockedHostError(httpx.RequestError):
+    """The URL points at a host the prober may not reach."""
+
+
+async def is_public_host(host: str, port: int) -> bool:
+    """Whether every address of ``host`` is globally routable.
+
+    Names that don't resolve count as public; the request then fails with
+    its own DNS error.
+    """
+    try:
+        addresses = [ipaddress.ip_address(host.split("%", 1)[0])]
+    except ValueError:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            return True
+        addresses = [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+    return all(address.is_global for address in addresses)
+
+
+@dataclass
+class ProbeResult:
+    """Outcome of checking one URL."""
+    ok: bool
+    status_code: Optional[int] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class LinkProber:
+    """Checks URLs with bounded global and per-host concurrency."""
+
+    def __init__(
+        self,
+        concurrency: int = 20,
+        per_host: int = 2,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        allow_private: bool = False,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.allow_private = allow_private
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT},
+                event_hooks={"request": [self._check_host]},
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            )
+        return self._client
+
+    async def _check_host(self, request: httpx.Request) -> None:
+        # Runs for every request, including each redirect hop
+        if self.allow_private:
+            return
+        port = request.url.port or (443 if request.url.scheme == "https" else 80)
+        if not await is_public_host(request.url.host, port):
+            raise BlockedHostError(f"Refusing to probe non-public host {request.url.host}", request=request)
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = (urlparse(url).hostname or "").lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _request(self, method: str, url: str, headers: dict) -> httpx.Response:
+        # Streamed so a GET fallback never downloads the page body
+        async with self._get_client().stream(method, url, headers=headers) as response:
+            return response
+
+    async def probe(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> ProbeResult:
+        """Check one URL. A 304 to the conditional request counts as alive."""
+        if "://" not in url:
+            url = f"https://{url}"
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        result = ProbeResult(ok=False)
+        # Per-host slot first so waiting on a busy host doesn't hold a global slot
+        async with self._host_limit(url), self._semaphore:
+            for method in ("HEAD", "GET"):
+                start = time.perf_counter()
+                try:
+                    response = await self._request(method, url, headers)
+                except (httpx.HTTPError, httpx.InvalidURL) as e:
+                    error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                    result = ProbeResult(ok=False, error=error, etag=etag, last_modified=last_modified)
+                    continue
+                latency_ms = (time.perf_counter() - start) * 1000
+                result = ProbeResult(
+                    ok=is_alive(response.status_code),
+                    status_code=response.status_code,
+                    latency_ms=round(latency_ms, 1),
+                    # A 304 carries no new validators; keep the ones we sent
+                    etag=response.headers.get("etag") or etag,
+                    last_modified=response.headers.get("last-modified") or last_modified,
+                )
+                if result.ok:
+                    break
+        return result
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _failure_reason(check: LinkCheck) -> str:
+    last = f"HTTP {check.status_code}" if check.status_code else (check.error or "no response")
+    return f"Automatic link check failed {check.consecutive_failures} times in a row (last: {last})"
+
+
+@dataclass
+class _Target:
+    """A due app URL, read before probing so no transaction spans the network."""
+    app_id: int
+    title: Optional[str]
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+async def _due_targets(db: AsyncSession, now: datetime) -> list[_Target]:
+    due_before = now - timedelta(seconds=settings.LINK_PROBE_INTERVAL_SECONDS)
+    result = await db.execute(
+        select(App.id, App.title, App.app_url, LinkCheck.url, LinkCheck.etag, LinkCheck.last_modified)
+        .outerjoin(LinkCheck, LinkCheck.app_id == App.id)
+        .filter(App.app_url.isnot(None), App.app_url != "", App.is_dead == False)
+        .filter(or_(LinkCheck.checked_at.is_(None), LinkCheck.checked_at < due_before))
+        .order_by(LinkCheck.checked_at.asc().nullsfirst(), App.id)
+        .limit(settings.LINK_PROBE_BATCH_SIZE)
+    )
+    targets = []
+    for app_id, title, app_url, checked_url, etag, last_modified in result.all():
+        target = _Target(app_id=app_id, title=title, url=app_url)
+        # Validators only apply to the URL they came from
+        if checked_url == app_url:
+            target.etag, target.last_modified = etag, last_modified
+        targets.append(target)
+    return targets
+
+
+async def run_link_checks(db: AsyncSession, prober: LinkProber) -> dict:
+    """Probe one batch of due app URLs and record the results.
+
+    Due URLs are read and the transaction ended before probing; results are
+    written in a second, short transaction. A failure streak files a report
+    only if the app has no pending report already.
+
+    Returns:
+        Dict with the number of URLs checked, failing and newly reported.
+    """
+    now = datetime.now(timezone.utc)
+    targets = await _due_targets(db, now)
+    # End the read transaction; nothing stays open while probing
+    await db.commit()
+    if not targets:
+        return {"checked": 0, "failing": 0, "reported": 0}
+
+    results = await asyncio.gather(*(
+        prober.probe(t.url, t.etag, t.last_modified) for t in targets
+    ))
+
+    app_ids = [t.app_id for t in targets]
+    existing = await db.execute(select(LinkCheck).filter(LinkCheck.app_id.in_(app_ids)))
+    checks = {check.app_id: check for check in existing.scalars().all()}
+    pending = await db.execute(
+        select(DeadAppReport.app_id)
+        .filter(DeadAppReport.app_id.in_(app_ids), DeadAppReport.status == ReportStatus.PENDING)
+    )
+    already_reported = set(pending.scalars().all())
+
+    reported = []
+    failing = 0
+    for target, probe in zip(targets, results):
+        check = checks.get(target.app_id)
+        if check is None:
+            check = LinkCheck(app_id=target.app_id, url=target.url, consecutive_failures=0)
+            db.add(check)
+        elif check.url != target.url:
+            # The URL was edited: start a fresh history
+            check.url = target.url
+            check.consecutive_failures = 0
+            check.reported_at = None
+        check.status_code = probe.status_code
+        check.latency_ms = probe.latency_ms
+        check.error = probe.error
+        check.etag = probe.etag
+        check.last_modified = probe.last_modified
+        check.checked_at = now
+        if probe.ok:
+            check.consecutive_failures = 0
+            check.last_ok_at = now
+            check.reported_at = None
+            continue
+
+        failing += 1
+        check.consecutive_failures += 1
+        if check.consecutive_failures >= settings.LINK_PROBE_FAILURE_THRESHOLD and check.reported_at is None:
+            check.reported_at = now
+            if target.app_id in already_reported:
+                continue
+            reason = _failure_reason(check)
+            db.add(DeadAppReport(app_id=target.app_id, reporter_id=None, reason=reason))
+            reported.append((target.title, reason))
+
+    await db.commit()
+    for title, reason in reported:
+        notify_dead_link_report("link-checker", title or "Untitled", reason)
+    return {"checked": len(targets), "failing": failing, "reported": len(reported)}
+
+
+# Process-wide prober used by the background worker
+_prober: Optional[LinkProber] = None
+
+
+def get_link_prober() -> LinkProber:
+    """Get or create the process-wide link prober."""
+    global _prober
+    if _prober is None:
+        _prober = LinkProber(
+            concurrency=settings.LINK_PROBE_CONCURRENCY,
+            per_host=settings.LINK_PROBE_PER_HOST,
+            timeout=settings.LINK_PROBE_TIMEOUT_SECONDS,
+        )
+    return _prober
+
+
+async def close_link_prober() -> None:
+    """Close the process-wide prober (on application shutdown)."""
+    global _prober
+    if _prober is not None:
+        await _prober.aclose()
+        _prober = None
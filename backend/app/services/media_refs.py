@@ -0,0 +1,148 @@
+"""
+Reference counting for content-addressed media objects.
+
+Several AppMedia rows (across apps, re-runs and forks) may point at the same
+``media/<sha256>`` object. Each URL an AppMedia row holds counts as one
+reference. URLs outside the content-addressed namespace (legacy UUID keys,
+external links) are ignored.
+
+``retain_media`` is a single upsert, so concurrent runs registering the same
+new object don't collide on the unique URL. Releasing the last reference
+only stamps ``released_at``; ``delete_unreferenced`` removes objects that
+have stayed unreferenced for ``MEDIA_GC_GRACE_SECONDS``, re-checking the
+count under a row lock in the same transaction.
+
+Uploads skip the PUT only for objects ``hold_existing`` found registered.
+It takes the same row lock as the collector and restarts the grace period
+of unreferenced objects, so an object cannot be deleted between "already
+stored" and the ``retain_media`` that follows the upload.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import AppMedia, MediaObject, utcnow
+from app.services.storage import delete_objects, parse_content_url
+
+logger = logging.getLogger(__name__)
+
+# Unreferenced objects deleted per delete_unreferenced call
+GC_BATCH_SIZE = 500
+
+
+def media_urls(media: AppMedia) -> list[str]:
+    """All stored URLs of an AppMedia row (main image and variants)."""
+    return [u for u in (media.media_url, media.thumbnail_url, media.og_image_url) if u]
+
+
+def _count_content_urls(urls: Iterable[Optional[str]]) -> Counter:
+    return Counter(u for u in urls if u and parse_content_url(u))
+
+
+async def retain_media(db: AsyncSession, urls: Iterable[Optional[str]]) -> None:
+    """Take one reference per URL, registering objects seen for the first time.
+
+    The upsert runs in the caller's transaction; the caller commits.
+    """
+    counts = _count_content_urls(urls)
+    if not counts:
+        return
+
+    rows = []
+    for url, n in counts.items():
+        file_key, sha256 = parse_content_url(url)
+        rows.append({"file_key": file_key, "url": url, "sha256": sha256, "ref_count": n})
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(MediaObject).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[MediaObject.url],
+            set_={"ref_count": MediaObject.ref_count + stmt.excluded.ref_count, "released_at": None},
+        )
+    )
+
+
+async def hold_existing(db: AsyncSession, file_keys: Iterable[str]) -> set[str]:
+    """Keys of registered objects, kept safe from collection for one more grace period.
+
+    Rows are locked like ``delete_unreferenced`` locks them and unreferenced
+    ones get a fresh ``released_at``. Runs in the caller's transaction; the
+    caller commits.
+    """
+    keys = set(file_keys)
+    if not keys:
+        return set()
+    result = await db.execute(
+        select(MediaObject.file_key, MediaObject.ref_count)
+        .filter(MediaObject.file_key.in_(keys))
+        .with_for_update()
+    )
+    rows = result.all()
+    released = [key for key, ref_count in rows if ref_count <= 0]
+    if released:
+        await db.execute(
+            update(MediaObject).where(MediaObject.file_key.in_(released)).values(released_at=utcnow())
+        )
+    return {key for key, _ in rows}
+
+
+async def release_media(db: AsyncSession, urls: Iterable[Optional[str]]) -> None:
+    """Drop one reference per URL.
+
+    Objects left without references are stamped ``released_at`` and later
+    collected by ``delete_unreferenced``.
+    """
+    counts = _count_content_urls(urls)
+    if not counts:
+        return
+
+    for url, n in counts.items():
+        await db.execute(
+            update(MediaObject)
+            .where(MediaObject.url == url)
+            .values(ref_count=MediaObject.ref_count - n)
+        )
+    await db.execute(
+        update(MediaObject)
+        .where(MediaObject.url.in_(counts), MediaObject.ref_count <= 0, MediaObject.released_at.is_(None))
+        .values(released_at=utcnow())
+    )
+
+
+async def delete_unreferenced(db: AsyncSession) -> int:
+    """Delete objects unreferenced for longer than the grace period.
+
+    Rows are locked and re-checked, deleted from storage, then removed in
+    the same transaction; a failed bucket delete leaves them for the next
+    call. Failures are logged, not raised. Returns the number of objects
+    deleted.
+    """
+    cutoff = utcnow() - timedelta(seconds=settings.MEDIA_GC_GRACE_SECONDS)
+    try:
+        result = await db.execute(
+            select(MediaObject)
+            .filter(MediaObject.ref_count <= 0, MediaObject.released_at <= cutoff)
+            .limit(GC_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        orphans = result.scalars().all()
+        if not orphans:
+            await db.rollback()
+            return 0
+        await asyncio.to_thread(delete_objects, [obj.file_key for obj in orphans])
+        for obj in orphans:
+            await db.delete(obj)
+        await db.commit()
+        return len(orphans)
+    except Exception as e:
+        await db.rollback()
+        logger.warning(f"Failed to delete unreferenced media objects: {e}")
+        return 0
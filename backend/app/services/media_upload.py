@@ -0,0 +1,211 @@
+"""
+Concurrent media uploads to S3 via presigned URLs.
+
+One pooled ``httpx.AsyncClient`` is shared by all uploads. File bodies are
+streamed from disk in chunks rather than read into memory, at most
+``concurrency`` uploads run at once, and transient failures (network errors,
+429 and 5xx responses) are retried with exponential backoff.
+
+Objects are keyed by the SHA-256 of their contents. Given a database
+session, ``upload_files`` skips files whose object is already registered in
+``media_objects`` (see ``media_refs.hold_existing``).
+"""
+
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services.media_refs import hold_existing
+from app.services.storage import (
+    build_download_url, checksum_header, content_key, is_s3_configured, presign_put,
+)
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+def content_type_for(path: Path) -> str:
+    """Guess an image content type from the file extension."""
+    return CONTENT_TYPES.get(path.suffix.lower(), "image/png")
+
+
+async def _stream_file(path: Path) -> AsyncIterator[bytes]:
+    """Yield a file in chunks, reading off the event loop."""
+    with path.open("rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _hash_file(path: Path) -> str:
+    """SHA-256 of a file, read in chunks. Blocking."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaUploader:
+    """Uploads local files to the media bucket with bounded concurrency."""
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=120.0,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            )
+        return self._client
+
+    async def _put(self, path: Path, upload_url: str, content_type: str, sha256: str) -> httpx.Response:
+        # An explicit Content-Length keeps httpx from using chunked encoding,
+        # which presigned S3 PUTs reject.
+        return await self._get_client().put(
+            upload_url,
+            content=_stream_file(path),
+            headers={
+                "Content-Type": content_type,
+                "Content-Length": str(path.stat().st_size),
+                "x-amz-checksum-sha256": checksum_header(sha256),
+            },
+        )
+
+    async def upload_file(
+        self, file_path: str, sha256: Optional[str] = None, registered: frozenset[str] = frozenset(),
+    ) -> dict:
+        """Upload one file under its content hash and return its key and public URL.
+
+        Args:
+            sha256: Digest of the file, if already computed
+            registered: Keys of objects known to be stored; these are not uploaded again
+
+        Returns:
+            Dict with success, file_key, download_url, sha256, size_bytes and
+            deduplicated (True when the object was already registered), or error.
+        """
+        path = Path(file_path)
+        if not path.exists():
+            return {"error": f"File not found: {file_path}"}
+        if not is_s3_configured():
+            return {"error": "S3 not configured"}
+
+        content_type = content_type_for(path)
+
+        async with self._semaphore:
+            if sha256 is None:
+                sha256 = await asyncio.to_thread(_hash_file, path)
+            file_key = content_key(sha256, path.suffix or ".png")
+            success = {
+                "success": True,
+                "file_path": file_path,
+                "file_key": file_key,
+                "download_url": build_download_url(file_key),
+                "sha256": sha256,
+                "size_bytes": path.stat().st_size,
+                "deduplicated": False,
+            }
+
+            if file_key in registered:
+                return {**success, "deduplicated": True}
+
+            last_error = None
+            for attempt in range(self.max_retries + 1):
+                try:
+                    upload_url = presign_put(file_key, content_type, sha256=sha256)
+                    response = await self._put(path, upload_url, content_type, sha256)
+                    if response.status_code == 429 or response.status_code >= 500:
+                        last_error = f"HTTP {response.status_code}"
+                    else:
+                        response.raise_for_status()
+                        return success
+                except httpx.TransportError as e:
+                    last_error = str(e)
+                except Exception as e:
+                    return {"error": f"Upload failed: {str(e)}"}
+
+                if attempt < self.max_retries:
+                    delay = self.backoff * (2 ** attempt)
+                    logger.warning(f"Upload of {path.name} failed ({last_error}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+
+        return {"error": f"Upload failed after {self.max_retries + 1} attempts: {last_error}"}
+
+    async def upload_files(self, file_paths: list[str], db: Optional[AsyncSession] = None) -> list[dict]:
+        """Upload several files concurrently; results are in input order.
+
+        With ``db``, objects already registered are held against garbage
+        collection in the session's transaction and skipped; the caller
+        commits along with the references it takes.
+        """
+        digests: dict[str, str] = {}
+        registered: frozenset[str] = frozenset()
+        if db is not None and is_s3_configured():
+            existing = [p for p in file_paths if Path(p).exists()]
+            hashes = await asyncio.gather(*(asyncio.to_thread(_hash_file, Path(p)) for p in existing))
+            digests = dict(zip(existing, hashes))
+            keys = [content_key(digests[p], Path(p).suffix or ".png") for p in existing]
+            registered = frozenset(await hold_existing(db, keys))
+        return await asyncio.gather(
+            *(self.upload_file(p, digests.get(p), registered) for p in file_paths)
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Process-wide uploader shared by all agent runs
+_uploader: Optional[MediaUploader] = None
+
+
+def get_media_uploader() -> MediaUploader:
+    """Get or create the process-wide media uploader."""
+    global _uploader
+    if _uploader is None:
+        _uploader = MediaUploader(
+            concurrency=settings.MEDIA_UPLOAD_CONCURRENCY,
+            max_retries=settings.MEDIA_UPLOAD_RETRIES,
+        )
+    return _uploader
+
+
+async def close_media_uploader() -> None:
+    """Close the process-wide uploader (on application shutdown)."""
+    global _uploader
+    if _uploader is not None:
+        await _uploader.aclose()
+        _uploader = None
@@ -0,0 +1,110 @@
+"""
+Process-level cache of rendered Open Graph pages.
+
+Link unfurls arrive in bursts: many crawlers fetch the same shared URL within
+seconds. Rendered pages are kept per lookup key (``app:<slug or id>``,
+``user:<username>``) with a strong ETag over the body, so repeat hits and
+``If-None-Match`` revalidations need no database work.
+
+Every entry is tagged with the row it was rendered from (``app_tag``,
+``user_tag``). Routers call ``invalidate`` with that tag after committing an
+edit, which drops every key rendered from the row, including the old slug
+after a rename. A render that raced with any invalidation is not stored. An
+LRU bound and a TTL (``OG_CACHE_TTL_SECONDS``) cap memory use and staleness
+across worker processes.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from app.core.config import settings
+
+
+@dataclass
+class RenderedPage:
+    body: bytes
+    etag: str
+    loaded_at: float
+    tags: tuple[str, ...] = ()
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def app_tag(app_id: int) -> str:
+    return f"app_id:{app_id}"
+
+
+def user_tag(user_id: int) -> str:
+    return f"user_id:{user_id}"
+
+
+class RenderCache:
+    """LRU of rendered pages with tag-based invalidation."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries: OrderedDict[str, RenderedPage] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+
+    def get(self, key: str) -> Optional[RenderedPage]:
+        page = self._entries.get(key)
+        if page is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - page.loaded_at > self.ttl_seconds:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return page
+
+    def put(self, key: str, body: str | bytes, tags: Iterable[str], version: int) -> RenderedPage:
+        """Store a render started at ``version`` (see ``self.version``) and return it."""
+        if isinstance(body, str):
+            body = body.encode()
+        page = RenderedPage(body=body, etag=body_etag(body), loaded_at=time.monotonic(), tags=tuple(tags))
+        # Don't cache a render that an invalidation overtook while we were querying
+        if version != self.version or self.max_entries <= 0:
+            return page
+        self._drop(key)
+        self._entries[key] = page
+        for tag in page.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return page
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every page rendered from the tagged rows (call after committing)."""
+        self.version += 1
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, set()):
+                self._drop(key)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def _drop(self, key: str) -> None:
+        page = self._entries.pop(key, None)
+        if page is None:
+            return
+        for tag in page.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+og_cache = RenderCache(
+    ttl_seconds=settings.OG_CACHE_TTL_SECONDS,
+    max_entries=settings.OG_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,289 @@
+"""
+Generated Open Graph card images for apps.
+
+Crawlers used to get either the static site image or an app's first
+screenshot at whatever size it was uploaded. ``app_card`` composes a 1200x630
+PNG instead: the screenshot cropped from the top, darkened towards the
+bottom, with the app title and creator on top.
+
+Cards are stored on disk under a hash of everything drawn on them (title,
+creator, screenshot URL and ``CARD_VERSION``), so a card is only rendered
+again when one of those changes. Drawing runs in the image thread pool.
+
+Media URLs are user input and the card endpoint is public, so screenshots
+are only fetched from the media bucket's origin or a host listed in
+``OG_IMAGE_FETCH_HOSTS`` (a CDN in front of it), without following
+redirects. Cards from other URLs are drawn without the screenshot.
+
+After a render the card directory is swept (at most every
+``SWEEP_INTERVAL_SECONDS``): cards are deleted by modification time, oldest
+first, until the directory fits ``OG_IMAGE_CACHE_MAX_BYTES``. Serving a card
+refreshes its modification time (at most daily), so busy cards are the last
+to go; a swept card is simply drawn again on its next request.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+from app.core.config import settings
+from app.models import App
+from app.services.images import OG_SIZE, run_image_task
+from app.services.storage import build_download_url
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout changes so every card is drawn again
+CARD_VERSION = 1
+
+# Screenshots larger than this are not fetched
+MAX_SCREENSHOT_BYTES = 15 * 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 10.0
+
+SWEEP_INTERVAL_SECONDS = 600
+# Files written (or touched) more recently than this are never swept
+SWEEP_MIN_AGE_SECONDS = 3600
+TOUCH_INTERVAL_SECONDS = 24 * 3600
+
+BACKGROUND = (15, 23, 42)
+TEXT_COLOR = (255, 255, 255)
+MUTED_COLOR = (203, 213, 225)
+MARGIN = 64
+SITE_NAME = "show-your.app"
+
+
+def card_screenshot_url(app: App) -> Optional[str]:
+    """The image a card is drawn from (the first media, preferring its OG variant)."""
+    if not app.media:
+        return None
+    return app.media[0].og_image_url or app.media[0].media_url
+
+
+def card_hash(title: str, creator: Optional[str], screenshot_url: Optional[str]) -> str:
+    payload = json.dumps([CARD_VERSION, title, creator, screenshot_url])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def app_card_hash(app: App) -> str:
+    """Hash of an app's card. Needs ``media`` and ``creator`` loaded."""
+    creator = app.creator.username if app.creator else None
+    return card_hash(app.title or "Untitled", creator, card_screenshot_url(app))
+
+
+def _font(size: int, bold: bool = False) -> ImageFont.ImageFont:
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, width: int, max_lines: int) -> list[str]:
+    """Greedy word wrap; the last line is ellipsized if the text doesn't fit."""
+    lines: list[str] = []
+    current = ""
+    words = text.split()
+    for i, word in enumerate(words):
+        candidate = f"{current} {word}".strip()
+        if draw.textlength(candidate, font=font) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = word
+        if len(lines) == max_lines - 1:
+            current = " ".join([word, *words[i + 1:]])
+            break
+    if current:
+        lines.append(current)
+    lines = lines[:max_lines]
+    last = lines[-1] if lines else ""
+    if draw.textlength(last, font=font) > width:
+        while last and draw.textlength(f"{last}…", font=font) > width:
+            last = last[:-1]
+        lines[-1] = f"{last.rstrip()}…"
+    return lines
+
+
+def render_card(title: str, creator: Optional[str], screenshot: Optional[bytes] = None) -> bytes:
+    """Draw a 1200x630 PNG card. Blocking; runs in the image thread pool."""
+    card = Image.new("RGB", OG_SIZE, BACKGROUND)
+    if screenshot:
+        try:
+            with Image.open(io.BytesIO(screenshot)) as src:
+                shot = ImageOps.fit(
+                    src.convert("RGB"), OG_SIZE, method=Image.Resampling.LANCZOS, centering=(0.5, 0.0)
+                )
+            card.paste(shot)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(f"Could not decode screenshot for OG card: {e}")
+
+        # Fade the lower part to the background so the text stays readable
+        fade_top = OG_SIZE[1] // 3
+        mask = Image.linear_gradient("L").resize((OG_SIZE[0], OG_SIZE[1] - fade_top))
+        overlay = Image.new("RGB", mask.size, BACKGROUND)
+        card.paste(overlay, (0, fade_top), mask.point(lambda v: min(255, int(v * 1.15))))
+
+    draw = ImageDraw.Draw(card)
+    width = OG_SIZE[0] - 2 * MARGIN
+    title_font = _font(64, bold=True)
+    meta_font = _font(30)
+
+    bottom = OG_SIZE[1] - MARGIN
+    draw.text((MARGIN, bottom), SITE_NAME, font=meta_font, fill=MUTED_COLOR, anchor="ls")
+    if creator:
+        draw.text((OG_SIZE[0] - MARGIN, bottom), f"by @{creator}", font=meta_font, fill=MUTED_COLOR, anchor="rs")
+
+    lines = _wrap(draw, title, title_font, width, max_lines=2)
+    y = bottom - 60
+    for line in reversed(lines):
+        draw.text((MARGIN, y), line, font=title_font, fill=TEXT_COLOR, anchor="ls")
+        y -= 76
+
+    out = io.BytesIO()
+    card.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def _origin(url: str) -> tuple[str, str, Optional[int]]:
+    parts = urlsplit(url)
+    return parts.scheme.lower(), (parts.hostname or "").lower(), parts.port
+
+
+def screenshot_url_allowed(url: str) -> bool:
+    """Whether ``url`` is on the media bucket's origin or an allowed CDN host."""
+    try:
+        scheme, host, port = _origin(url)
+    except ValueError:
+        return False
+    if scheme not in ("http", "https") or not host:
+        return False
+    if settings.S3_BUCKET and (scheme, host, port) == _origin(build_download_url("")):
+        return True
+    return scheme == "https" and port is None and host in settings.og_image_fetch_hosts_list
+
+
+async def _fetch_screenshot(url: str) -> Optional[bytes]:
+    """Download a screenshot, or None if it isn't allowed, fails or is too large."""
+    if not screenshot_url_allowed(url):
+        logger.info(f"Not fetching OG card screenshot from disallowed origin: {url}")
+        return None
+    try:
+        async with httpx.AsyncClient(timeout=FETCH_TIMEOUT_SECONDS, follow_redirects=False) as client:
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    return None
+                data = bytearray()
+                async for chunk in response.aiter_bytes():
+                    data.extend(chunk)
+                    if len(data) > MAX_SCREENSHOT_BYTES:
+                        return None
+                return bytes(data)
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        logger.warning(f"Could not fetch screenshot for OG card from {url}: {e}")
+        return None
+
+
+def card_path(digest: str) -> Path:
+    return Path(settings.OG_IMAGE_CACHE_DIR) / f"{digest}.png"
+
+
+def _store(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    # Atomic, so concurrent renders of the same card never serve a partial file
+    os.replace(tmp, path)
+
+
+def _touch(path: Path) -> None:
+    try:
+        if time.time() - path.stat().st_mtime > TOUCH_INTERVAL_SECONDS:
+            os.utime(path)
+    except OSError:
+        pass
+
+
+def sweep_cards(directory: Path, max_bytes: int, min_age: float = SWEEP_MIN_AGE_SECONDS) -> int:
+    """Delete least recently used cards until ``directory`` fits ``max_bytes``.
+
+    Leftover temp files are removed too. Returns the number of files deleted.
+    """
+    now = time.time()
+    files = []
+    for entry in os.scandir(directory) if directory.is_dir() else ():
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path, entry.name.endswith(".tmp")))
+
+    total = sum(size for _, size, _, _ in files)
+    deleted = 0
+    for mtime, size, file_path, is_tmp in sorted(files):
+        if now - mtime < min_age:
+            break
+        if total <= max_bytes and not is_tmp:
+            continue
+        try:
+            os.unlink(file_path)
+        except OSError:
+            continue
+        total -= size
+        deleted += 1
+    return deleted
+
+
+_last_sweep = 0.0
+
+
+async def _maybe_sweep() -> None:
+    global _last_sweep
+    if time.monotonic() - _last_sweep < SWEEP_INTERVAL_SECONDS:
+        return
+    _last_sweep = time.monotonic()
+    deleted = await run_image_task(
+        sweep_cards, Path(settings.OG_IMAGE_CACHE_DIR), settings.OG_IMAGE_CACHE_MAX_BYTES
+    )
+    if deleted:
+        logger.info(f"Swept {deleted} OG card files")
+
+
+async def app_card(app: App) -> tuple[Path, str]:
+    """Path and hash of an app's card, rendering it on a cache miss.
+
+    If the screenshot can't be fetched, the text-only card is returned (and
+    stored under its own hash), so the next request tries the screenshot again.
+    """
+    title = app.title or "Untitled"
+    creator = app.creator.username if app.creator else None
+    screenshot_url = card_screenshot_url(app)
+    digest = card_hash(title, creator, screenshot_url)
+    path = card_path(digest)
+    if path.exists():
+        _touch(path)
+        return path, digest
+
+    screenshot = await _fetch_screenshot(screenshot_url) if screenshot_url else None
+    if screenshot_url and screenshot is None:
+        digest = card_hash(title, creator, None)
+        path = card_path(digest)
+        if path.exists():
+            _touch(path)
+            return path, digest
+
+    data = await run_image_task(render_card, title, creator, screenshot)
+    await run_image_task(_store, path, data)
+    await _maybe_sweep()
+    return path, digest
@@ -0,0 +1,127 @@
+"""
+Unique slug and username allocation.
+
+Instead of probing ``base``, ``base-1``, ``base-2``... with one query each,
+``allocate`` loads ``base`` and every existing ``base<separator>...`` value in
+a single prefix query against the column's unique index and picks the lowest free
+suffix in memory. Two requests can still pick the same value concurrently,
+so ``add_with_unique`` writes inside a savepoint and reallocates when the
+column's unique constraint rejects the row. Violations of any other
+constraint (e.g. a duplicate email) are raised as-is.
+"""
+
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import UniqueConstraint
+
+# Column lengths of App.slug and User.username
+SLUG_MAX_LENGTH = 255
+USERNAME_MAX_LENGTH = 50
+
+# Attempts before a unique-constraint race is surfaced to the caller
+MAX_ALLOCATION_ATTEMPTS = 3
+
+
+def next_free(base: str, taken: set[str], separator: str = "-") -> str:
+    """``base`` if unused, otherwise ``base<separator><n>`` with the lowest free n >= 1."""
+    if base not in taken:
+        return base
+    prefix = f"{base}{separator}"
+    used = {
+        int(value[len(prefix):])
+        for value in taken
+        if value.startswith(prefix) and value[len(prefix):].isdigit()
+    }
+    n = 1
+    while n in used:
+        n += 1
+    return f"{prefix}{n}"
+
+
+async def allocate(
+    db: AsyncSession,
+    column,
+    base: str,
+    separator: str = "-",
+    max_length: Optional[int] = None,
+    exclude=None,
+) -> str:
+    """Return a value for ``column`` derived from ``base`` that is not yet taken.
+
+    Args:
+        column: Unique model column, e.g. ``App.slug``
+        base: Preferred value
+        separator: Placed between ``base`` and the numeric suffix
+        max_length: Column length; ``base`` is shortened to leave room for a suffix
+        exclude: Optional filter for rows to ignore (e.g. the row being renamed)
+    """
+    if max_length is not None:
+        base = base[:max_length - len(separator) - 6]
+    query = select(column).filter(
+        or_(column == base, column.startswith(f"{base}{separator}", autoescape=True))
+    )
+    if exclude is not None:
+        query = query.filter(exclude)
+    result = await db.execute(query)
+    return next_free(base, set(result.scalars().all()), separator)
+
+
+async def add_with_unique(
+    db: AsyncSession,
+    obj,
+    attr: str,
+    column,
+    base: str,
+    separator: str = "-",
+    max_length: Optional[int] = None,
+    exclude=None,
+) -> str:
+    """Allocate ``obj.<attr>`` and flush ``obj``, retrying on unique-constraint races.
+
+    The flush runs in a savepoint so a collision only rolls back this row,
+    not the caller's surrounding transaction.
+    """
+    for attempt in range(MAX_ALLOCATION_ATTEMPTS):
+        value = await allocate(db, column, base, separator, max_length, exclude)
+        try:
+            async with db.begin_nested():
+                # Set inside the savepoint: begin_nested() flushes pending changes first
+                setattr(obj, attr, value)
+                db.add(obj)
+                await db.flush()
+            return value
+        except IntegrityError as e:
+            if not violates_unique(e, column) or attempt == MAX_ALLOCATION_ATTEMPTS - 1:
+                raise
+    return value
+
+
+def violates_unique(error: IntegrityError, column) -> bool:
+    """Whether ``error`` was raised by the unique constraint on ``column`` alone."""
+    col = column.property.columns[0] if hasattr(column, "property") else column
+    orig = error.orig
+    # asyncpg (chained under SQLAlchemy's adapter error) and psycopg name the constraint
+    constraint = getattr(orig.__cause__, "constraint_name", None) or getattr(
+        getattr(orig, "diag", None), "constraint_name", None
+    )
+    if constraint:
+        names = {
+            index.name
+            for index in col.table.indexes
+            if index.unique and [c.name for c in index.columns] == [col.name]
+        }
+        names.update(
+            c.name
+            for c in col.table.constraints
+            if isinstance(c, UniqueConstraint) and [k.name for k in c.columns] == [col.name]
+        )
+        return constraint in names
+    # SQLite: "UNIQUE constraint failed: apps.slug"
+    message = str(orig)
+    if "UNIQUE constraint failed:" not in message:
+        return False
+    failed = message.split("UNIQUE constraint failed:", 1)[1].strip()
+    return [c.strip() for c in failed.split(",")] == [f"{col.table.name}.{col.name}"]
@@ -0,0 +1,149 @@
+"""
+S3 storage helpers shared by the media router and the agent.
+
+Building a boto3 client is slow (endpoint resolution, credential chain), so
+one client is cached per process. Presigning is a local computation on that
+client and needs no network round trip.
+
+Media objects are content-addressed: the key is derived from the SHA-256 of
+the bytes, so identical uploads land on the same object.
+"""
+
+import base64
+import re
+from typing import Iterable, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from app.core.config import settings
+
+_s3_client = None
+_s3_client_key: Optional[tuple] = None
+
+
+def _settings_key() -> tuple:
+    return (
+        settings.AWS_ACCESS_KEY_ID,
+        settings.AWS_SECRET_ACCESS_KEY,
+        settings.AWS_REGION,
+        settings.S3_ENDPOINT_URL,
+    )
+
+
+def get_s3_client():
+    """Return the process-wide S3 client, rebuilding it if S3 settings changed."""
+    global _s3_client, _s3_client_key
+    key = _settings_key()
+    if _s3_client is None or key != _s3_client_key:
+        _s3_client = boto3.client(
+            "s3",
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            config=Config(
+                signature_version='s3v4',
+                s3={'addressing_style': 'path'}
+            )
+        )
+        _s3_client_key = key
+    return _s3_client
+
+
+def is_s3_configured() -> bool:
+    """Check that bucket and credentials are set."""
+    return bool(settings.S3_BUCKET and settings.AWS_ACCESS_KEY_ID and settings.AWS_SECRET_ACCESS_KEY)
+
+
+def build_download_url(file_key: str) -> str:
+    """Public URL of an object in the media bucket."""
+    if settings.S3_ENDPOINT_URL:
+        # For S3-compatible services like MinIO or DigitalOcean Spaces
+        base_url = settings.S3_ENDPOINT_URL.rstrip('/')
+        return f"{base_url}/{settings.S3_BUCKET}/{file_key}"
+    # Standard AWS S3 URL
+    return f"https://{settings.S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{file_key}"
+
+
+def presign_put(
+    file_key: str,
+    content_type: str,
+    expires_in: int = 3600,
+    sha256: Optional[str] = None,
+) -> str:
+    """Presigned PUT URL for uploading an object to the media bucket.
+
+    With ``sha256`` (hex) the URL also signs ``x-amz-checksum-sha256``, so S3
+    rejects any body that does not match the digest the key was derived from.
+    The uploader must send that header (see ``checksum_header``).
+    """
+    params = {
+        'Bucket': settings.S3_BUCKET,
+        'Key': file_key,
+        'ContentType': content_type,
+    }
+    if sha256:
+        params['ChecksumSHA256'] = checksum_header(sha256)
+    return get_s3_client().generate_presigned_url(
+        'put_object',
+        Params=params,
+        ExpiresIn=expires_in,
+    )
+
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_CONTENT_KEY_RE = re.compile(r"^media/([0-9a-f]{64})(\.[a-z0-9]+)?$")
+
+
+def is_sha256(value: str) -> bool:
+    """Whether a string is a lowercase hex SHA-256 digest."""
+    return bool(_SHA256_RE.match(value))
+
+
+def checksum_header(sha256: str) -> str:
+    """Hex digest to the base64 form used by ``x-amz-checksum-sha256``."""
+    return base64.b64encode(bytes.fromhex(sha256)).decode()
+
+
+def content_key(sha256: str, extension: str = "") -> str:
+    """Content-addressed object key, e.g. ``media/<sha256>.webp``."""
+    extension = extension.lower()
+    if extension and not extension.startswith("."):
+        extension = f".{extension}"
+    return f"media/{sha256}{extension}"
+
+
+def parse_content_url(url: str) -> Optional[tuple[str, str]]:
+    """Return ``(file_key, sha256)`` if the URL points at a content-addressed object."""
+    prefix = build_download_url("")
+    if not url or not settings.S3_BUCKET or not url.startswith(prefix):
+        return None
+    file_key = url[len(prefix):]
+    match = _CONTENT_KEY_RE.match(file_key)
+    if not match:
+        return None
+    return file_key, match.group(1)
+
+
+def object_exists(file_key: str) -> bool:
+    """HEAD the object. Blocking; call via a worker thread from async code."""
+    try:
+        get_s3_client().head_object(Bucket=settings.S3_BUCKET, Key=file_key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def delete_objects(file_keys: Iterable[str]) -> None:
+    """Delete objects from the media bucket. Blocking, like ``object_exists``."""
+    keys = list(file_keys)
+    # DeleteObjects accepts at most 1000 keys per call
+    for i in range(0, len(keys), 1000):
+        get_s3_client().delete_objects(
+            Bucket=settings.S3_BUCKET,
+            Delete={'Objects': [{'Key': k} for k in keys[i:i + 1000]], 'Quiet': True},
+        )
@@ -0,0 +1,127 @@
+"""
+Process-level cache of the tag/tool taxonomy and per-user app lists.
+
+Tags and tools change only through the admin CRUD endpoints, yet every agent
+run and every page load re-queried them. Each cached list carries a version
+number; the admin endpoints call ``invalidate`` after committing, which bumps
+the version and drops the entry. A fill that raced with an invalidation is
+not stored. Entries also expire after ``TAXONOMY_CACHE_TTL_SECONDS`` so other
+worker processes pick up changes they did not see.
+
+Each entry has a strong ETag derived from its content, so it is identical
+across processes and clients can revalidate with ``If-None-Match``.
+"""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import App, Tag, Tool
+
+TAGS = "tags"
+TOOLS = "tools"
+
+# Size of the agent's "my apps" duplicate-check list
+USER_APPS_LIMIT = 100
+
+
+@dataclass
+class CacheEntry:
+    data: list[dict]
+    etag: str
+    loaded_at: float
+
+
+def content_etag(data) -> str:
+    """Strong ETag for a JSON-serializable payload."""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(encoded.encode()).hexdigest()[:32]}"'
+
+
+class TaxonomyCache:
+    """Versioned in-memory cache; one instance per process (``taxonomy_cache``)."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, CacheEntry] = {}
+        self._versions: dict[str, int] = {}
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def invalidate(self, key: str) -> None:
+        """Drop an entry and bump its version (call after committing a change)."""
+        self._versions[key] = self.version(key) + 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+
+    def _fresh(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - entry.loaded_at > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    def _store(self, key: str, version: int, data: list[dict]) -> CacheEntry:
+        entry = CacheEntry(data=data, etag=content_etag(data), loaded_at=time.monotonic())
+        # Don't cache a result that an invalidation overtook while we were querying
+        if self.version(key) == version:
+            self._entries[key] = entry
+        return entry
+
+    async def _get(self, key: str, db: AsyncSession, query) -> CacheEntry:
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+        version = self.version(key)
+        result = await db.execute(query)
+        return self._store(key, version, [{"id": row.id, "name": row.name} for row in result.scalars().all()])
+
+    async def tags(self, db: AsyncSession) -> CacheEntry:
+        return await self._get(TAGS, db, select(Tag).order_by(Tag.id))
+
+    async def tools(self, db: AsyncSession) -> CacheEntry:
+        return await self._get(TOOLS, db, select(Tool).order_by(Tool.id))
+
+    async def user_apps(self, db: AsyncSession, user_id: int) -> CacheEntry:
+        """A user's most recent apps, as used by the agent's duplicate check."""
+        key = user_apps_key(user_id)
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+        version = self.version(key)
+        result = await db.execute(
+            select(App)
+            .filter(App.creator_id == user_id)
+            .order_by(App.created_at.desc())
+            .limit(USER_APPS_LIMIT)
+        )
+        apps = [
+            {
+                "id": a.id,
+                "title": a.title,
+                "slug": a.slug,
+                "status": a.status.value if a.status else None,
+                "app_url": a.app_url,
+            }
+            for a in result.scalars().all()
+        ]
+        return self._store(key, version, apps)
+
+
+def user_apps_key(user_id: int) -> str:
+    return f"user_apps:{user_id}"
+
+
+taxonomy_cache = TaxonomyCache(ttl_seconds=settings.TAXONOMY_CACHE_TTL_SECONDS)
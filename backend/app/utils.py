@@ -1,6 +1,4 @@
 import re
-import random
-import string
 from urllib.parse import urlparse
 
 def slugify(text: str) -> str:
@@ -21,15 +19,6 @@ def slugify(text: str) -> str:
     res = text.strip('-')
     return res if res else "app"
 
-def generate_unique_slug(base_slug: str) -> str:
-    """
-    Generate a unique slug by appending a random suffix.
-    This is a helper; uniqueness checks should still be done against the DB.
-    """
-    suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
-    return f"{base_slug}-{suffix}"
-
-
 def normalize_url(url: str | None) -> str | None:
     """
     Normalize a URL for consistent comparison.
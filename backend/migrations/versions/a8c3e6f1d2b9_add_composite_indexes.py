@@ -0,0 +1,75 @@
+"""add_composite_indexes
+
+Revision ID: a8c3e6f1d2b9
+Revises: f7b2d8e5a4c1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3e6f1d2b9'
+down_revision: Union[str, Sequence[str], None] = 'f7b2d8e5a4c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, partial index condition)
+INDEXES = (
+    ('ix_likes_user_id_app_id', 'likes', ['user_id', 'app_id'], None),
+    ('ix_comments_app_id_created_at', 'comments', ['app_id', 'created_at'], None),
+    ('ix_notifications_user_id_created_at', 'notifications', ['user_id', 'created_at'], None),
+    ('ix_dead_app_reports_app_id_status', 'dead_app_reports', ['app_id', 'status'], None),
+    ('ix_apps_creator_id_created_at', 'apps', ['creator_id', 'created_at'], None),
+    ('ix_apps_live_created_at', 'apps', ['created_at', 'id'], 'is_dead = false'),
+)
+
+
+def _invalid_indexes(names: list[str]) -> list[str]:
+    """Indexes left INVALID by an interrupted concurrent build (PostgreSQL only)."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return []
+    result = bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE NOT i.indisvalid AND c.relname = ANY(:names) "
+            "AND c.relnamespace = current_schema()::regnamespace"
+        ),
+        {"names": names},
+    )
+    return list(result.scalars())
+
+
+def upgrade() -> None:
+    """Composite and partial indexes for the hot query shapes.
+
+    Built with CREATE INDEX CONCURRENTLY, which cannot run inside a
+    transaction, so writes to these tables are not blocked while they build.
+    A failed concurrent build leaves an INVALID index that IF NOT EXISTS
+    would skip, so those are dropped first and the migration can be re-run.
+    """
+    tables = {name: table for name, table, _, _ in INDEXES}
+    with op.get_context().autocommit_block():
+        for name in _invalid_indexes(list(tables)):
+            op.drop_index(name, table_name=tables[name], postgresql_concurrently=True, if_exists=True)
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Drop the composite and partial indexes."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,36 @@
+"""add_media_variants
+
+Revision ID: b3d7e1a9c5f2
+Revises: 8f1a3b5c7d9e
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d7e1a9c5f2'
+down_revision: Union[str, Sequence[str], None] = '8f1a3b5c7d9e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add thumbnail/OG variant URLs and encoding metadata to app_media."""
+    op.add_column('app_media', sa.Column('thumbnail_url', sa.String(length=512), nullable=True))
+    op.add_column('app_media', sa.Column('og_image_url', sa.String(length=512), nullable=True))
+    op.add_column('app_media', sa.Column('width', sa.Integer(), nullable=True))
+    op.add_column('app_media', sa.Column('height', sa.Integer(), nullable=True))
+    op.add_column('app_media', sa.Column('size_bytes', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove media variant columns."""
+    op.drop_column('app_media', 'size_bytes')
+    op.drop_column('app_media', 'height')
+    op.drop_column('app_media', 'width')
+    op.drop_column('app_media', 'og_image_url')
+    op.drop_column('app_media', 'thumbnail_url')
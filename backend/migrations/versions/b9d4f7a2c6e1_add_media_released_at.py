@@ -0,0 +1,32 @@
+"""add_media_released_at
+
+Revision ID: b9d4f7a2c6e1
+Revises: a8c3e6f1d2b9
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d4f7a2c6e1'
+down_revision: Union[str, Sequence[str], None] = 'a8c3e6f1d2b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Stamp when a media object lost its last reference (deleted after a grace period)."""
+    op.add_column('media_objects', sa.Column('released_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_media_objects_released_at'), 'media_objects', ['released_at'], unique=False)
+    # Objects already at zero references start their grace period now
+    op.execute("UPDATE media_objects SET released_at = now() WHERE ref_count <= 0")
+
+
+def downgrade() -> None:
+    """Drop released_at."""
+    op.drop_index(op.f('ix_media_objects_released_at'), table_name='media_objects')
+    op.drop_column('media_objects', 'released_at')
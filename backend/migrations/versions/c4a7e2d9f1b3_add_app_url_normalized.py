@@ -0,0 +1,39 @@
+"""add_app_url_normalized
+
+Revision ID: c4a7e2d9f1b3
+Revises: b9d4f7a2c6e1
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils import normalize_url
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2d9f1b3'
+down_revision: Union[str, Sequence[str], None] = 'b9d4f7a2c6e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store the normalized app URL so ingestion can match duplicates exactly."""
+    op.add_column('apps', sa.Column('app_url_normalized', sa.String(length=512), nullable=True))
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, app_url FROM apps WHERE app_url IS NOT NULL")).all()
+    if rows:
+        conn.execute(
+            sa.text("UPDATE apps SET app_url_normalized = :normalized WHERE id = :id"),
+            [{"id": row.id, "normalized": normalize_url(row.app_url)} for row in rows],
+        )
+    op.create_index(op.f('ix_apps_app_url_normalized'), 'apps', ['app_url_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop app_url_normalized."""
+    op.drop_index(op.f('ix_apps_app_url_normalized'), table_name='apps')
+    op.drop_column('apps', 'app_url_normalized')
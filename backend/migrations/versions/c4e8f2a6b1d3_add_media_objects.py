@@ -0,0 +1,43 @@
+"""add_media_objects
+
+Revision ID: c4e8f2a6b1d3
+Revises: b3d7e1a9c5f2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8f2a6b1d3'
+down_revision: Union[str, Sequence[str], None] = 'b3d7e1a9c5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the reference-counted media_objects table."""
+    op.create_table('media_objects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_key', sa.String(length=512), nullable=False),
+        sa.Column('url', sa.String(length=512), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('file_key')
+    )
+    op.create_index(op.f('ix_media_objects_id'), 'media_objects', ['id'], unique=False)
+    op.create_index(op.f('ix_media_objects_url'), 'media_objects', ['url'], unique=True)
+    op.create_index(op.f('ix_media_objects_sha256'), 'media_objects', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop the media_objects table."""
+    op.drop_index(op.f('ix_media_objects_sha256'), table_name='media_objects')
+    op.drop_index(op.f('ix_media_objects_url'), table_name='media_objects')
+    op.drop_index(op.f('ix_media_objects_id'), table_name='media_objects')
+    op.drop_table('media_objects')
@@ -0,0 +1,28 @@
+"""add_job_run_profiles
+
+Revision ID: d5f9a3b7c2e4
+Revises: c4e8f2a6b1d3
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f9a3b7c2e4'
+down_revision: Union[str, Sequence[str], None] = 'c4e8f2a6b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Store per-post agent run profiles on ingestion jobs."""
+    op.add_column('ingestion_jobs', sa.Column('run_profiles', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove run profiles."""
+    op.drop_column('ingestion_jobs', 'run_profiles')
@@ -0,0 +1,54 @@
+"""add_link_checks
+
+Revision ID: e6a1c9d4f3b8
+Revises: d5f9a3b7c2e4
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c9d4f3b8'
+down_revision: Union[str, Sequence[str], None] = 'd5f9a3b7c2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create link_checks and allow dead reports without a reporter (filed by the prober)."""
+    op.create_table('link_checks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('app_id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(length=512), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('latency_ms', sa.Float(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('etag', sa.String(length=255), nullable=True),
+        sa.Column('last_modified', sa.String(length=64), nullable=True),
+        sa.Column('consecutive_failures', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('checked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_ok_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('reported_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['app_id'], ['apps.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_link_checks_id'), 'link_checks', ['id'], unique=False)
+    op.create_index(op.f('ix_link_checks_app_id'), 'link_checks', ['app_id'], unique=True)
+    op.create_index(op.f('ix_link_checks_consecutive_failures'), 'link_checks', ['consecutive_failures'], unique=False)
+    op.create_index(op.f('ix_link_checks_checked_at'), 'link_checks', ['checked_at'], unique=False)
+    op.alter_column('dead_app_reports', 'reporter_id', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    """Drop link_checks and automatic (reporter-less) dead reports."""
+    op.execute("DELETE FROM dead_app_reports WHERE reporter_id IS NULL")
+    op.alter_column('dead_app_reports', 'reporter_id', existing_type=sa.Integer(), nullable=False)
+    op.drop_index(op.f('ix_link_checks_checked_at'), table_name='link_checks')
+    op.drop_index(op.f('ix_link_checks_consecutive_failures'), table_name='link_checks')
+    op.drop_index(op.f('ix_link_checks_app_id'), table_name='link_checks')
+    op.drop_index(op.f('ix_link_checks_id'), table_name='link_checks')
+    op.drop_table('link_checks')
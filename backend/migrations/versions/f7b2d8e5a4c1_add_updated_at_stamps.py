@@ -0,0 +1,32 @@
+"""add_updated_at_stamps
+
+Revision ID: f7b2d8e5a4c1
+Revises: e6a1c9d4f3b8
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2d8e5a4c1'
+down_revision: Union[str, Sequence[str], None] = 'e6a1c9d4f3b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('apps', 'users', 'comments', 'collections')
+
+
+def upgrade() -> None:
+    """Add updated_at to rows whose read endpoints send ETags."""
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    """Drop the updated_at columns."""
+    for table in TABLES:
+        op.drop_column(table, 'updated_at')
@@ -2,7 +2,7 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.pool import StaticPool, NullPool
 from dotenv import load_dotenv
 from datetime import timedelta
@@ -19,6 +19,12 @@ from app.main import app
 from app.models import Base, User
 from app.database import get_db
 from app.core.security import create_access_token, generate_api_key
+from app.services.taxonomy import taxonomy_cache
+from app.services.og_cache import og_cache
+from app.routers.sitemap import sitemap_cache
+from app.core.compression import compressed_cache
+from app.services.facets import facet_cache
+from app.core.read_routing import primary_pins, replica_health
 
 # Use environment variable for test DB or default to in-memory SQLite
 SQLALCHEMY_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "sqlite://")
@@ -70,6 +76,25 @@ def setup_test_db():
         conn.execute(text(f"DROP DATABASE IF EXISTS {db_name}"))
     admin_engine.dispose()
 
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """Process-level caches must not leak rows between per-test databases."""
+    taxonomy_cache.clear()
+    og_cache.clear()
+    sitemap_cache.clear()
+    compressed_cache.clear()
+    facet_cache.clear()
+    primary_pins.clear()
+    replica_health.reset()
+    yield
+    taxonomy_cache.clear()
+    og_cache.clear()
+    sitemap_cache.clear()
+    compressed_cache.clear()
+    facet_cache.clear()
+    primary_pins.clear()
+    replica_health.reset()
+
 @pytest_asyncio.fixture(scope="function")
 async def engine():
     if ASYNC_DATABASE_URL.startswith("sqlite"):
@@ -117,6 +142,24 @@ async def client(db_session):
     app.dependency_overrides.clear()
 
 
+class QueryCounter:
+    """Count SQL statements executed on an engine inside a ``with`` block."""
+
+    def __init__(self, engine):
+        self.count = 0
+        self.engine = engine.sync_engine
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
 # Helper function to create test users directly in DB
 async def create_test_user(
     db_session: AsyncSession,
@@ -0,0 +1,213 @@
+"""Tests for agent error classification, backoff, retry budget and circuit breaker."""
+import asyncio
+
+import httpx
+import openai
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.exceptions import ModelHTTPError, UnexpectedModelBehavior
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+import app.agent.agent as agent_module
+from app.agent.agent import run_agent
+from app.agent.deps import AgentDeps
+from app.agent.retry import (
+    FATAL, RATE_LIMITED, TRANSIENT,
+    CircuitBreaker, JobRetryState, RetryBudget, RetryDecision, backoff_delay, classify_error,
+)
+from app.core.config import settings
+
+
+def _rate_limit_error(retry_after: str) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("slow down", response=response, body=None)
+
+
+def test_classify_rate_limit_with_retry_after():
+    decision = classify_error(_rate_limit_error("7"))
+    assert decision.kind == RATE_LIMITED
+    assert decision.retry_after == 7.0
+
+    # Wrapped by pydantic-ai: status from the wrapper, headers from the cause
+    try:
+        try:
+            raise _rate_limit_error("3")
+        except openai.RateLimitError as e:
+            raise ModelHTTPError(429, "gpt-4o") from e
+    except ModelHTTPError as wrapped:
+        decision = classify_error(wrapped)
+    assert decision.kind == RATE_LIMITED
+
+
+@pytest.mark.parametrize("exc, kind", [
+    (ModelHTTPError(503, "gpt-4o"), TRANSIENT),
+    (httpx.ConnectError("refused"), TRANSIENT),
+    (TimeoutError(), TRANSIENT),
+    (ModelHTTPError(400, "gpt-4o"), FATAL),
+    (UnexpectedModelBehavior("bad tool call"), FATAL),
+    (RuntimeError("something else"), TRANSIENT),
+])
+def test_classify_error_kinds(exc, kind):
+    assert classify_error(exc).kind == kind
+
+
+@pytest.mark.parametrize("exc, endpoint", [
+    (ModelHTTPError(503, "gpt-4o"), True),
+    (_rate_limit_error("1"), True),
+    (openai.APIConnectionError(request=httpx.Request("POST", "https://api.example.com")), True),
+    # Browser timeouts, tool-side HTTP errors and unknown errors are retried but not blamed on the model
+    (TimeoutError(), False),
+    (httpx.ConnectError("refused"), False),
+    (RuntimeError("something else"), False),
+    (ModelHTTPError(400, "gpt-4o"), False),
+])
+def test_only_model_errors_are_endpoint_failures(exc, endpoint):
+    assert classify_error(exc).endpoint_failure is endpoint
+
+
+def test_backoff_is_jittered_capped_and_honours_retry_after():
+    delays = [backoff_delay(3, RetryDecision(TRANSIENT), base=1, cap=10) for _ in range(50)]
+    assert all(0 <= d <= 8 for d in delays)
+    assert len(set(delays)) > 1
+    assert backoff_delay(10, RetryDecision(TRANSIENT), base=1, cap=10) <= 10
+    assert backoff_delay(0, RetryDecision(RATE_LIMITED, retry_after=5), base=1, cap=10) >= 5
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_pauses_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+    assert await breaker.wait_until_closed(max_wait=0.01) is False
+    # After the cooldown one trial is let through; others keep waiting
+    assert await breaker.wait_until_closed(max_wait=1) is True
+    assert await breaker.wait_until_closed(max_wait=0.05) is False
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert await breaker.wait_until_closed(max_wait=0) is True
+
+
+@pytest.mark.asyncio
+async def test_unused_trial_is_handed_back():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+    breaker.record_failure()
+
+    async def trial_that_skips_the_model():
+        assert await breaker.wait_until_closed(max_wait=1) is True
+        breaker.release_trial()
+
+    await asyncio.create_task(trial_that_skips_the_model())
+    # Another task gets the next trial instead of waiting out max_wait
+    assert await asyncio.wait_for(breaker.wait_until_closed(max_wait=5), timeout=1) is True
+
+    async def stranger():
+        breaker.release_trial()
+
+    # Only the holder can release it
+    await asyncio.create_task(stranger())
+    assert await breaker.wait_until_closed(max_wait=0.05) is False
+
+
+def _flaky_agent(monkeypatch, errors: list[Exception]) -> list:
+    calls = []
+
+    def respond(messages, info):
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return ModelResponse(parts=[TextPart("done")])
+
+    monkeypatch.setattr(agent_module, "_agent", Agent(FunctionModel(respond), deps_type=AgentDeps))
+    monkeypatch.setattr(settings, "AGENT_RETRY_BASE_DELAY", 0)
+    return calls
+
+
+def _deps(db_session) -> AgentDeps:
+    return AgentDeps(db=db_session, user_id=1, username="admin", is_admin=True)
+
+
+@pytest.mark.asyncio
+async def test_transient_error_is_retried(db_session, monkeypatch):
+    calls = _flaky_agent(monkeypatch, [ModelHTTPError(502, "gpt-4o")])
+
+    result = await run_agent("post", _deps(db_session))
+
+    assert result["success"] is True
+    assert len(calls) == 2
+    assert result["profile"]["error_kinds"] == [TRANSIENT]
+
+
+@pytest.mark.asyncio
+async def test_fatal_error_is_not_retried(db_session, monkeypatch):
+    calls = _flaky_agent(monkeypatch, [ModelHTTPError(400, "gpt-4o")] * 3)
+
+    result = await run_agent("post", _deps(db_session))
+
+    assert result["success"] is False
+    assert len(calls) == 1
+    assert result["profile"]["attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_job_retry_budget_is_shared(db_session, monkeypatch):
+    calls = _flaky_agent(monkeypatch, [ModelHTTPError(503, "gpt-4o")] * 10)
+    state = JobRetryState(budget=RetryBudget(1), breaker=CircuitBreaker(failure_threshold=100, cooldown=0))
+
+    first = await run_agent("post", _deps(db_session), retry_state=state)
+    second = await run_agent("post", _deps(db_session), retry_state=state)
+
+    assert not first["success"] and not second["success"]
+    # One retry for the whole job: 2 calls for the first post, 1 for the second
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_gives_up_after_max_pause(db_session, monkeypatch):
+    calls = _flaky_agent(monkeypatch, [ModelHTTPError(503, "gpt-4o")] * 10)
+    monkeypatch.setattr(settings, "AGENT_CIRCUIT_MAX_PAUSE_SECONDS", 0.01)
+    state = JobRetryState(budget=RetryBudget(10), breaker=CircuitBreaker(failure_threshold=1, cooldown=60))
+
+    result = await asyncio.wait_for(run_agent("post", _deps(db_session), retry_state=state), timeout=5)
+
+    assert result["success"] is False
+    assert state.breaker.is_open
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_non_model_errors_do_not_open_the_circuit(db_session, monkeypatch):
+    calls = _flaky_agent(monkeypatch, [TimeoutError("page load")] * 3)
+    state = JobRetryState(budget=RetryBudget(10), breaker=CircuitBreaker(failure_threshold=1, cooldown=60))
+
+    result = await run_agent("post", _deps(db_session), retry_state=state)
+
+    assert result["success"] is True
+    assert len(calls) == 4 and not state.breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_browser_lease_released_on_cancellation(db_session, monkeypatch):
+    released = []
+    started = asyncio.Event()
+
+    async def hang(messages, info):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def fake_release(deps):
+        released.append(deps)
+
+    monkeypatch.setattr(agent_module, "_agent", Agent(FunctionModel(hang), deps_type=AgentDeps))
+    monkeypatch.setattr(agent_module, "release_browser", fake_release)
+    task = asyncio.create_task(run_agent("post", _deps(db_session)))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert len(released) == 1
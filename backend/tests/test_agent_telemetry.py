@@ -0,0 +1,122 @@
+"""Tests for agent run telemetry and the admin aggregate endpoint."""
+import pytest
+from httpx import AsyncClient
+from pydantic_ai import Agent, RunContext
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from sqlalchemy import select
+
+import app.agent.agent as agent_module
+from app.agent.agent import run_agent
+from app.agent.deps import AgentDeps
+from app.agent.telemetry import ToolStats, aggregate_profiles, instrument_tool
+from app.agent.tools import MAX_BROWSER_STEPS
+from app.models import IngestionJob
+
+
+async def lookup(ctx: RunContext[AgentDeps], name: str) -> dict:
+    """Look up an app by name.
+
+    Args:
+        name: App name
+    """
+    if name == "missing":
+        return {"error": "not found"}
+    ctx.deps.browser_step_count += 1
+    return {"name": name}
+
+
+def _respond(messages, info: AgentInfo) -> ModelResponse:
+    if len(messages) == 1:
+        return ModelResponse(parts=[
+            ToolCallPart("lookup", {"name": "PixelPet"}, tool_call_id="a"),
+            ToolCallPart("lookup", {"name": "missing"}, tool_call_id="b"),
+        ])
+    return ModelResponse(parts=[TextPart("done")])
+
+
+@pytest.fixture
+def scripted_agent(monkeypatch):
+    agent = Agent(FunctionModel(_respond), deps_type=AgentDeps)
+    agent.tool(instrument_tool(lookup))
+    monkeypatch.setattr(agent_module, "_agent", agent)
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_run_agent_returns_profile(db_session, scripted_agent):
+    deps = AgentDeps(db=db_session, user_id=1, username="admin", is_admin=True)
+
+    result = await run_agent("post", deps)
+
+    assert result["success"] is True
+    profile = result["profile"]
+    assert profile["attempts"] == 1 and profile["retries"] == 0
+    assert profile["model_requests"] == 2
+    assert profile["input_tokens"] > 0 and profile["output_tokens"] > 0
+    assert profile["browser_steps"] == 1
+    assert profile["browser_step_limit"] == MAX_BROWSER_STEPS
+    assert profile["tools"]["lookup"]["calls"] == 2
+    assert profile["tools"]["lookup"]["errors"] == 1
+    assert sum(profile["tools"]["lookup"]["histogram"]) == 2
+
+
+def test_aggregate_profiles():
+    fast, slow = ToolStats(), ToolStats()
+    for ms in (10, 20, 30, 40):
+        fast.record(ms)
+    slow.record(3000, error=True)
+    profiles = [
+        {"success": True, "input_tokens": 100, "output_tokens": 10, "retries": 0,
+         "browser_steps": 10, "browser_step_limit": 10, "duration_ms": 1000.0,
+         "tools": {"search_apps": vars(fast)}},
+        {"success": False, "input_tokens": 300, "output_tokens": 30, "retries": 2,
+         "browser_steps": 4, "browser_step_limit": 10, "duration_ms": 3000.0,
+         "tools": {"browser_navigate": vars(slow), "search_apps": vars(fast)}},
+    ]
+
+    data = aggregate_profiles(profiles)
+
+    assert data["runs"] == 2 and data["successes"] == 1
+    assert data["input_tokens"] == 400 and data["avg_output_tokens"] == 20.0
+    assert data["retries"] == 2
+    assert data["runs_at_browser_step_limit"] == 1
+    assert list(data["tools"]) == ["browser_navigate", "search_apps"]
+    assert data["tools"]["search_apps"]["calls"] == 8
+    assert data["tools"]["search_apps"]["p95_ms"] == 50.0
+    assert data["tools"]["browser_navigate"]["errors"] == 1
+    assert data["tools"]["browser_navigate"]["p50_ms"] == 5000.0
+
+
+@pytest.mark.asyncio
+async def test_telemetry_endpoint(client: AsyncClient, db_session, admin_headers, auth_headers):
+    response = await client.post(
+        "/jobs/ingestion",
+        json={"posts": [{"title": "P", "selftext": "", "permalink": "/r/x/1/"}]},
+        headers=admin_headers,
+    )
+    job_id = response.json()["job_id"]
+    job = (await db_session.execute(select(IngestionJob).filter(IngestionJob.id == job_id))).scalar()
+    stats = ToolStats()
+    stats.record(120)
+    job.run_profiles = [
+        {"post": 1, "success": True, "input_tokens": 50, "output_tokens": 5, "retries": 1,
+         "browser_steps": 3, "browser_step_limit": 10, "duration_ms": 800.0,
+         "tools": {"browser_navigate": vars(stats)}},
+    ]
+    await db_session.commit()
+
+    response = await client.get("/jobs/ingestion/telemetry", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["jobs"] == 1 and data["runs"] == 1
+    assert data["retries"] == 1
+    assert data["tools"]["browser_navigate"]["p50_ms"] == 250.0
+
+    response = await client.get(f"/jobs/ingestion/{job_id}", headers=admin_headers)
+    assert response.json()["run_profiles"][0]["input_tokens"] == 50
+
+    response = await client.get("/jobs/ingestion/telemetry?job_id=9999", headers=admin_headers)
+    assert response.status_code == 404
+    response = await client.get("/jobs/ingestion/telemetry", headers=auth_headers)
+    assert response.status_code == 403
@@ -0,0 +1,291 @@
+"""Tests for the shared agent browser pool."""
+import asyncio
+
+import pytest
+
+from app.agent.browser import BrowserPool, BrowserSession, RequestPolicy
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+        self.load_states = []
+        self.url = "about:blank"
+
+    def is_closed(self):
+        return self.closed
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def goto(self, url, timeout, wait_until):
+        self.url = url
+
+    async def wait_for_load_state(self, state, timeout):
+        self.load_states.append((state, timeout))
+        raise TimeoutError("still busy")
+
+    async def title(self):
+        return "Fake"
+
+
+class FakeContext:
+    def __init__(self):
+        self.page = FakePage()
+        self.closed = False
+        self.route_handler = None
+
+    async def route(self, pattern, handler):
+        self.route_handler = handler
+
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = True
+        self.page.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePool(BrowserPool):
+    """BrowserPool that launches FakeBrowser instead of Chromium."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.launched: list[FakeBrowser] = []
+
+    async def _launch_browser(self):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_one_browser_with_isolated_contexts():
+    pool = FakePool(max_contexts=2)
+    first = await pool.acquire()
+    second = await pool.acquire()
+
+    assert isinstance(first, BrowserSession)
+    assert len(pool.launched) == 1
+    assert first._context is not second._context
+    assert pool.active == 2
+
+    await pool.release(first)
+    await pool.release(second)
+    assert pool.active == 0
+    assert all(c.closed for c in pool.launched[0].contexts)
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_when_pool_exhausted():
+    pool = FakePool(max_contexts=1)
+    first = await pool.acquire()
+
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    await pool.release(first)
+    second = await asyncio.wait_for(waiter, timeout=1)
+    assert second.is_healthy()
+    await pool.release(second)
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_after_max_uses():
+    pool = FakePool(max_contexts=2, max_uses=2)
+    for _ in range(2):
+        await pool.release(await pool.acquire())
+
+    assert pool.launched[0].connected is False
+    session = await pool.acquire()
+    assert len(pool.launched) == 2
+    await pool.release(session)
+
+
+@pytest.mark.asyncio
+async def test_disconnected_browser_is_relaunched():
+    pool = FakePool(max_contexts=2)
+    await pool.release(await pool.acquire())
+    pool.launched[0].connected = False
+
+    session = await pool.acquire()
+    assert len(pool.launched) == 2
+    assert session.is_healthy()
+    await pool.release(session)
+
+
+@pytest.mark.asyncio
+async def test_browser_recycled_under_sustained_load():
+    pool = FakePool(max_contexts=3, max_uses=3)
+    # One long run keeps the pool busy the whole time
+    long_run = await pool.acquire()
+    for _ in range(4):
+        await pool.release(await pool.acquire())
+
+    # The first browser is drained, not closed under the long run, and new sessions use a fresh one
+    first, second = pool.launched
+    assert first.connected and second.connected
+    assert pool.launched[1].contexts and pool._browser is second
+
+    await pool.release(long_run)
+    assert not first.connected and second.connected
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_session_replaces_browser():
+    pool = FakePool(max_contexts=2)
+    session = await pool.acquire()
+    session._page.closed = True  # renderer crashed
+    assert not session.is_healthy()
+
+    await pool.release(session)
+    assert not pool.launched[0].connected
+
+    fresh = await pool.acquire()
+    assert len(pool.launched) == 2 and fresh.is_healthy()
+    await pool.release(fresh)
+
+
+@pytest.mark.asyncio
+async def test_acquire_skips_a_browser_that_opens_dead_pages():
+    class DeadPagesBrowser(FakeBrowser):
+        async def new_context(self):
+            context = await super().new_context()
+            context.page.closed = True
+            return context
+
+    class FlakyPool(FakePool):
+        async def _launch_browser(self):
+            browser = DeadPagesBrowser() if not self.launched else FakeBrowser()
+            self.launched.append(browser)
+            return browser
+
+    pool = FlakyPool(max_contexts=1)
+    session = await pool.acquire()
+    assert session.is_healthy() and len(pool.launched) == 2
+    assert not pool.launched[0].connected
+    await pool.release(session)
+    assert pool.active == 0
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type="script"):
+        self.request = FakeRequest(url, resource_type)
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "abort"
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+
+class FakeFinishedRequest:
+    """A finished request; chunked responses carry no content-length header."""
+
+    def __init__(self, body_size, headers_size=0):
+        self.url = "https://app.example.com/chunked"
+        self._sizes = {
+            "requestBodySize": 0,
+            "requestHeadersSize": 100,
+            "responseBodySize": body_size,
+            "responseHeadersSize": headers_size,
+        }
+
+    async def sizes(self):
+        return self._sizes
+
+
+def _policy(**kwargs):
+    defaults = dict(
+        blocked_resource_types=frozenset({"media", "font"}),
+        blocked_hosts=frozenset({"google-analytics.com"}),
+    )
+    defaults.update(kwargs)
+    return RequestPolicy(**defaults)
+
+
+@pytest.mark.asyncio
+async def test_routing_blocks_trackers_and_heavy_resources():
+    pool = FakePool(policy=_policy())
+    session = await pool.acquire()
+    handler = session._context.route_handler
+
+    routes = [
+        FakeRoute("https://app.example.com/", "document"),
+        FakeRoute("https://app.example.com/main.js", "script"),
+        FakeRoute("https://app.example.com/hero.png", "image"),
+        FakeRoute("https://app.example.com/font.woff2", "font"),
+        FakeRoute("https://app.example.com/intro.mp4", "media"),
+        FakeRoute("https://www.google-analytics.com/collect", "xhr"),
+    ]
+    for route in routes:
+        await handler(route)
+
+    assert [r.outcome for r in routes] == [
+        "continue", "continue", "continue", "abort", "abort", "abort",
+    ]
+    assert session.blocked_requests == 3
+    await pool.release(session)
+
+
+@pytest.mark.asyncio
+async def test_transfer_budget_only_allows_documents_once_exceeded():
+    pool = FakePool(policy=_policy(max_transfer_bytes=1000))
+    session = await pool.acquire()
+    handler = session._context.route_handler
+    on_finished = session._page.handlers["requestfinished"]
+
+    await on_finished(FakeFinishedRequest(500, headers_size=100))
+    assert session.transferred_bytes == 600
+    route = FakeRoute("https://app.example.com/a.js")
+    await handler(route)
+    assert route.outcome == "continue"
+
+    await on_finished(FakeFinishedRequest(600))
+    assert session.budget_exceeded
+    script = FakeRoute("https://app.example.com/b.js")
+    document = FakeRoute("https://app.example.com/next", "document")
+    await handler(script)
+    await handler(document)
+    assert script.outcome == "abort"
+    assert document.outcome == "continue"
+    await pool.release(session)
+
+
+@pytest.mark.asyncio
+async def test_network_idle_wait_is_bounded_by_deadline():
+    pool = FakePool(policy=_policy(wait_strategy="networkidle", network_idle_deadline_ms=1234))
+    session = await pool.acquire()
+
+    result = await session.navigate("https://app.example.com/")
+
+    assert result["success"] is True
+    assert result["url"] == "https://app.example.com/"
+    assert session._page.load_states == [("networkidle", 1234)]
+    await pool.release(session)
@@ -0,0 +1,129 @@
+"""Tests for the response compression middleware."""
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+
+import app.core.compression as compression
+from app.core.compression import CompressedCache, compressed_cache, negotiate
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def compressions(monkeypatch):
+    """Count actual compressor runs (cache hits skip them)."""
+    calls = []
+    original = compression.compress
+
+    def counting(body, encoding, *args):
+        calls.append(encoding)
+        return original(body, encoding, *args)
+
+    monkeypatch.setattr(compression, "compress", counting)
+    return calls
+
+
+def test_negotiate(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate("gzip, deflate, br") == "gzip"
+    assert negotiate("br") is None
+    assert negotiate("gzip;q=0, identity") is None
+    assert negotiate("*") == "gzip"
+    assert negotiate("") is None
+
+    monkeypatch.setattr(compression, "brotli", SimpleNamespace(compress=None))
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate("*;q=0.2, gzip;q=0") == "br"
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = CompressedCache(max_bytes=800)
+    for i in range(10):
+        cache.put(("gzip", bytes([i])), b"x" * 100)
+    assert cache.size <= 800 and len(cache) == 8
+    assert cache.get(("gzip", bytes([0]))) is None and cache.get(("gzip", bytes([9]))) is not None
+    cache.put(("gzip", b"big"), b"x" * 101)  # over an eighth of the budget
+    assert cache.get(("gzip", b"big")) is None
+
+
+@pytest.mark.asyncio
+async def test_feed_is_gzipped_once_for_anonymous_clients(client: AsyncClient, auth_headers, compressions):
+    prd = "A long product requirements document. " * 200
+    await client.post("/apps/", json={"title": "Wordy", "prompt_text": "x", "prd_text": prd}, headers=auth_headers)
+    compressions.clear()
+
+    first = await client.get("/apps/", headers=GZIP)
+    assert first.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in first.headers["vary"].lower()
+    assert int(first.headers["content-length"]) < len(first.content) / 10
+    assert first.json()[0]["prd_text"] == prd
+
+    second = await client.get("/apps/", headers=GZIP)
+    assert second.content == first.content
+    assert compressions == ["gzip"] and len(compressed_cache) == 1
+
+    # Logged-in responses are compressed every time and never cached
+    await client.get("/apps/", headers={**GZIP, **auth_headers})
+    await client.get("/apps/", headers={**GZIP, **auth_headers})
+    assert compressions == ["gzip"] * 3 and len(compressed_cache) == 1
+
+    plain = await client.get("/apps/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.content == first.content
+
+
+@pytest.mark.asyncio
+async def test_brotli_preferred_when_accepted(client: AsyncClient, auth_headers):
+    brotli = pytest.importorskip("brotli")
+    prd = "A long product requirements document. " * 200
+    await client.post("/apps/", json={"title": "Wordy", "prompt_text": "x", "prd_text": prd}, headers=auth_headers)
+
+    plain = await client.get("/apps/", headers={"Accept-Encoding": "identity"})
+    # httpx can't decode br without its optional decoder, so read the raw bytes
+    async with client.stream("GET", "/apps/", headers={"Accept-Encoding": "gzip, deflate, br"}) as response:
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert response.headers["content-encoding"] == "br"
+    assert int(response.headers["content-length"]) == len(raw) < len(plain.content) / 10
+    assert brotli.decompress(raw) == plain.content
+
+
+@pytest.mark.asyncio
+async def test_small_and_streamed_responses_are_not_compressed(client: AsyncClient, auth_headers, compressions):
+    small = await client.get("/", headers=GZIP)
+    assert "content-encoding" not in small.headers and "accept-encoding" in small.headers["vary"].lower()
+
+    await client.post("/apps/", json={"title": "Mapped", "prompt_text": "x"}, headers=auth_headers)
+    streamed = await client.get("/sitemaps/apps-1.xml", headers=GZIP)
+    assert streamed.status_code == 200 and "content-encoding" not in streamed.headers
+    assert compressions == []
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidation_still_works(client: AsyncClient, admin_headers):
+    for i in range(80):
+        await client.post("/tags/", json={"name": f"Tag number {i}"}, headers=admin_headers)
+    first = await client.get("/tags/", headers=GZIP)
+    assert first.headers["content-encoding"] == "gzip"
+
+    again = await client.get("/tags/", headers={**GZIP, "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and again.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_pathsend_response_keeps_its_start_message():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/html")]})
+        await send({"type": "http.response.pathsend", "path": "/tmp/page.html"})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = compression.CompressionMiddleware(app, minimum_size=0)
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    await middleware(scope, None, send)
+
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.pathsend"]
+    assert (b"content-encoding", b"gzip") not in sent[0]["headers"]
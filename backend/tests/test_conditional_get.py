@@ -0,0 +1,117 @@
+"""Tests for ETags and 304 responses on read endpoints."""
+import pytest
+from httpx import AsyncClient
+
+from app.core.conditional import etag_matches, weak_etag
+from tests.conftest import QueryCounter, create_test_user
+
+
+async def _revalidate(client: AsyncClient, url: str, etag: str, headers=None):
+    return await client.get(url, headers={**(headers or {}), "If-None-Match": etag})
+
+
+async def _admin(db_session) -> dict:
+    _, headers = await create_test_user(db_session, "boss", "boss@example.com", is_admin=True)
+    return headers
+
+
+def test_weak_comparison():
+    etag = weak_etag((1, "a"))
+    assert etag.startswith('W/"') and etag == weak_etag((1, "a"))
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag) and not etag_matches(weak_etag((2, "a")), etag)
+
+
+@pytest.mark.asyncio
+async def test_app_revalidation_skips_loading(client: AsyncClient, auth_headers, db_session, engine):
+    app = (await client.post("/apps/", json={"title": "Stamped", "prompt_text": "x"}, headers=auth_headers)).json()
+    url = f"/apps/{app['slug']}"
+
+    first = await client.get(url)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"') and first.headers["cache-control"] == "private, no-cache"
+
+    with QueryCounter(engine) as queries:
+        response = await _revalidate(client, url, etag)
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag
+    # One stamp query (tags and tools come from the warm taxonomy cache)
+    assert queries.count == 1
+
+    # Likes, comments and tag-only edits all change the stamp
+    _, other_headers = await create_test_user(db_session, "fan", "fan@example.com")
+    await client.post(f"/apps/{app['id']}/like", headers=other_headers)
+    liked = await _revalidate(client, url, etag)
+    assert liked.status_code == 200 and liked.json()["likes_count"] == 1
+    etag = liked.headers["etag"]
+
+    await client.post(f"/apps/{app['id']}/comments", json={"content": "Nice"}, headers=other_headers)
+    commented = await _revalidate(client, url, etag)
+    assert commented.status_code == 200
+    etag = commented.headers["etag"]
+
+    tag = (await client.post("/tags/", json={"name": "Games"}, headers=await _admin(db_session))).json()
+    await client.patch(f"/apps/{app['id']}", json={"tag_ids": [tag["id"]]}, headers=auth_headers)
+    tagged = await _revalidate(client, url, etag)
+    assert tagged.status_code == 200 and tagged.json()["tags"] == [tag]
+
+    # is_liked differs per viewer, so the viewer is part of the stamp
+    as_fan = await _revalidate(client, url, tagged.headers["etag"], other_headers)
+    assert as_fan.status_code == 200 and as_fan.json()["is_liked"] is True
+
+
+@pytest.mark.asyncio
+async def test_missing_app_has_no_etag(client: AsyncClient):
+    response = await client.get("/apps/nope", headers={"If-None-Match": "*"})
+    assert response.status_code == 404 and "etag" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_user_profile_and_links(client: AsyncClient, auth_user_and_headers):
+    user, headers = auth_user_and_headers
+    first = await client.get(f"/users/{user.username}")
+    assert (await _revalidate(client, f"/users/{user.id}", first.headers["etag"])).status_code == 304
+
+    await client.post(f"/users/{user.id}/links", json={"label": "GitHub", "url": "https://github.com/x"}, headers=headers)
+    response = await _revalidate(client, f"/users/{user.username}", first.headers["etag"])
+    assert response.status_code == 200 and response.headers["etag"] != first.headers["etag"]
+
+    await client.patch(f"/users/{user.id}", json={"bio": "Hi"}, headers=headers)
+    response = await _revalidate(client, f"/users/{user.username}", response.headers["etag"])
+    assert response.status_code == 200 and response.json()["bio"] == "Hi"
+
+
+@pytest.mark.asyncio
+async def test_comment_votes_change_stamp(client: AsyncClient, auth_headers, db_session):
+    app = (await client.post("/apps/", json={"title": "Talky", "prompt_text": "x"}, headers=auth_headers)).json()
+    comment = (await client.post(f"/apps/{app['id']}/comments", json={"content": "First"}, headers=auth_headers)).json()
+    url = f"/apps/{app['id']}/comments"
+
+    first = await client.get(url)
+    assert (await _revalidate(client, url, first.headers["etag"])).status_code == 304
+
+    _, voter = await create_test_user(db_session, "voter", "voter@example.com")
+    await client.post(f"/comments/{comment['id']}/vote", params={"value": 1}, headers=voter)
+    response = await _revalidate(client, url, first.headers["etag"])
+    assert response.status_code == 200 and response.json()[0]["score"] == 1
+
+
+@pytest.mark.asyncio
+async def test_collection_membership_and_privacy(client: AsyncClient, auth_headers, db_session):
+    app = (await client.post("/apps/", json={"title": "Kept", "prompt_text": "x"}, headers=auth_headers)).json()
+    col = (await client.post("/collections/", json={"name": "Faves"}, headers=auth_headers)).json()
+    url = f"/collections/{col['id']}"
+
+    first = await client.get(url)
+    assert (await _revalidate(client, url, first.headers["etag"])).status_code == 304
+
+    await client.post(f"{url}/apps/{app['id']}", headers=auth_headers)
+    response = await _revalidate(client, url, first.headers["etag"])
+    assert response.status_code == 200 and len(response.json()["apps"]) == 1
+
+    private = (await client.post("/collections/", json={"name": "Secret", "is_public": False}, headers=auth_headers)).json()
+    owner_view = await client.get(f"/collections/{private['id']}", headers=auth_headers)
+    stranger = await _revalidate(client, f"/collections/{private['id']}", owner_view.headers["etag"])
+    assert stranger.status_code == 403 and "etag" not in stranger.headers
@@ -0,0 +1,60 @@
+"""Tests for engine pool configuration and checkout metrics."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import app.database as database
+from app.core.config import settings
+from app.database import PoolMetrics, engine_options
+
+
+def test_engine_options_postgres(monkeypatch):
+    monkeypatch.setattr(database, "IS_POSTGRES", True)
+    monkeypatch.setattr(settings, "DB_PREPARED_STATEMENT_CACHE_SIZE", 100)
+    options = engine_options(pool_size=7, max_overflow=3, statement_timeout_ms=5000)
+    assert options["pool_size"] == 7 and options["max_overflow"] == 3
+    assert options["pool_pre_ping"] is settings.DB_POOL_PRE_PING
+    assert options["pool_recycle"] == settings.DB_POOL_RECYCLE_SECONDS
+    assert options["connect_args"] == {
+        "prepared_statement_cache_size": 100,
+        "server_settings": {"statement_timeout": "5000"},
+    }
+
+    monkeypatch.setattr(settings, "DB_PREPARED_STATEMENT_CACHE_SIZE", 0)
+    options = engine_options(pool_size=1, max_overflow=0, statement_timeout_ms=0)
+    assert options["connect_args"] == {"prepared_statement_cache_size": 0, "statement_cache_size": 0}
+
+
+def test_engine_options_sqlite(monkeypatch):
+    monkeypatch.setattr(database, "IS_POSTGRES", False)
+    assert engine_options(pool_size=7, max_overflow=3, statement_timeout_ms=5000) == {
+        "echo": False,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+@pytest.mark.asyncio
+async def test_checkout_metrics(tmp_path):
+    # A real queue pool (the shared test engine uses a StaticPool)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}")
+    metrics = PoolMetrics()
+    metrics.attach(engine)
+    async with engine.connect() as first:
+        async with engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+            assert metrics.in_use == 2
+    snapshot = metrics.snapshot(engine)
+    assert snapshot["checkouts"] == 2 and snapshot["in_use"] == 0 and snapshot["peak_in_use"] == 2
+    assert snapshot["max_hold_seconds"] > 0 and snapshot["mean_hold_seconds"] <= snapshot["max_hold_seconds"]
+    assert snapshot["connects"] == 2 and snapshot["pool_checkedout"] == 0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_health_endpoints(client: AsyncClient, auth_headers, admin_headers):
+    assert (await client.get("/health/")).json() == {"status": "ok"}
+    assert (await client.get("/health/db-pool", headers=auth_headers)).status_code == 403
+    pools = (await client.get("/health/db-pool", headers=admin_headers)).json()
+    assert set(pools) == {"api", "worker"} and "checkouts" in pools["api"]
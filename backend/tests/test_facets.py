@@ -0,0 +1,86 @@
+"""Tests for AND/OR tag and tool filtering and the facet counts endpoint."""
+import pytest
+from httpx import AsyncClient
+
+from tests.conftest import QueryCounter
+
+
+async def seed(client: AsyncClient, auth_headers, admin_headers):
+    """Three apps: A has tags x and y, B has x, C has y and tool t."""
+    x = (await client.post("/tags/", json={"name": "Xylo"}, headers=admin_headers)).json()
+    y = (await client.post("/tags/", json={"name": "Yarn"}, headers=admin_headers)).json()
+    t = (await client.post("/tools/", json={"name": "Tooly"}, headers=admin_headers)).json()
+    apps = {}
+    for title, tag_ids, tool_ids in (("A", [x["id"], y["id"]], []), ("B", [x["id"]], []), ("C", [y["id"]], [t["id"]])):
+        resp = await client.post(
+            "/apps/",
+            json={"title": title, "prompt_text": "p", "tag_ids": tag_ids, "tool_ids": tool_ids},
+            headers=auth_headers,
+        )
+        apps[title] = resp.json()
+    return x["id"], y["id"], t["id"], apps
+
+
+def titles(resp) -> list[str]:
+    return sorted(app["title"] for app in resp.json())
+
+
+@pytest.mark.asyncio
+async def test_match_any_and_all(client: AsyncClient, auth_headers, admin_headers):
+    x, y, t, _ = await seed(client, auth_headers, admin_headers)
+
+    both = {"tag_id": [x, y]}
+    assert titles(await client.get("/apps/", params=both)) == ["A", "B", "C"]
+    assert titles(await client.get("/apps/", params={**both, "match": "all"})) == ["A"]
+    # Tags and tools always combine with AND
+    assert titles(await client.get("/apps/", params={"tag_id": [x, y], "tool_id": [t]})) == ["C"]
+    assert titles(await client.get("/apps/", params={"tag": "Xylo,Yarn", "match": "all"})) == ["A"]
+
+    bad = await client.get("/apps/", params={**both, "match": "some"})
+    assert bad.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_facet_counts_follow_the_filter(client: AsyncClient, auth_headers, admin_headers):
+    x, y, t, _ = await seed(client, auth_headers, admin_headers)
+
+    everything = (await client.get("/apps/facets")).json()
+    assert everything["total"] == 3
+    assert everything["tags"] == [
+        {"id": x, "name": "Xylo", "count": 2},
+        {"id": y, "name": "Yarn", "count": 2},
+    ]
+    assert everything["tools"] == [{"id": t, "name": "Tooly", "count": 1}]
+
+    narrowed = (await client.get("/apps/facets", params={"tag_id": [x]})).json()
+    assert narrowed["total"] == 2
+    assert narrowed["tags"] == [{"id": x, "name": "Xylo", "count": 2}, {"id": y, "name": "Yarn", "count": 1}]
+    assert narrowed["tools"] == []
+
+
+@pytest.mark.asyncio
+async def test_counts_take_one_query(client: AsyncClient, engine, auth_headers, admin_headers):
+    x, _, _, _ = await seed(client, auth_headers, admin_headers)
+    await client.get("/apps/facets", params={"tool_id": [1]})  # warm the taxonomy cache
+
+    with QueryCounter(engine) as counter:
+        resp = await client.get("/apps/facets", params={"tag_id": [x], "match": "all"})
+    assert resp.status_code == 200
+    assert counter.count == 1
+
+
+@pytest.mark.asyncio
+async def test_facets_are_cached_until_apps_change(client: AsyncClient, engine, auth_headers, admin_headers):
+    x, y, _, apps = await seed(client, auth_headers, admin_headers)
+    first = await client.get("/apps/facets", params={"tag_id": [x]})
+
+    with QueryCounter(engine) as counter:
+        again = await client.get("/apps/facets", params={"tag_id": [x]})
+    assert counter.count == 0 and again.content == first.content
+
+    revalidated = await client.get("/apps/facets", params={"tag_id": [x]}, headers={"If-None-Match": first.headers["etag"]})
+    assert revalidated.status_code == 304
+
+    await client.patch(f"/apps/{apps['C']['id']}", json={"tag_ids": [x, y]}, headers=auth_headers)
+    changed = await client.get("/apps/facets", params={"tag_id": [x]}, headers={"If-None-Match": first.headers["etag"]})
+    assert changed.status_code == 200 and changed.json()["total"] == 3
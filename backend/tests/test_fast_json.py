@@ -0,0 +1,108 @@
+"""The app feed's row-based serializer must match response_model byte for byte."""
+from typing import List
+
+import pytest
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+import app.core.fastjson as fastjson
+from app.models import App
+from app.routers.apps import app_to_schema
+from app.schemas import schemas
+from app.services.app_payloads import APP_COLUMNS, app_payloads
+from tests.conftest import QueryCounter, create_test_user
+
+APPS = TypeAdapter(List[schemas.App])
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(fastjson, "orjson", None)
+    elif fastjson.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+async def _seed(client: AsyncClient, db_session, auth_headers, admin_headers) -> dict:
+    tool = (await client.post("/tools/", json={"name": "Cursor"}, headers=admin_headers)).json()
+    tag = (await client.post("/tags/", json={"name": "Jeux vidéo"}, headers=admin_headers)).json()
+    rich = (await client.post("/apps/", json={
+        "title": "Café ☕   \"quoted\" <b>",
+        "prompt_text": "Build a 日本語 app\nwith newlines",
+        "extra_specs": {"fps": 60, "ratio": 0.1, "big": 1e20, "nested": {"ok": True, "none": None}},
+        "status": "Live",
+        "app_url": "https://example.com/café",
+        "is_owner": True,
+        "tool_ids": [tool["id"]],
+        "tag_ids": [tag["id"]],
+    }, headers=auth_headers)).json()
+    await client.post(f"/apps/{rich['id']}/media", json={"media_url": "https://cdn.example.com/1.png"}, headers=auth_headers)
+    await client.post(f"/apps/{rich['id']}/media", json={"media_url": "https://cdn.example.com/2.png"}, headers=auth_headers)
+    plain = (await client.post("/apps/", json={"title": "Plain", "prompt_text": "x"}, headers=auth_headers)).json()
+
+    _, fan = await create_test_user(db_session, "fan", "fan@example.com")
+    await client.post(f"/apps/{rich['id']}/like", headers=fan)
+    await client.post(f"/apps/{plain['id']}/comments", json={"content": "Nice"}, headers=fan)
+    return fan
+
+
+async def _schema_bytes(db_session, payloads: list[dict], viewer_likes: set[int]) -> bytes:
+    """What ``response_model=List[schemas.App]`` produced from ORM objects."""
+    ids = [p["id"] for p in payloads]
+    result = await db_session.execute(
+        select(App).filter(App.id.in_(ids)).options(
+            selectinload(App.tools), selectinload(App.tags), selectinload(App.media), selectinload(App.creator)
+        ).execution_options(populate_existing=True)
+    )
+    apps = {app.id: app for app in result.scalars().all()}
+    expected = []
+    for payload in payloads:
+        app = apps[payload["id"]]
+        app.media.sort(key=lambda m: m.id)
+        app.tools.sort(key=lambda t: t.id)
+        app.tags.sort(key=lambda t: t.id)
+        expected.append(app_to_schema(
+            app,
+            likes_count=payload["likes_count"],
+            comments_count=payload["comments_count"],
+            is_liked=app.id in viewer_likes,
+        ))
+    return APPS.dump_json(APPS.validate_python(expected))
+
+
+@pytest.mark.asyncio
+async def test_feed_bytes_match_response_model(client: AsyncClient, db_session, auth_headers, admin_headers, encoder):
+    fan = await _seed(client, db_session, auth_headers, admin_headers)
+
+    for headers in (None, fan):
+        response = await client.get("/apps/", params={"sort_by": "newest"}, headers=headers)
+        assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+        assert "x-newest-app-id" in response.headers
+        payloads = response.json()
+        assert [p["likes_count"] for p in payloads] == [0, 1]
+        liked = {p["id"] for p in payloads if p["is_liked"]}
+        assert liked == (set() if headers is None else {payloads[1]["id"]})
+        assert response.content == await _schema_bytes(db_session, payloads, liked)
+
+
+@pytest.mark.asyncio
+async def test_dumps_matches_pydantic(client: AsyncClient, db_session, auth_headers, admin_headers, encoder):
+    await _seed(client, db_session, auth_headers, admin_headers)
+    result = await db_session.execute(select(*APP_COLUMNS).order_by(App.id))
+    payloads = await app_payloads(db_session, result.all())
+    assert fastjson.dumps(payloads) == APPS.dump_json(APPS.validate_python(payloads))
+
+
+@pytest.mark.asyncio
+async def test_feed_query_count_is_constant(client: AsyncClient, db_session, auth_headers, admin_headers, engine):
+    await _seed(client, db_session, auth_headers, admin_headers)
+    with QueryCounter(engine) as few:
+        await client.get("/apps/")
+    for i in range(5):
+        await client.post("/apps/", json={"title": f"More {i}", "prompt_text": "x"}, headers=auth_headers)
+    with QueryCounter(engine) as many:
+        assert len((await client.get("/apps/")).json()) == 7
+    assert many.count == few.count
@@ -0,0 +1,57 @@
+"""Tests for the screenshot encoding pipeline."""
+import io
+
+import pytest
+from PIL import Image
+
+from app.services.images import OG_SIZE, encode_image, encode_image_async
+
+
+def _png(width: int = 1920, height: int = 1080) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (30, 120, 200)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_encode_webp_with_variants(tmp_path):
+    image = encode_image(_png(), tmp_path, "main", fmt="webp", quality=75, thumbnail_width=640)
+
+    assert image.path.endswith("main.webp")
+    assert image.content_type == "image/webp"
+    assert (image.width, image.height) == (1920, 1080)
+    assert image.size_bytes == (tmp_path / "main.webp").stat().st_size
+
+    with Image.open(image.thumbnail_path) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (640, 360)
+    with Image.open(image.og_path) as og:
+        assert og.size == OG_SIZE
+
+
+def test_encode_jpeg(tmp_path):
+    image = encode_image(_png(800, 600), tmp_path, "shot", fmt="jpeg", quality=80, thumbnail_width=640)
+
+    assert image.path.endswith("shot.jpg")
+    assert image.content_type == "image/jpeg"
+    with Image.open(image.path) as main:
+        assert main.format == "JPEG"
+    with Image.open(image.og_path) as og:
+        assert og.size == OG_SIZE
+
+
+def test_small_images_are_not_upscaled_for_thumbnail(tmp_path):
+    image = encode_image(_png(400, 300), tmp_path, "small", fmt="webp", thumbnail_width=640)
+    with Image.open(image.thumbnail_path) as thumb:
+        assert thumb.size == (400, 300)
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        encode_image(_png(), tmp_path, "x", fmt="bmp")
+
+
+@pytest.mark.asyncio
+async def test_encode_runs_in_thread_pool(tmp_path):
+    image = await encode_image_async(_png(), tmp_path, "async", fmt="webp")
+    assert image.size_bytes > 0
+    assert image.size_bytes < len(_png())
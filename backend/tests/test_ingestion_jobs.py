@@ -0,0 +1,45 @@
+"""Tests for running an ingestion job's posts concurrently."""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import app.main as main
+from app.models import IngestionJob, JobStatus
+from tests.conftest import create_test_user
+
+
+@pytest.mark.asyncio
+async def test_failed_post_does_not_end_the_job(db_session, engine, monkeypatch):
+    user, _ = await create_test_user(db_session, "jobs", "jobs@example.com")
+    posts = [
+        {"title": f"Post {n}", "permalink": f"/r/SideProject/comments/{n}/x/", "extracted_urls": [f"https://app{n}.example.com"]}
+        for n in (1, 2)
+    ]
+    job = IngestionJob(created_by_id=user.id, posts_data=posts, total_posts=len(posts))
+    db_session.add(job)
+    await db_session.commit()
+    job_id = job.id
+
+    finished = []
+
+    async def fake_process_single_post(db, user_data, post, retry_state):
+        if post["title"] == "Post 1":
+            # Not a dict: the job's bookkeeping for this post raises
+            return None
+        await asyncio.sleep(0.05)
+        finished.append(post["title"])
+        return {"success": True, "app_ids": [42]}
+
+    monkeypatch.setattr(main, "process_single_post", fake_process_single_post)
+    monkeypatch.setattr(main, "WorkerSessionLocal", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+
+    await main.process_job(job_id)
+
+    db_session.expire_all()
+    job = (await db_session.execute(select(IngestionJob).filter(IngestionJob.id == job_id))).scalar()
+    assert finished == ["Post 2"]
+    assert job.status == JobStatus.COMPLETED
+    assert job.processed_posts == 2 and job.error_count == 1 and job.created_app_ids == [42]
+    assert any(entry.startswith("  [1] Failed:") for entry in job.log_entries)
@@ -0,0 +1,111 @@
+"""Tests for the batched ingestion pre-filter stage."""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.main import prefilter_posts
+from app.models import App, AppStatus
+from tests.conftest import create_test_user
+
+
+def _post(n: int, selftext: str = "", extracted_urls: list[str] | None = None) -> dict:
+    return {
+        "title": f"Post {n}",
+        "selftext": selftext,
+        "permalink": f"/r/SideProject/comments/{n}/post/",
+        "extracted_urls": extracted_urls or [],
+    }
+
+
+async def _add_app(db: AsyncSession, creator_id: int, slug: str, **kwargs) -> App:
+    app = App(creator_id=creator_id, title=slug, slug=slug, status=AppStatus.LIVE, **kwargs)
+    db.add(app)
+    await db.commit()
+    return app
+
+
+@pytest.mark.asyncio
+async def test_prefilter_skips_without_urls(db_session):
+    pending, skipped = await prefilter_posts(db_session, [_post(1, "no links here")])
+    assert pending == []
+    assert skipped[0]["reason"] == "no_urls"
+
+
+@pytest.mark.asyncio
+async def test_prefilter_resolves_existing_posts_and_urls(db_session):
+    user, _ = await create_test_user(db_session)
+    await _add_app(
+        db_session, user.id, "known-post",
+        post_url="https://reddit.com/r/SideProject/comments/1/post/",
+    )
+    await _add_app(db_session, user.id, "known-url", app_url="https://www.existing.example.com/")
+
+    posts = [
+        _post(1, "https://brand-new.example.com"),
+        _post(2, "Try it http://existing.example.com"),
+        _post(3, extracted_urls=["https://fresh.example.com/app"]),
+    ]
+    pending, skipped = await prefilter_posts(db_session, posts)
+
+    assert pending == [posts[2]]
+    reasons = {item["post"]["title"]: item for item in skipped}
+    assert reasons["Post 1"]["reason"] == "post_exists"
+    assert reasons["Post 2"]["reason"] == "url_exists"
+    assert reasons["Post 2"]["existing"] == ["https://www.existing.example.com/"]
+
+
+@pytest.mark.asyncio
+async def test_prefilter_dedups_within_batch(db_session):
+    posts = [
+        _post(1, "https://dup.example.com/"),
+        _post(2, "Same app: http://www.dup.example.com"),
+        _post(1, "https://other.example.com"),
+    ]
+    pending, skipped = await prefilter_posts(db_session, posts)
+
+    assert pending == [posts[0]]
+    assert [item["reason"] for item in skipped] == ["duplicate_in_batch", "duplicate_in_batch"]
+
+
+@pytest.mark.asyncio
+async def test_prefilter_uses_two_queries(db_session):
+    queries = []
+    original_execute = db_session.execute
+
+    async def counting_execute(*args, **kwargs):
+        queries.append(args[0])
+        return await original_execute(*args, **kwargs)
+
+    db_session.execute = counting_execute
+    posts = [_post(i, f"https://app{i}.example.com") for i in range(25)]
+    pending, skipped = await prefilter_posts(db_session, posts)
+
+    assert len(pending) == 25
+    assert skipped == []
+    assert len(queries) == 2
+
+
+@pytest.mark.asyncio
+async def test_prefilter_matches_hosts_exactly(db_session):
+    user, _ = await create_test_user(db_session)
+    await _add_app(db_session, user.id, "my-app", app_url="https://www.myapp.com/")
+    await _add_app(db_session, user.id, "evil-app", app_url="https://app.com.evil.io")
+    await _add_app(db_session, user.id, "wild-app", app_url="https://a_b.example.com")
+
+    posts = [_post(1, "https://app.com"), _post(2, "https://axb.example.com")]
+    pending, skipped = await prefilter_posts(db_session, posts)
+
+    assert pending == posts
+    assert skipped == []
+
+
+@pytest.mark.asyncio
+async def test_prefilter_path_prefix_stops_at_segment_boundary(db_session):
+    user, _ = await create_test_user(db_session)
+    await _add_app(db_session, user.id, "tools-play", app_url="https://example.com/tools/play")
+
+    posts = [_post(1, "https://example.com/tools"), _post(2, "https://example.com/to")]
+    pending, skipped = await prefilter_posts(db_session, posts)
+
+    assert pending == [posts[1]]
+    assert skipped[0]["reason"] == "url_exists"
+    assert skipped[0]["existing"] == ["https://example.com/tools/play"]
@@ -0,0 +1,92 @@
+"""Tests for the admin ingestion job endpoints."""
+import pytest
+from httpx import AsyncClient
+
+
+def _post(i: int) -> dict:
+    return {
+        "title": f"Post {i}",
+        "selftext": f"Check out https://app{i}.example.com",
+        "permalink": f"/r/SideProject/comments/{i}/post/",
+    }
+
+
+async def _create_job(client: AsyncClient, headers: dict, n_posts: int = 1) -> int:
+    response = await client.post(
+        "/jobs/ingestion",
+        json={"posts": [_post(i) for i in range(n_posts)]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    return response.json()["job_id"]
+
+
+@pytest.mark.asyncio
+async def test_list_jobs_requires_admin(client: AsyncClient, auth_headers):
+    response = await client.get("/jobs/ingestion", headers=auth_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_list_jobs_total_and_lean_projection(client: AsyncClient, admin_headers):
+    for _ in range(3):
+        await _create_job(client, admin_headers, n_posts=2)
+
+    response = await client.get("/jobs/ingestion", headers=admin_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 3
+    assert len(data["jobs"]) == 3
+    # List view never ships the log payload
+    assert all("log_entries" not in job for job in data["jobs"])
+    assert data["jobs"][0]["total_posts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_list_jobs_keyset_pagination(client: AsyncClient, admin_headers):
+    job_ids = [await _create_job(client, admin_headers) for _ in range(5)]
+
+    response = await client.get("/jobs/ingestion?limit=2", headers=admin_headers)
+    page1 = response.json()
+    assert [j["id"] for j in page1["jobs"]] == job_ids[::-1][:2]
+    assert page1["next_before_id"] == job_ids[3]
+
+    response = await client.get(
+        f"/jobs/ingestion?limit=2&before_id={page1['next_before_id']}",
+        headers=admin_headers,
+    )
+    page2 = response.json()
+    assert [j["id"] for j in page2["jobs"]] == job_ids[::-1][2:4]
+
+    response = await client.get(
+        f"/jobs/ingestion?limit=2&before_id={page2['next_before_id']}",
+        headers=admin_headers,
+    )
+    page3 = response.json()
+    assert [j["id"] for j in page3["jobs"]] == [job_ids[0]]
+    assert page3["next_before_id"] is None
+    assert page3["total"] == 5
+
+
+@pytest.mark.asyncio
+async def test_list_jobs_status_filter(client: AsyncClient, admin_headers):
+    job_id = await _create_job(client, admin_headers)
+    await _create_job(client, admin_headers)
+    await client.post(f"/jobs/ingestion/{job_id}/cancel", headers=admin_headers)
+
+    response = await client.get("/jobs/ingestion?status_filter=pending", headers=admin_headers)
+    data = response.json()
+    assert data["total"] == 2
+
+    response = await client.get("/jobs/ingestion?status_filter=completed", headers=admin_headers)
+    data = response.json()
+    assert data["total"] == 0
+    assert data["jobs"] == []
+
+
+@pytest.mark.asyncio
+async def test_get_job_includes_log_entries(client: AsyncClient, admin_headers):
+    job_id = await _create_job(client, admin_headers)
+    response = await client.get(f"/jobs/ingestion/{job_id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["log_entries"] == []
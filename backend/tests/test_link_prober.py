@@ -0,0 +1,192 @@
+"""Tests for the background dead-link prober, against a local stub HTTP server."""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import App, AppStatus, DeadAppReport, LinkCheck
+from app.services.link_prober import LinkProber, run_link_checks
+from tests.conftest import create_test_user
+
+
+class StubState:
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, status, headers=None, body=b""):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "GET":
+            self.wfile.write(body)
+
+    def _handle(self):
+        state = self.state
+        state.requests.append((self.command, self.path, dict(self.headers)))
+        if self.path == "/ok":
+            if self.headers.get("If-None-Match") == '"v1"':
+                return self._respond(304, {"ETag": '"v1"'})
+            return self._respond(200, {"ETag": '"v1"'}, b"hello")
+        if self.path == "/no-head":
+            return self._respond(405 if self.command == "HEAD" else 200, body=b"hello")
+        if self.path == "/slow":
+            with state.lock:
+                state.active += 1
+                state.max_active = max(state.max_active, state.active)
+            time.sleep(0.05)
+            with state.lock:
+                state.active -= 1
+            return self._respond(200)
+        return self._respond(404, body=b"not found")
+
+    do_HEAD = _handle
+    do_GET = _handle
+
+
+@pytest.fixture
+def stub_server():
+    state = StubState()
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_probe_conditional_fallback_and_errors(stub_server):
+    base, state = stub_server
+    prober = LinkProber(timeout=2, allow_private=True)
+
+    first = await prober.probe(f"{base}/ok")
+    assert first.ok and first.status_code == 200 and first.etag == '"v1"'
+    assert first.latency_ms is not None
+
+    second = await prober.probe(f"{base}/ok", etag=first.etag)
+    assert second.ok and second.status_code == 304
+    assert state.requests[-1][2].get("If-None-Match") == '"v1"'
+
+    state.requests.clear()
+    fallback = await prober.probe(f"{base}/no-head")
+    assert fallback.ok and fallback.status_code == 200
+    assert [r[0] for r in state.requests] == ["HEAD", "GET"]
+
+    gone = await prober.probe(f"{base}/missing")
+    assert not gone.ok and gone.status_code == 404
+
+    refused = await prober.probe("http://127.0.0.1:1/")
+    assert not refused.ok and refused.status_code is None and "ConnectError" in refused.error
+    await prober.aclose()
+
+
+@pytest.mark.asyncio
+async def test_per_host_concurrency_limit(stub_server):
+    base, state = stub_server
+    prober = LinkProber(concurrency=10, per_host=1, timeout=2, allow_private=True)
+
+    results = await asyncio.gather(*(prober.probe(f"{base}/slow") for _ in range(4)))
+
+    assert all(r.ok for r in results)
+    assert state.max_active == 1
+    await prober.aclose()
+
+
+@pytest.mark.asyncio
+async def test_run_link_checks_files_one_report_per_streak(
+    client: AsyncClient, db_session, admin_headers, stub_server, monkeypatch
+):
+    base, _ = stub_server
+    monkeypatch.setattr(settings, "LINK_PROBE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "LINK_PROBE_FAILURE_THRESHOLD", 2)
+    user, _ = await create_test_user(db_session, "maker", "maker@example.com")
+    apps = {
+        name: App(creator_id=user.id, title=name, slug=name, status=AppStatus.LIVE, app_url=url, is_dead=dead)
+        for name, url, dead in [
+            ("alive", f"{base}/ok", False),
+            ("broken", f"{base}/missing", False),
+            ("no-url", None, False),
+            ("already-dead", f"{base}/missing", True),
+        ]
+    }
+    db_session.add_all(apps.values())
+    await db_session.commit()
+    prober = LinkProber(timeout=2, allow_private=True)
+
+    first = await run_link_checks(db_session, prober)
+    assert first == {"checked": 2, "failing": 1, "reported": 0}
+    second = await run_link_checks(db_session, prober)
+    assert second["reported"] == 1
+    third = await run_link_checks(db_session, prober)
+    assert third["reported"] == 0
+
+    reports = (await db_session.execute(select(DeadAppReport))).scalars().all()
+    assert len(reports) == 1
+    assert reports[0].app_id == apps["broken"].id and reports[0].reporter_id is None
+    assert "2 times" in reports[0].reason and "HTTP 404" in reports[0].reason
+
+    alive = (await db_session.execute(select(LinkCheck).filter(LinkCheck.app_id == apps["alive"].id))).scalar()
+    assert alive.consecutive_failures == 0 and alive.status_code == 304 and alive.etag == '"v1"'
+
+    response = await client.get("/apps/link-checks/failing", headers=admin_headers)
+    assert [c["app_id"] for c in response.json()] == [apps["broken"].id]
+    assert response.json()[0]["consecutive_failures"] == 3
+    pending = (await client.get("/apps/dead-reports/pending", headers=admin_headers)).json()
+    assert pending[0]["reporter"] is None
+
+    # Fixing the URL starts a fresh, healthy history
+    apps["broken"].app_url = f"{base}/ok"
+    await db_session.commit()
+    await run_link_checks(db_session, prober)
+    response = await client.get("/apps/link-checks/failing", headers=admin_headers)
+    assert response.json() == []
+    await prober.aclose()
+
+
+@pytest.mark.asyncio
+async def test_private_hosts_are_refused(stub_server):
+    base, state = stub_server
+    prober = LinkProber(timeout=2)
+    for url in (f"{base}/ok", "http://localhost/", "http://169.254.169.254/latest/meta-data/", "http://[::1]/"):
+        result = await prober.probe(url)
+        assert not result.ok and result.error.startswith("BlockedHostError")
+    assert state.requests == []
+    await prober.aclose()
+
+
+@pytest.mark.asyncio
+async def test_no_duplicate_report_while_one_is_pending(db_session, stub_server, monkeypatch):
+    base, _ = stub_server
+    monkeypatch.setattr(settings, "LINK_PROBE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "LINK_PROBE_FAILURE_THRESHOLD", 1)
+    user, _ = await create_test_user(db_session, "maker2", "maker2@example.com")
+    app = App(creator_id=user.id, title="gone", slug="gone", status=AppStatus.LIVE, app_url=f"{base}/missing")
+    db_session.add(app)
+    await db_session.flush()
+    db_session.add(DeadAppReport(app_id=app.id, reporter_id=user.id, reason="Down for me"))
+    await db_session.commit()
+    prober = LinkProber(timeout=2, allow_private=True)
+
+    summary = await run_link_checks(db_session, prober)
+    assert summary == {"checked": 1, "failing": 1, "reported": 0}
+    reports = (await db_session.execute(select(DeadAppReport))).scalars().all()
+    assert [r.reporter_id for r in reports] == [user.id]
+    await prober.aclose()
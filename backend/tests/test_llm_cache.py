@@ -0,0 +1,92 @@
+"""Tests for the agent's model response cache and replay mode."""
+import time
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from app.agent.llm_cache import CachedModel, LLMCacheMiss, LLMResponseCache
+
+
+def _scripted_model(calls: list):
+    """Model that calls the `lookup` tool once, then answers with its result."""
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        calls.append(len(messages))
+        if len(messages) == 1:
+            return ModelResponse(parts=[ToolCallPart("lookup", {"name": "PixelPet"}, tool_call_id="call-1")])
+        tool_return = messages[-1].parts[0].content
+        return ModelResponse(parts=[TextPart(f"done: {tool_return}")])
+    return FunctionModel(respond, model_name="scripted")
+
+
+def _agent(model) -> Agent:
+    agent = Agent(model, system_prompt="Submit apps.")
+
+    @agent.tool_plain
+    def lookup(name: str) -> str:
+        return f"{name} found"
+
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_second_run_is_served_from_cache(tmp_path):
+    calls = []
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=3600)
+    model = CachedModel(_scripted_model(calls), cache)
+
+    first = await _agent(model).run("Post about PixelPet")
+    second = await _agent(model).run("Post about PixelPet")
+
+    assert first.output == second.output == "done: PixelPet found"
+    assert len(calls) == 2
+    assert (model.hits, model.misses) == (2, 2)
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_replay_is_network_free_and_misses_raise(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    recorder = CachedModel(_scripted_model([]), LLMResponseCache(path, ttl_seconds=0))
+    await _agent(recorder).run("Post about PixelPet")
+
+    def unreachable(messages, info):
+        raise AssertionError("model called in replay mode")
+
+    cache = LLMResponseCache(path, ttl_seconds=0)
+    replay = CachedModel(FunctionModel(unreachable, model_name="scripted"), cache, mode="replay")
+    result = await _agent(replay).run("Post about PixelPet")
+    assert result.output == "done: PixelPet found"
+
+    with pytest.raises(LLMCacheMiss):
+        await _agent(replay).run("A different post")
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_tool_schema_is_part_of_the_key(tmp_path):
+    calls = []
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=3600)
+    model = CachedModel(_scripted_model(calls), cache)
+    await _agent(model).run("Post about PixelPet")
+
+    agent = _agent(model)
+
+    @agent.tool_plain
+    def extra(x: int) -> int:
+        return x
+
+    await agent.run("Post about PixelPet")
+    assert len(calls) == 4
+    cache.close()
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    cache.set("k", "test", ModelResponse(parts=[TextPart("hi")]))
+    assert cache.get("k").parts[0].content == "hi"
+
+    cache._connect().execute("UPDATE llm_responses SET created_at = ?", (time.time() - 120,))
+    assert cache.get("k") is None
+    cache.close()
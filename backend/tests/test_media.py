@@ -69,3 +69,45 @@ async def test_get_presigned_url_s3_not_configured(client, auth_headers):
         assert "S3 is not configured" in response.json()["detail"]
     finally:
         settings.S3_BUCKET = old_bucket
+
+@pytest.mark.asyncio
+async def test_get_presigned_urls_batch(client, auth_headers, s3_setup):
+    old_bucket = settings.S3_BUCKET
+    old_endpoint = settings.S3_ENDPOINT_URL
+    settings.S3_BUCKET = "showapp"
+    settings.S3_ENDPOINT_URL = None
+    settings.AWS_ACCESS_KEY_ID = "testing"
+    settings.AWS_SECRET_ACCESS_KEY = "testing"
+    settings.AWS_REGION = "us-east-1"
+
+    try:
+        response = await client.post(
+            "/media/presigned-urls",
+            headers=auth_headers,
+            json={"files": [
+                {"filename": "one.png", "content_type": "image/png"},
+                {"filename": "two.webp", "content_type": "image/webp"},
+                {"filename": "three", "content_type": "image/jpeg"},
+            ]}
+        )
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [i["file_key"].rsplit(".", 1)[-1] for i in items] == ["png", "webp", "jpg"]
+        assert len({i["file_key"] for i in items}) == 3
+        for item in items:
+            assert item["file_key"].startswith("users/")
+            assert "X-Amz-Algorithm" in item["upload_url"]
+            assert item["download_url"].endswith(item["file_key"])
+    finally:
+        settings.S3_BUCKET = old_bucket
+        settings.S3_ENDPOINT_URL = old_endpoint
+
+@pytest.mark.asyncio
+async def test_get_presigned_urls_rejects_empty_and_oversized(client, auth_headers):
+    response = await client.post("/media/presigned-urls", headers=auth_headers, json={"files": []})
+    assert response.status_code == 400
+
+    files = [{"filename": f"{i}.png", "content_type": "image/png"} for i in range(21)]
+    response = await client.post("/media/presigned-urls", headers=auth_headers, json={"files": files})
+    assert response.status_code == 400
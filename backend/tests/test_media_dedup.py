@@ -0,0 +1,195 @@
+"""Tests for content-addressed media: hashing, dedup and reference-counted GC."""
+import hashlib
+from datetime import timedelta
+
+import boto3
+import httpx
+import pytest
+from moto import mock_aws
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import MediaObject
+from app.services.media_refs import delete_unreferenced, hold_existing, release_media, retain_media
+from app.services.media_upload import MediaUploader
+from app.services.storage import build_download_url, checksum_header, content_key
+
+
+@pytest.fixture
+def s3_bucket():
+    old = (settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.AWS_ACCESS_KEY_ID,
+           settings.AWS_SECRET_ACCESS_KEY, settings.AWS_REGION)
+    settings.S3_BUCKET = "showapp"
+    settings.S3_ENDPOINT_URL = None
+    settings.AWS_ACCESS_KEY_ID = "testing"
+    settings.AWS_SECRET_ACCESS_KEY = "testing"
+    settings.AWS_REGION = "us-east-1"
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="showapp")
+        yield s3
+    (settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.AWS_ACCESS_KEY_ID,
+     settings.AWS_SECRET_ACCESS_KEY, settings.AWS_REGION) = old
+
+
+def _bridge(s3, requests):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        key = request.url.path.split("/", 2)[2]
+        s3.put_object(Bucket="showapp", Key=key, Body=await request.aread())
+        return httpx.Response(200)
+    return httpx.MockTransport(handler)
+
+
+def _exists(s3, key) -> bool:
+    return s3.list_objects_v2(Bucket="showapp", Prefix=key).get("KeyCount", 0) > 0
+
+
+@pytest.mark.asyncio
+async def test_identical_files_are_uploaded_once(db_session, s3_bucket, tmp_path):
+    data = b"same screenshot bytes" * 1000
+    sha256 = hashlib.sha256(data).hexdigest()
+    first, second = tmp_path / "a.webp", tmp_path / "b.webp"
+    first.write_bytes(data)
+    second.write_bytes(data)
+
+    requests = []
+    uploader = MediaUploader(transport=_bridge(s3_bucket, requests))
+    [a] = await uploader.upload_files([str(first)], db_session)
+    await retain_media(db_session, [a["download_url"]])
+    await db_session.commit()
+    [b] = await uploader.upload_files([str(second)], db_session)
+    await uploader.aclose()
+
+    assert a["file_key"] == b["file_key"] == f"media/{sha256}.webp"
+    assert a["sha256"] == sha256
+    assert a["deduplicated"] is False
+    assert b["deduplicated"] is True
+    assert len(requests) == 1
+    assert requests[0].headers["x-amz-checksum-sha256"] == checksum_header(sha256)
+
+
+@pytest.mark.asyncio
+async def test_presign_with_digest_uses_content_key(client, db_session, auth_headers, s3_bucket):
+    sha256 = hashlib.sha256(b"avatar").hexdigest()
+    body = {"filename": "me.PNG", "content_type": "image/png", "sha256": sha256.upper()}
+
+    response = await client.post("/media/presigned-url", headers=auth_headers, json=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["file_key"] == content_key(sha256, "png")
+    assert data["exists"] is False
+    assert "x-amz-checksum-sha256" in data["upload_url"]
+
+    # Only registered objects count as existing, not whatever a HEAD finds
+    s3_bucket.put_object(Bucket="showapp", Key=data["file_key"], Body=b"avatar")
+    response = await client.post("/media/presigned-urls", headers=auth_headers, json={"files": [body]})
+    assert response.json()["items"][0]["exists"] is False
+
+    await retain_media(db_session, [data["download_url"]])
+    await db_session.commit()
+    response = await client.post("/media/presigned-urls", headers=auth_headers, json={"files": [body]})
+    assert response.json()["items"][0]["exists"] is True
+
+    body["sha256"] = "not-a-digest"
+    response = await client.post("/media/presigned-url", headers=auth_headers, json=body)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_shared_object_collected_after_last_reference(client, db_session, auth_headers, s3_bucket, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_GC_GRACE_SECONDS", 0)
+    key = content_key(hashlib.sha256(b"shared").hexdigest(), "webp")
+    url = build_download_url(key)
+    s3_bucket.put_object(Bucket="showapp", Key=key, Body=b"shared")
+
+    app_ids, media_ids = [], []
+    for title in ("First", "Second"):
+        app = (await client.post("/apps/", json={"title": title, "prompt_text": "x"}, headers=auth_headers)).json()
+        media = (await client.post(f"/apps/{app['id']}/media", json={"media_url": url}, headers=auth_headers)).json()
+        app_ids.append(app["id"])
+        media_ids.append(media["id"])
+
+    obj = (await db_session.execute(select(MediaObject).filter(MediaObject.url == url))).scalars().one()
+    assert obj.ref_count == 2
+
+    resp = await client.delete(f"/apps/{app_ids[0]}/media/{media_ids[0]}", headers=auth_headers)
+    assert resp.status_code == 204
+    assert _exists(s3_bucket, key)
+
+    # Deleting the app releases its media too; the GC worker collects it
+    resp = await client.delete(f"/apps/{app_ids[1]}", headers=auth_headers)
+    assert resp.status_code == 204
+    assert _exists(s3_bucket, key)
+    assert await delete_unreferenced(db_session) == 1
+    assert not _exists(s3_bucket, key)
+    db_session.expire_all()
+    remaining = (await db_session.execute(select(MediaObject).filter(MediaObject.url == url))).scalars().all()
+    assert remaining == []
+
+
+@pytest.mark.asyncio
+async def test_external_media_urls_are_not_tracked(client, db_session, auth_headers, s3_bucket):
+    app = (await client.post("/apps/", json={"title": "Ext", "prompt_text": "x"}, headers=auth_headers)).json()
+    media = (await client.post(
+        f"/apps/{app['id']}/media", json={"media_url": "https://example.com/a.png"}, headers=auth_headers
+    )).json()
+
+    assert (await db_session.execute(select(MediaObject))).scalars().all() == []
+    resp = await client.delete(f"/apps/{app['id']}/media/{media['id']}", headers=auth_headers)
+    assert resp.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_released_object_survives_the_grace_period(client, db_session, auth_headers, s3_bucket):
+    key = content_key(hashlib.sha256(b"grace").hexdigest(), "webp")
+    url = build_download_url(key)
+    s3_bucket.put_object(Bucket="showapp", Key=key, Body=b"grace")
+    app = (await client.post("/apps/", json={"title": "Grace", "prompt_text": "x"}, headers=auth_headers)).json()
+    media = (await client.post(f"/apps/{app['id']}/media", json={"media_url": url}, headers=auth_headers)).json()
+
+    await client.delete(f"/apps/{app['id']}/media/{media['id']}", headers=auth_headers)
+    assert _exists(s3_bucket, key)
+    obj = (await db_session.execute(select(MediaObject).filter(MediaObject.url == url))).scalars().one()
+    assert obj.ref_count == 0 and obj.released_at is not None
+
+    # An upload told the object exists references it again within the grace period
+    await client.post(f"/apps/{app['id']}/media", json={"media_url": url}, headers=auth_headers)
+    db_session.expire_all()
+    obj = (await db_session.execute(select(MediaObject).filter(MediaObject.url == url))).scalars().one()
+    assert obj.ref_count == 1 and obj.released_at is None
+    assert await delete_unreferenced(db_session) == 0 and _exists(s3_bucket, key)
+
+
+@pytest.mark.asyncio
+async def test_retain_upserts_new_objects(db_session, s3_bucket):
+    url = build_download_url(content_key(hashlib.sha256(b"race").hexdigest(), "webp"))
+
+    # Two registrations of the same new object, as from concurrent runs
+    await retain_media(db_session, [url, url])
+    await retain_media(db_session, [url])
+    await db_session.commit()
+
+    obj = (await db_session.execute(select(MediaObject).filter(MediaObject.url == url))).scalars().one()
+    assert obj.ref_count == 3
+
+
+@pytest.mark.asyncio
+async def test_hold_existing_restarts_the_grace_period(db_session, s3_bucket, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_GC_GRACE_SECONDS", 60)
+    key = content_key(hashlib.sha256(b"expired").hexdigest(), "webp")
+    url = build_download_url(key)
+    s3_bucket.put_object(Bucket="showapp", Key=key, Body=b"expired")
+    await retain_media(db_session, [url])
+    await release_media(db_session, [url])
+    await db_session.commit()
+
+    # Released long ago: eligible for collection
+    obj = (await db_session.execute(select(MediaObject).filter(MediaObject.url == url))).scalars().one()
+    obj.released_at = obj.released_at - timedelta(hours=1)
+    await db_session.commit()
+
+    assert await hold_existing(db_session, [key, "media/unknown.webp"]) == {key}
+    await db_session.commit()
+    assert await delete_unreferenced(db_session) == 0
+    assert _exists(s3_bucket, key)
@@ -0,0 +1,162 @@
+"""Tests for the concurrent media uploader, backed by moto's S3 stand-in."""
+import asyncio
+from urllib.parse import urlparse
+
+import boto3
+import httpx
+import pytest
+from moto import mock_aws
+
+from app.core.config import settings
+from app.services.media_upload import MediaUploader
+from app.services.storage import get_s3_client
+
+
+@pytest.fixture
+def s3_bucket():
+    old = (settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.AWS_ACCESS_KEY_ID,
+           settings.AWS_SECRET_ACCESS_KEY, settings.AWS_REGION)
+    settings.S3_BUCKET = "showapp"
+    settings.S3_ENDPOINT_URL = None
+    settings.AWS_ACCESS_KEY_ID = "testing"
+    settings.AWS_SECRET_ACCESS_KEY = "testing"
+    settings.AWS_REGION = "us-east-1"
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="showapp")
+        yield s3
+    (settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.AWS_ACCESS_KEY_ID,
+     settings.AWS_SECRET_ACCESS_KEY, settings.AWS_REGION) = old
+
+
+class S3Bridge:
+    """httpx transport that replays presigned PUTs against the mocked bucket."""
+
+    def __init__(self, s3, failures: int = 0, status: int = 503, delay: float = 0):
+        self.s3 = s3
+        self.failures = failures
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.requests.append(request)
+            body = await request.aread()
+            await asyncio.sleep(self.delay)
+            if self.failures > 0:
+                self.failures -= 1
+                return httpx.Response(self.status)
+            # Path-style presigned URL: /<bucket>/<key>
+            bucket, key = urlparse(str(request.url)).path.lstrip("/").split("/", 1)
+            self.s3.put_object(
+                Bucket=bucket, Key=key, Body=body,
+                ContentType=request.headers["content-type"],
+            )
+            return httpx.Response(200)
+        finally:
+            self.in_flight -= 1
+
+
+def _files(tmp_path, n: int) -> list[str]:
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"shot{i}.webp"
+        path.write_bytes(bytes([i]) * (100_000 + i))
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.asyncio
+async def test_uploads_land_in_bucket(s3_bucket, tmp_path):
+    bridge = S3Bridge(s3_bucket)
+    uploader = MediaUploader(concurrency=2, transport=httpx.MockTransport(bridge))
+    paths = _files(tmp_path, 3)
+
+    results = await uploader.upload_files(paths)
+    await uploader.aclose()
+
+    assert all(r["success"] for r in results)
+    for path, result in zip(paths, results):
+        assert result["file_key"].startswith("media/")
+        assert result["download_url"].endswith(result["file_key"])
+        obj = s3_bucket.get_object(Bucket="showapp", Key=result["file_key"])
+        assert obj["Body"].read() == open(path, "rb").read()
+        assert obj["ContentType"] == "image/webp"
+
+
+@pytest.mark.asyncio
+async def test_bodies_are_streamed_with_content_length(s3_bucket, tmp_path):
+    bridge = S3Bridge(s3_bucket)
+    uploader = MediaUploader(transport=httpx.MockTransport(bridge))
+    [path] = _files(tmp_path, 1)
+
+    await uploader.upload_file(path)
+    await uploader.aclose()
+
+    request = bridge.requests[0]
+    assert request.headers["content-length"] == "100000"
+    assert "transfer-encoding" not in request.headers
+    assert isinstance(request.stream, httpx.AsyncByteStream)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded(s3_bucket, tmp_path):
+    bridge = S3Bridge(s3_bucket, delay=0.02)
+    uploader = MediaUploader(concurrency=2, transport=httpx.MockTransport(bridge))
+
+    results = await uploader.upload_files(_files(tmp_path, 6))
+    await uploader.aclose()
+
+    assert all(r["success"] for r in results)
+    assert bridge.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(s3_bucket, tmp_path):
+    bridge = S3Bridge(s3_bucket, failures=2, status=503)
+    uploader = MediaUploader(max_retries=3, backoff=0, transport=httpx.MockTransport(bridge))
+    [path] = _files(tmp_path, 1)
+
+    result = await uploader.upload_file(path)
+    await uploader.aclose()
+
+    assert result["success"] is True
+    assert bridge.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(s3_bucket, tmp_path):
+    bridge = S3Bridge(s3_bucket, failures=5, status=403)
+    uploader = MediaUploader(max_retries=3, backoff=0, transport=httpx.MockTransport(bridge))
+    [path] = _files(tmp_path, 1)
+
+    result = await uploader.upload_file(path)
+    await uploader.aclose()
+
+    assert "error" in result
+    assert bridge.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_file_and_unconfigured_s3(tmp_path):
+    uploader = MediaUploader()
+    assert "File not found" in (await uploader.upload_file(str(tmp_path / "nope.png")))["error"]
+
+    old_bucket = settings.S3_BUCKET
+    settings.S3_BUCKET = None
+    try:
+        [path] = _files(tmp_path, 1)
+        assert (await uploader.upload_file(path))["error"] == "S3 not configured"
+    finally:
+        settings.S3_BUCKET = old_bucket
+
+
+def test_s3_client_is_cached(s3_bucket):
+    assert get_s3_client() is get_s3_client()
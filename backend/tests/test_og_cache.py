@@ -0,0 +1,88 @@
+"""Tests for the rendered Open Graph page cache."""
+import re
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.og_cache import RenderCache, og_cache
+from tests.conftest import QueryCounter
+
+
+async def _create_app(client: AsyncClient, headers, title="Cached OG App") -> dict:
+    response = await client.post("/apps/", json={"title": title, "prompt_text": "A cached app"}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_revalidation_skips_database(client: AsyncClient, auth_headers, engine):
+    app = await _create_app(client, auth_headers)
+
+    first = await client.get(f"/og/apps/{app['slug']}")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public")
+
+    with QueryCounter(engine) as queries:
+        hit = await client.get(f"/og/apps/{app['slug']}")
+        not_modified = await client.get(f"/og/apps/{app['slug']}", headers={"If-None-Match": f'"other", {etag}'})
+    assert hit.content == first.content and hit.headers["etag"] == etag
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert queries.count == 0
+
+
+@pytest.mark.asyncio
+async def test_app_edits_invalidate(client: AsyncClient, auth_headers):
+    app = await _create_app(client, auth_headers)
+    old_etag = (await client.get(f"/og/apps/{app['slug']}")).headers["etag"]
+    await client.get(f"/og/apps/{app['id']}")
+
+    response = await client.patch(f"/apps/{app['id']}", json={"title": "Renamed OG App"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    # Every key rendered from the row is dropped, including lookups by id
+    by_id = await client.get(f"/og/apps/{app['id']}", headers={"If-None-Match": old_etag})
+    assert by_id.status_code == 200 and "Renamed OG App" in by_id.text
+    by_slug = await client.get(f"/og/apps/{app['slug']}")
+    assert "Renamed OG App" in by_slug.text
+
+    card_url = re.search(r'og:image" content="([^"]+)"', by_id.text).group(1)
+    media = {"media_url": "https://cdn.example.com/shot.webp"}
+    response = await client.post(f"/apps/{app['id']}/media", json=media, headers=auth_headers)
+    assert response.status_code == 200
+    assert card_url not in (await client.get(f"/og/apps/{app['id']}")).text
+
+
+@pytest.mark.asyncio
+async def test_profile_edit_invalidates_user_page(client: AsyncClient, auth_user_and_headers):
+    user, headers = auth_user_and_headers
+    before = await client.get(f"/og/users/{user.username}")
+
+    response = await client.patch(f"/users/{user.id}", json={"bio": "Builds tiny tools"}, headers=headers)
+    assert response.status_code == 200
+
+    after = await client.get(f"/og/users/{user.username}")
+    assert "Builds tiny tools" in after.text
+    assert after.headers["etag"] != before.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_missing_pages_are_not_cached(client: AsyncClient, auth_headers):
+    missing = await client.get("/og/apps/late-app")
+    assert "App Not Found" in missing.text and "etag" not in missing.headers
+
+    await client.post("/apps/", json={"title": "Late App", "prompt_text": "x"}, headers=auth_headers)
+    assert "Late App" in (await client.get("/og/apps/late-app")).text
+
+
+def test_render_racing_invalidation_is_not_stored():
+    cache = RenderCache(ttl_seconds=60, max_entries=2)
+    version = cache.version
+    cache.invalidate("app_id:1")
+    page = cache.put("app:a", "<html>", tags=["app_id:1"], version=version)
+    assert page.etag and cache.get("app:a") is None
+
+    for key in ("app:a", "app:b", "app:c"):
+        cache.put(key, key, tags=[], version=cache.version)
+    assert cache.get("app:a") is None and cache.get("app:c") is not None
+    assert og_cache.get("app:a") is None
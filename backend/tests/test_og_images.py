@@ -0,0 +1,146 @@
+"""Tests for generated Open Graph card images."""
+import io
+import os
+import re
+import time
+
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+
+import app.services.og_images as og_images
+from app.core.config import settings
+from app.services.images import OG_SIZE
+from app.services.og_images import render_card
+
+
+def _png(color=(200, 40, 40), size=(1600, 2400)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def card_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OG_IMAGE_CACHE_DIR", str(tmp_path / "cards"))
+    return tmp_path / "cards"
+
+
+class FakeFetch:
+    """Records screenshot downloads; set ``fail`` to simulate an unreachable CDN."""
+
+    def __init__(self):
+        self.urls = []
+        self.fail = False
+
+    async def __call__(self, url):
+        self.urls.append(url)
+        return None if self.fail else _png()
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    fetch = FakeFetch()
+    monkeypatch.setattr(og_images, "_fetch_screenshot", fetch)
+    return fetch
+
+
+def test_render_card_size_and_long_titles():
+    title = "An extremely long application title that keeps going well past two full lines of text " * 2
+    for screenshot in (None, _png(), b"not an image"):
+        data = render_card(title, "maker", screenshot)
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.format == "PNG" and img.size == OG_SIZE
+
+
+@pytest.mark.asyncio
+async def test_card_rendered_once_per_content(client: AsyncClient, auth_headers, card_dir, fetches):
+    app = (await client.post("/apps/", json={"title": "Pixel Pet", "prompt_text": "x"}, headers=auth_headers)).json()
+    await client.post(f"/apps/{app['id']}/media", json={"media_url": "https://cdn.example.com/a.png"}, headers=auth_headers)
+
+    page = await client.get(f"/og/apps/{app['slug']}")
+    card_url = re.search(r'og:image" content="([^"]+)"', page.text).group(1)
+    assert card_url.startswith(f"https://show-your.app/api/og/apps/{app['slug']}/image.png?v=")
+    version = card_url.split("?v=")[1]
+
+    first = await client.get(f"/og/apps/{app['slug']}/image.png")
+    second = await client.get(f"/og/apps/{app['id']}/image.png")
+    assert first.status_code == 200 and first.headers["content-type"] == "image/png"
+    assert first.headers["etag"] == f'"{version}"' and second.content == first.content
+    assert fetches.urls == ["https://cdn.example.com/a.png"]
+    assert [p.name for p in card_dir.iterdir()] == [f"{version}.png"]
+
+    not_modified = await client.get(f"/og/apps/{app['slug']}/image.png", headers={"If-None-Match": f'"{version}"'})
+    assert not_modified.status_code == 304
+
+    # A new title means a new card
+    await client.patch(f"/apps/{app['id']}", json={"title": "Pixel Pet 2"}, headers=auth_headers)
+    renamed = await client.get(f"/og/apps/{app['slug']}/image.png")
+    assert renamed.headers["etag"] != first.headers["etag"]
+    assert len(fetches.urls) == 2
+
+
+@pytest.mark.asyncio
+async def test_unreachable_screenshot_falls_back_and_retries(client: AsyncClient, auth_headers, card_dir, fetches):
+    app = (await client.post("/apps/", json={"title": "Offline", "prompt_text": "x"}, headers=auth_headers)).json()
+    await client.post(f"/apps/{app['id']}/media", json={"media_url": "https://cdn.example.com/b.png"}, headers=auth_headers)
+
+    fetches.fail = True
+    fallback = await client.get(f"/og/apps/{app['slug']}/image.png")
+    assert fallback.status_code == 200
+
+    fetches.fail = False
+    card = await client.get(f"/og/apps/{app['slug']}/image.png")
+    assert card.headers["etag"] != fallback.headers["etag"]
+    assert len(fetches.urls) == 2 and len(list(card_dir.iterdir())) == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_app_card_is_404(client: AsyncClient, card_dir):
+    response = await client.get("/og/apps/nope/image.png")
+    assert response.status_code == 404
+
+
+def test_screenshots_only_come_from_media_origins(monkeypatch):
+    monkeypatch.setattr(settings, "S3_BUCKET", "media")
+    monkeypatch.setattr(settings, "S3_ENDPOINT_URL", "http://minio:9000")
+    monkeypatch.setattr(settings, "OG_IMAGE_FETCH_HOSTS", "cdn.example.com")
+
+    assert og_images.screenshot_url_allowed("http://minio:9000/media/abc.webp")
+    assert og_images.screenshot_url_allowed("https://CDN.example.com/abc.webp")
+    for url in (
+        "http://169.254.169.254/latest/meta-data/",
+        "http://localhost:8000/admin",
+        "http://minio:9001/media/abc.webp",
+        "http://cdn.example.com/abc.webp",
+        "https://cdn.example.com:8443/abc.webp",
+        "file:///etc/passwd",
+        "not a url",
+    ):
+        assert not og_images.screenshot_url_allowed(url), url
+
+
+@pytest.mark.asyncio
+async def test_disallowed_screenshot_is_not_fetched(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("must not open a connection")
+
+    monkeypatch.setattr(og_images.httpx, "AsyncClient", no_network)
+    assert await og_images._fetch_screenshot("http://169.254.169.254/latest/meta-data/") is None
+
+
+def test_sweep_deletes_least_recently_used_cards(tmp_path):
+    now = time.time()
+    for i in range(5):
+        path = tmp_path / f"{i}.png"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (now - 7200 + i, now - 7200 + i))
+    (tmp_path / "fresh.png").write_bytes(b"x" * 100)
+    (tmp_path / "left.tmp").write_bytes(b"x")
+    os.utime(tmp_path / "left.tmp", (now - 7200, now - 7200))
+
+    deleted = og_images.sweep_cards(tmp_path, max_bytes=300)
+
+    # Oldest first until it fits; the recently used card is kept; temp files always go
+    assert deleted == 4
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["3.png", "4.png", "fresh.png"]
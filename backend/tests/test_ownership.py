@@ -110,3 +110,40 @@ async def test_ownership_claim_rejection(client: AsyncClient, db_session, admin_
     app_final_resp = await client.get(f"/apps/{app_id}")
     assert app_final_resp.json()["is_owner"] == False
     assert app_final_resp.json()["creator_id"] != user_c.id
+
+
+@pytest.mark.asyncio
+async def test_approved_claim_invalidates_cached_app_lists(client: AsyncClient, db_session, admin_headers: dict):
+    from app.services.taxonomy import taxonomy_cache
+
+    user_a, headers_a = await create_test_user(db_session, username="cache_creator", email="cache_creator@example.com")
+    app_resp = await client.post("/apps/", json={
+        "title": "Cached App",
+        "prompt_text": "Cached before the transfer",
+        "is_owner": False
+    }, headers=headers_a)
+    app_id = app_resp.json()["id"]
+    user_b, headers_b = await create_test_user(db_session, username="cache_claimant", email="cache_claimant@example.com")
+
+    # Warm both users' cached app lists.
+    before_a = await taxonomy_cache.user_apps(db_session, user_a.id)
+    before_b = await taxonomy_cache.user_apps(db_session, user_b.id)
+    assert [a["id"] for a in before_a.data] == [app_id]
+    assert before_b.data == []
+
+    claim_resp = await client.post(
+        f"/apps/{app_id}/claim-ownership",
+        json={"message": "Mine"},
+        headers=headers_b
+    )
+    resolve_resp = await client.put(
+        f"/ownership-claims/{claim_resp.json()['id']}/resolve",
+        params={"status": "approved"},
+        headers=admin_headers
+    )
+    assert resolve_resp.status_code == 200
+
+    after_a = await taxonomy_cache.user_apps(db_session, user_a.id)
+    after_b = await taxonomy_cache.user_apps(db_session, user_b.id)
+    assert after_a.data == []
+    assert [a["id"] for a in after_b.data] == [app_id]
@@ -0,0 +1,184 @@
+"""Tests for the agent's page snapshot cache."""
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.agent.page_cache as page_cache_module
+import app.agent.tools as tools_module
+from app.agent.deps import AgentDeps
+from app.agent.page_cache import PageCache, PageSnapshot
+from app.agent.tools import browser_click, browser_get_content, browser_navigate, browser_screenshot
+from app.core.config import settings
+from app.services.images import EncodedImage
+
+
+class FakeSession:
+    """Stands in for a leased Chromium session and records calls."""
+
+    def __init__(self, screenshot_dir):
+        self.calls = []
+        self.url = None
+        self.screenshot_dir = screenshot_dir
+
+    async def navigate(self, url):
+        self.calls.append(("navigate", url))
+        self.url = url
+        return {"success": True, "url": url + "#loaded", "title": "PixelPet"}
+
+    async def get_page_content(self):
+        self.calls.append(("content", self.url))
+        return {"success": True, "title": "PixelPet", "url": self.url, "content": "Raise a pixel pet"}
+
+    async def take_screenshot(self, name):
+        self.calls.append(("screenshot", name))
+        path = self.screenshot_dir / f"{name}.webp"
+        path.write_bytes(b"webp")
+        image = EncodedImage(path=str(path), content_type="image/webp", width=10, height=10, size_bytes=4)
+        return {"success": True, "file_path": image.path, "image": image}
+
+    async def click(self, selector):
+        self.calls.append(("click", selector))
+        return {"success": True, "selector": selector}
+
+
+class Ctx:
+    def __init__(self, deps):
+        self.deps = deps
+
+
+@pytest.fixture
+def page_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_PAGE_CACHE_PATH", str(tmp_path / "pages.sqlite3"))
+    monkeypatch.setattr(settings, "AGENT_PAGE_CACHE_TTL_SECONDS", 3600)
+    monkeypatch.setattr(page_cache_module, "_page_cache", None)
+    cache = page_cache_module.get_page_cache()
+    yield cache
+    cache.close()
+
+
+def _ctx() -> Ctx:
+    return Ctx(AgentDeps(db=MagicMock(), user_id=1, username="admin", is_admin=True))
+
+
+@pytest.mark.asyncio
+async def test_second_visit_is_served_without_browser(page_cache, tmp_path, monkeypatch):
+    session = FakeSession(tmp_path)
+    launches = []
+
+    async def fake_get_browser(deps):
+        launches.append(deps)
+        return session
+
+    monkeypatch.setattr(tools_module, "get_browser", fake_get_browser)
+
+    first = _ctx()
+    await browser_navigate(first, "https://www.PixelPet.app/")
+    await browser_get_content(first)
+    await browser_screenshot(first, "main")
+    assert [c[0] for c in session.calls] == ["navigate", "content", "screenshot"]
+
+    launches.clear()
+    session.calls.clear()
+    second = _ctx()
+    nav = await browser_navigate(second, "pixelpet.app")
+    content = await browser_get_content(second)
+    shot = await browser_screenshot(second, "hero")
+
+    assert nav["cached"] and nav["url"] == "https://www.PixelPet.app/#loaded"
+    assert content["content"] == "Raise a pixel pet"
+    assert shot["cached"] and len(second.deps.saved_screenshots) == 1
+    # Served from the cache's own copy, not the first session's file
+    assert shot["file_path"] != str(tmp_path / "main.webp")
+    assert shot["file_path"].startswith(str(page_cache.screenshot_dir))
+    assert launches == [] and session.calls == []
+    assert second.deps.profile.page_cache_hits == 3
+    assert second.deps.browser_step_count == 3
+
+    # Interacting needs the live page: the browser loads the cached URL first
+    await browser_click(second, "#start")
+    assert session.calls == [("navigate", "pixelpet.app"), ("click", "#start")]
+    assert second.deps.current_page is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_without_screenshot_uses_live_page(page_cache, tmp_path, monkeypatch):
+    session = FakeSession(tmp_path)
+
+    async def fake_get_browser(deps):
+        return session
+
+    monkeypatch.setattr(tools_module, "get_browser", fake_get_browser)
+    page_cache.put(PageSnapshot(url="https://pixelpet.app", final_url="https://pixelpet.app/", title="PixelPet"))
+
+    ctx = _ctx()
+    await browser_navigate(ctx, "https://pixelpet.app")
+    result = await browser_screenshot(ctx, "feature")
+
+    assert "cached" not in result
+    assert session.calls == [("navigate", "https://pixelpet.app"), ("screenshot", "feature")]
+    assert page_cache.get("pixelpet.app").screenshot() is not None
+
+
+@pytest.mark.asyncio
+async def test_cached_screenshot_survives_session_cleanup(page_cache, tmp_path, monkeypatch):
+    session_dir = tmp_path / "session"
+    session_dir.mkdir()
+    session = FakeSession(session_dir)
+
+    async def fake_get_browser(deps):
+        return session
+
+    monkeypatch.setattr(tools_module, "get_browser", fake_get_browser)
+
+    first = _ctx()
+    await browser_navigate(first, "https://pixelpet.app")
+    await browser_screenshot(first, "main")
+    # The first session closes and removes its temp directory
+    for path in session_dir.iterdir():
+        path.unlink()
+
+    second = _ctx()
+    await browser_navigate(second, "https://pixelpet.app/")
+    shot = await browser_screenshot(second, "main")
+    assert shot["cached"]
+    assert second.deps.saved_screenshots[0].path == shot["file_path"]
+
+
+def test_expired_and_missing_files(tmp_path, monkeypatch):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), ttl_seconds=60)
+    snapshot = PageSnapshot(url="https://a.example.com", final_url="https://a.example.com/", title="A")
+    source = tmp_path / "shot.webp"
+    source.write_bytes(b"webp")
+    cache.store_screenshot(snapshot, EncodedImage(
+        path=str(source), content_type="image/webp", width=1, height=1, size_bytes=4,
+    ))
+    cache.put(snapshot)
+
+    cached = cache.get("http://a.example.com/")
+    assert cached.title == "A"
+    cached_path = cached.screenshot().path
+    Path(cached_path).unlink()
+    assert cache.get("https://a.example.com").screenshot() is None
+
+    # Expired snapshots are skipped and pruned along with their files
+    cache.store_screenshot(snapshot, EncodedImage(
+        path=str(source), content_type="image/webp", width=1, height=1, size_bytes=4,
+    ))
+    cache.put(snapshot)
+    now = time.time()
+    monkeypatch.setattr(page_cache_module.time, "time", lambda: now + 120)
+    assert cache.get("https://a.example.com") is None
+    cache.put(PageSnapshot(url="https://b.example.com", final_url="https://b.example.com/", title="B"))
+    assert not Path(cached_path).exists()
+    cache.close()
+
+
+def test_disabled_by_default():
+    assert settings.AGENT_PAGE_CACHE_TTL_SECONDS == 0
+
+
+def test_disabled_by_zero_ttl(monkeypatch):
+    monkeypatch.setattr(settings, "AGENT_PAGE_CACHE_TTL_SECONDS", 0)
+    assert page_cache_module.get_page_cache() is None
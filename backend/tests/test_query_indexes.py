@@ -0,0 +1,77 @@
+"""EXPLAIN checks that hot query shapes use the composite and partial indexes."""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import desc, select
+
+from app.models import App, Comment, DeadAppReport, Like, Notification, ReportStatus, utcnow
+from tests.conftest import create_test_user
+
+# Query shape -> (statement, index names that satisfy it)
+HOT_QUERIES = {
+    "liked status of a feed page": (
+        select(Like.app_id).filter(Like.app_id.in_([1, 2, 3]), Like.user_id == 1),
+        # Both composites match every column; either is fine
+        ("ix_likes_user_id_app_id", "uq_app_like"),
+    ),
+    "apps liked by a user": (
+        select(Like.app_id).filter(Like.user_id == 1),
+        ("ix_likes_user_id_app_id",),
+    ),
+    "comment thread": (
+        select(Comment).filter(Comment.app_id == 1).order_by(Comment.created_at.desc()),
+        ("ix_comments_app_id_created_at",),
+    ),
+    "notification list": (
+        select(Notification).filter(Notification.user_id == 1).order_by(Notification.created_at.desc()),
+        ("ix_notifications_user_id_created_at",),
+    ),
+    "pending reports of an app": (
+        select(DeadAppReport).filter(DeadAppReport.app_id == 1, DeadAppReport.status == ReportStatus.PENDING),
+        ("ix_dead_app_reports_app_id_status",),
+    ),
+    "creator's apps": (
+        select(App.id).filter(App.creator_id == 1).order_by(desc(App.created_at)),
+        ("ix_apps_creator_id_created_at",),
+    ),
+    "newest live app": (
+        select(App.id).filter(App.is_dead == False).order_by(desc(App.created_at), desc(App.id)).limit(1),
+        ("ix_apps_live_created_at",),
+    ),
+}
+
+
+async def _seed(db_session) -> None:
+    """Enough rows (mostly live apps) for the planner's statistics to be realistic."""
+    users = [(await create_test_user(db_session, f"user{i}", f"user{i}@example.com"))[0] for i in range(3)]
+    now = utcnow()
+    for i in range(300):
+        db_session.add(App(
+            creator_id=users[i % 3].id,
+            title=f"App {i}",
+            slug=f"app-{i}",
+            is_dead=i % 10 == 0,
+            created_at=now - timedelta(minutes=i),
+        ))
+    await db_session.commit()
+
+
+async def _plan(conn, statement) -> str:
+    sql = str(statement.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        # Tiny test tables would otherwise always be scanned sequentially
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = (await conn.exec_driver_sql("EXPLAIN " + sql)).all()
+        return "\n".join(row[0] for row in rows)
+    rows = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_composite_indexes(db_session, engine):
+    await _seed(db_session)
+    async with engine.begin() as conn:
+        await conn.exec_driver_sql("ANALYZE")
+        for name, (statement, indexes) in HOT_QUERIES.items():
+            plan = await _plan(conn, statement)
+            assert any(index in plan for index in indexes), f"{name} does not use {indexes}:\n{plan}"
@@ -0,0 +1,136 @@
+"""Tests for read-replica routing, read-your-writes pins and replica fallback."""
+import re
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.datastructures import Headers
+
+import app.database as database
+from app.core.config import settings
+from app.core.read_routing import (
+    PIN_COOKIE,
+    ReadYourWritesMiddleware,
+    credential_key,
+    primary_pins,
+    replica_health,
+)
+from app.models import App, Base, User
+
+
+@pytest_asyncio.fixture
+async def replica(tmp_path, monkeypatch):
+    """A separate database standing in for the replica, holding one app the primary lacks."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessions() as session:
+        user = User(username="mirror", email="mirror@example.com", api_key="mirror-key")
+        session.add(user)
+        await session.flush()
+        session.add(App(creator_id=user.id, title="Replica app", slug="replica-app", prompt_text="x"))
+        await session.commit()
+    monkeypatch.setattr(database, "ReadSessionLocal", sessions)
+    yield engine
+    await engine.dispose()
+
+
+def _key(headers: dict) -> str:
+    return credential_key(Headers(headers=headers))
+
+
+async def _titles(client: AsyncClient, **kwargs) -> list[str]:
+    return [app["title"] for app in (await client.get("/apps/", **kwargs)).json()]
+
+
+@pytest.mark.asyncio
+async def test_reads_use_the_replica_unless_pinned(client: AsyncClient, auth_headers, replica):
+    await client.post("/apps/", json={"title": "Primary app", "prompt_text": "x"}, headers=auth_headers)
+
+    assert await _titles(client) == ["Replica app"]
+    assert (await client.get("/apps/replica-app")).status_code == 200
+
+    # A recent write (cookie or pinned credential) reads from the primary
+    assert await _titles(client, headers={"Cookie": f"{PIN_COOKIE}=1"}) == ["Primary app"]
+    assert await _titles(client, headers=auth_headers) == ["Replica app"]
+    primary_pins.pin(_key(auth_headers), 5)
+    assert await _titles(client, headers=auth_headers) == ["Primary app"]
+
+
+@pytest.mark.asyncio
+async def test_process_caches_are_filled_from_the_primary(client: AsyncClient, auth_headers, admin_headers, replica):
+    await client.post("/tags/", json={"name": "Fresh"}, headers=admin_headers)
+    app = (await client.post("/apps/", json={"title": "Primary app", "prompt_text": "x"}, headers=auth_headers)).json()
+
+    # The replica lacks both; cached responses must not be built from it
+    assert [t["name"] for t in (await client.get("/tags/")).json()] == ["Fresh"]
+    assert (await client.get("/apps/facets")).json()["total"] == 1
+    assert "Primary app" in (await client.get(f"/og/apps/{app['slug']}")).text
+
+
+@pytest.mark.asyncio
+async def test_unavailable_replica_falls_back_to_primary(client: AsyncClient, auth_headers, tmp_path, monkeypatch):
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monkeypatch.setattr(database, "ReadSessionLocal", async_sessionmaker(broken, class_=AsyncSession))
+    await client.post("/apps/", json={"title": "Primary app", "prompt_text": "x"}, headers=auth_headers)
+
+    assert await _titles(client) == ["Primary app"]
+    assert not replica_health.available() and replica_health.failures == 1
+    # Not retried until READ_REPLICA_RETRY_SECONDS have passed
+    assert await _titles(client) == ["Primary app"]
+    assert replica_health.failures == 1
+    await broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_successful_writes_pin_the_client():
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, pin_seconds=5)
+
+    @app.post("/ok")
+    async def ok():
+        return {}
+
+    @app.post("/fail")
+    async def fail():
+        raise HTTPException(status_code=400)
+
+    @app.get("/read")
+    async def read():
+        return {}
+
+    headers = {"X-API-Key": "agent-key"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert PIN_COOKIE not in (await client.get("/read", headers=headers)).cookies
+        assert PIN_COOKIE not in (await client.post("/fail", headers=headers)).cookies
+        assert not primary_pins.is_pinned(_key(headers))
+
+        response = await client.post("/ok", headers=headers)
+    assert response.cookies[PIN_COOKIE] == "1"
+    assert "Max-Age=5" in response.headers["set-cookie"]
+    assert primary_pins.is_pinned(_key(headers))
+
+
+@pytest.mark.asyncio
+async def test_versioned_og_card_is_not_served_stale_from_the_replica(
+    client: AsyncClient, auth_headers, replica, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "OG_IMAGE_CACHE_DIR", str(tmp_path / "cards"))
+    # The primary's copy of the app was renamed; the replica still has the old title
+    app = (await client.post("/apps/", json={"title": "Replica app", "prompt_text": "x"}, headers=auth_headers)).json()
+    await client.patch(f"/apps/{app['id']}", json={"title": "Renamed app"}, headers=auth_headers)
+
+    page = await client.get(f"/og/apps/{app['slug']}")
+    version = re.search(r"image\.png\?v=([0-9a-f]+)", page.text).group(1)
+
+    card = await client.get(f"/og/apps/{app['slug']}/image.png", params={"v": version})
+    assert card.headers["etag"] == f'"{version}"'
+    assert card.headers["cache-control"] == "public, max-age=86400"
+
+    # An unknown version is served, but not kept for a day
+    stale = await client.get(f"/og/apps/{app['slug']}/image.png", params={"v": "0" * 16})
+    assert stale.status_code == 200
+    assert stale.headers["cache-control"] == "public, max-age=60"
@@ -0,0 +1,95 @@
+"""Tests for the dynamic sitemaps."""
+import re
+from datetime import datetime, timezone
+from xml.etree import ElementTree
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import App, AppStatus
+from tests.conftest import QueryCounter, create_test_user
+
+NS = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+
+
+def _locs(xml: bytes) -> list[str]:
+    return [el.text for el in ElementTree.fromstring(xml).findall(".//sm:loc", NS)]
+
+
+async def _add_apps(db_session, user, slugs, is_dead=False):
+    for slug in slugs:
+        db_session.add(App(creator_id=user.id, title=slug, slug=slug, status=AppStatus.LIVE, is_dead=is_dead))
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_index_and_pages(client: AsyncClient, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SITEMAP_PAGE_SIZE", 2)
+    user, _ = await create_test_user(db_session, "maker", "maker@example.com")
+    await _add_apps(db_session, user, ["alpha", "beta", "gamma"])
+    await _add_apps(db_session, user, ["gone"], is_dead=True)
+
+    index = await client.get("/sitemap.xml")
+    assert index.status_code == 200 and index.headers["content-type"] == "application/xml"
+    assert _locs(index.content) == [
+        "https://show-your.app/sitemaps/pages.xml",
+        "https://show-your.app/sitemaps/apps-1.xml",
+        "https://show-your.app/sitemaps/apps-2.xml",
+        "https://show-your.app/sitemaps/users-1.xml",
+    ]
+    assert "<lastmod>" in index.text
+
+    first = await client.get("/sitemaps/apps-1.xml")
+    assert _locs(first.content) == ["https://show-your.app/apps/alpha", "https://show-your.app/apps/beta"]
+    assert re.search(r"<lastmod>\d{4}-\d{2}-\d{2}</lastmod>", first.text)
+    # The dead app (id 4) is left out
+    assert _locs((await client.get("/sitemaps/apps-2.xml")).content) == ["https://show-your.app/apps/gamma"]
+    assert _locs((await client.get("/sitemaps/users-1.xml")).content) == ["https://show-your.app/users/maker"]
+    assert "https://show-your.app/agent-instructions" in _locs((await client.get("/sitemaps/pages.xml")).content)
+
+    assert (await client.get("/sitemaps/apps-3.xml")).status_code == 404
+    assert (await client.get("/sitemaps/apps-0.xml")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_only_changed_page_is_rebuilt(client: AsyncClient, db_session, engine, monkeypatch):
+    monkeypatch.setattr(settings, "SITEMAP_PAGE_SIZE", 2)
+    user, _ = await create_test_user(db_session, "maker", "maker@example.com")
+    await _add_apps(db_session, user, ["alpha", "beta", "gamma"])
+
+    first = await client.get("/sitemaps/apps-1.xml")
+    await client.get("/sitemaps/apps-2.xml")
+
+    # Cached pages cost one stamp query, not a rebuild
+    with QueryCounter(engine) as queries:
+        again = await client.get("/sitemaps/apps-1.xml")
+    assert again.content == first.content and queries.count == 1
+    not_modified = await client.get("/sitemaps/apps-1.xml", headers={"If-None-Match": again.headers["etag"]})
+    assert not_modified.status_code == 304
+
+    await _add_apps(db_session, user, ["delta"])
+    assert "etag" in (await client.get("/sitemaps/apps-1.xml")).headers
+    last = await client.get("/sitemaps/apps-2.xml")
+    assert "etag" not in last.headers  # rebuilt and streamed
+    assert _locs(last.content) == ["https://show-your.app/apps/gamma", "https://show-your.app/apps/delta"]
+
+
+@pytest.mark.asyncio
+async def test_edits_rebuild_the_page_and_advance_lastmod(client: AsyncClient, db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SITEMAP_PAGE_SIZE", 2)
+    user, _ = await create_test_user(db_session, "maker", "maker@example.com")
+    await _add_apps(db_session, user, ["alpha", "beta"])
+    app = (await db_session.execute(select(App).filter(App.slug == "alpha"))).scalars().one()
+    app.updated_at = app.created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    await db_session.commit()
+
+    first = await client.get("/sitemaps/apps-1.xml")
+    assert "<lastmod>2020-01-01</lastmod>" in first.text
+
+    app.slug = "alpha-renamed"
+    await db_session.commit()
+    renamed = await client.get("/sitemaps/apps-1.xml")
+    assert "https://show-your.app/apps/alpha-renamed" in _locs(renamed.content)
+    assert "<lastmod>2020-01-01</lastmod>" not in renamed.text
@@ -0,0 +1,143 @@
+"""Tests for set-based slug and username allocation."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+import app.services.slugs as slugs
+from app.agent.deps import AgentDeps
+from app.agent.tools import update_app
+from app.models import App, AppStatus, Tag, User
+from app.services.slugs import add_with_unique, allocate, next_free
+from tests.conftest import QueryCounter, create_test_user
+
+
+class _Ctx:
+    def __init__(self, deps: AgentDeps):
+        self.deps = deps
+
+
+def test_next_free_picks_lowest_unused_suffix():
+    assert next_free("todo", set()) == "todo"
+    assert next_free("todo", {"todo", "todo-1", "todo-3", "todo-list"}) == "todo-2"
+    assert next_free("bob", {"bob", "bob1", "bobby"}, separator="") == "bob2"
+
+
+@pytest.mark.asyncio
+async def test_allocate_uses_one_prefix_query(db_session, engine):
+    user, _ = await create_test_user(db_session)
+    for slug in ("todo-app", "todo-app-1", "todo-app-2", "todo-app-4", "todo-apps", "other"):
+        db_session.add(App(creator_id=user.id, title=slug, slug=slug, status=AppStatus.CONCEPT))
+    await db_session.commit()
+
+    with QueryCounter(engine) as queries:
+        slug = await allocate(db_session, App.slug, "todo-app")
+    assert slug == "todo-app-3"
+    assert queries.count == 1
+
+    # LIKE wildcards in the base are matched literally
+    assert await allocate(db_session, App.slug, "todo_app") == "todo_app"
+
+
+@pytest.mark.asyncio
+async def test_collision_retries_in_savepoint(db_session, monkeypatch):
+    user, _ = await create_test_user(db_session)
+    db_session.add(App(creator_id=user.id, title="Taken", slug="taken", status=AppStatus.CONCEPT))
+    await db_session.commit()
+
+    # Simulate a concurrent writer: the first allocation returns a value that is already taken
+    real_allocate = slugs.allocate
+    calls = []
+
+    async def racing_allocate(*args, **kwargs):
+        calls.append(1)
+        return "taken" if len(calls) == 1 else await real_allocate(*args, **kwargs)
+
+    monkeypatch.setattr(slugs, "allocate", racing_allocate)
+
+    tag = Tag(name="Kept")
+    db_session.add(tag)
+    await db_session.flush()
+    app = App(creator_id=user.id, title="Taken", status=AppStatus.CONCEPT)
+
+    assert await add_with_unique(db_session, app, "slug", App.slug, "taken") == "taken-1"
+    await db_session.commit()
+
+    assert len(calls) == 2
+    # Work done before the savepoint survives the rollback
+    assert tag.id is not None and app.id is not None
+
+
+@pytest.mark.asyncio
+async def test_create_and_fork_get_sequential_slugs(client: AsyncClient, auth_headers):
+    slugs_created = []
+    for _ in range(3):
+        response = await client.post("/apps/", json={"title": "Todo App", "prompt_text": "x"}, headers=auth_headers)
+        slugs_created.append(response.json()["slug"])
+    assert slugs_created == ["todo-app", "todo-app-1", "todo-app-2"]
+
+    app_id = (await client.get("/apps/todo-app")).json()["id"]
+    forks = [
+        (await client.post(f"/apps/{app_id}/fork", headers=auth_headers)).json()["slug"]
+        for _ in range(2)
+    ]
+    assert forks == ["todo-app-fork", "todo-app-fork-1"]
+
+
+@pytest.mark.asyncio
+async def test_agent_rename_keeps_own_slug(db_session):
+    user, _ = await create_test_user(db_session)
+    db_session.add_all([
+        App(creator_id=user.id, title="Notes", slug="notes", status=AppStatus.CONCEPT),
+        App(creator_id=user.id, title="Notes", slug="notes-1", status=AppStatus.CONCEPT),
+    ])
+    await db_session.commit()
+    ctx = _Ctx(AgentDeps(db=db_session, user_id=user.id, username=user.username, is_admin=True))
+    second_id = (await db_session.execute(select(App.id).filter(App.slug == "notes-1"))).scalar()
+
+    result = await update_app(ctx, second_id, title="Notes")
+    assert result["slug"] == "notes-1"
+
+    result = await update_app(ctx, second_id, title="Journal")
+    assert result["slug"] == "journal"
+
+
+@pytest.mark.asyncio
+async def test_username_allocation(db_session):
+    await create_test_user(db_session, "bob", "bob@example.com")
+    await create_test_user(db_session, "bob1", "bob1@example.com")
+
+    user = User(email="new@example.com", api_key="k")
+    await add_with_unique(db_session, user, "username", User.username, "bob", separator="")
+    assert user.username == "bob2"
+
+
+@pytest.mark.asyncio
+async def test_allocate_ignores_longer_words_sharing_the_prefix(db_session, engine):
+    user, _ = await create_test_user(db_session)
+    for slug in ("todo", "todolist", "todolist-1", "todo-2"):
+        db_session.add(App(creator_id=user.id, title=slug, slug=slug, status=AppStatus.CONCEPT))
+    await db_session.commit()
+
+    with QueryCounter(engine) as queries:
+        slug = await allocate(db_session, App.slug, "todo")
+    assert slug == "todo-1"
+    assert queries.count == 1
+
+
+@pytest.mark.asyncio
+async def test_other_unique_violations_are_not_retried(db_session, monkeypatch):
+    existing, _ = await create_test_user(db_session, username="first", email="dup@example.com")
+    calls = []
+    real_allocate = slugs.allocate
+
+    async def counting_allocate(*args, **kwargs):
+        calls.append(1)
+        return await real_allocate(*args, **kwargs)
+
+    monkeypatch.setattr(slugs, "allocate", counting_allocate)
+
+    user = User(email="dup@example.com")
+    with pytest.raises(IntegrityError):
+        await add_with_unique(db_session, user, "username", User.username, "second", separator="")
+    assert len(calls) == 1
@@ -0,0 +1,58 @@
+"""Tests for the process-level tag/tool cache and its ETags."""
+import pytest
+from httpx import AsyncClient
+
+from app.services.taxonomy import TAGS, taxonomy_cache, user_apps_key
+from tests.conftest import QueryCounter, create_test_user
+
+
+@pytest.mark.asyncio
+async def test_tags_are_cached_and_revalidated_with_etag(client: AsyncClient, engine, admin_headers):
+    await client.post("/tags/", json={"name": "AI"}, headers=admin_headers)
+
+    first = await client.get("/tags/")
+    assert first.status_code == 200
+    assert first.json()[0]["name"] == "AI"
+    etag = first.headers["etag"]
+
+    with QueryCounter(engine) as queries:
+        second = await client.get("/tags/")
+        not_modified = await client.get("/tags/", headers={"If-None-Match": etag})
+    assert second.json() == first.json()
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert queries.count == 0
+
+
+@pytest.mark.asyncio
+async def test_admin_crud_invalidates(client: AsyncClient, admin_headers):
+    created = (await client.post("/tools/", json={"name": "Cursor"}, headers=admin_headers)).json()
+    etag = (await client.get("/tools/")).headers["etag"]
+
+    await client.put(f"/tools/{created['id']}", json={"name": "Cursor IDE"}, headers=admin_headers)
+    response = await client.get("/tools/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [t["name"] for t in response.json()] == ["Cursor IDE"]
+
+    await client.delete(f"/tools/{created['id']}", headers=admin_headers)
+    assert (await client.get("/tools/")).json() == []
+
+
+@pytest.mark.asyncio
+async def test_fill_racing_an_invalidation_is_not_stored(db_session):
+    version = taxonomy_cache.version(TAGS)
+    taxonomy_cache.invalidate(TAGS)
+    taxonomy_cache._store(TAGS, version, [{"id": 1, "name": "stale"}])
+    assert taxonomy_cache._fresh(TAGS) is None
+
+
+@pytest.mark.asyncio
+async def test_user_apps_list_invalidated_by_app_changes(client: AsyncClient, db_session):
+    user, headers = await create_test_user(db_session, "maker", "maker@example.com")
+
+    assert (await taxonomy_cache.user_apps(db_session, user.id)).data == []
+    await client.post("/apps/", json={"title": "New", "prompt_text": "x"}, headers=headers)
+
+    assert taxonomy_cache._fresh(user_apps_key(user.id)) is None
+    apps = (await taxonomy_cache.user_apps(db_session, user.id)).data
+    assert [a["title"] for a in apps] == ["New"]
@@ -1,4 +1,4 @@
-import type { Tag, Tool, App } from '~/lib/types';
+import type { Tag, Tool, App, AppFacets, FacetCount } from '~/lib/types';
 import MultiSelect from '~/components/common/MultiSelect';
 
 interface FilterBarProps {
@@ -7,6 +7,9 @@ interface FilterBarProps {
     selectedTagIds: number[];
     selectedToolIds: number[];
     selectedStatuses: App['status'][];
+    facets?: AppFacets | null;
+    matchAll: boolean;
+    onMatchAllChange: (matchAll: boolean) => void;
     onChange: (selected: { tagIds: number[]; toolIds: number[]; statuses: App['status'][] }) => void;
 }
 
@@ -16,12 +19,22 @@ const statusOptions: { id: string; name: string }[] = [
     { id: 'Live', name: 'Live' },
 ];
 
+// Show how many of the current results carry each tag/tool
+function withCounts<T extends { id: number; name: string }>(items: T[], counts?: FacetCount[]): T[] {
+    if (!counts) return items;
+    const byId = new Map(counts.map(c => [c.id, c.count]));
+    return items.map(item => ({ ...item, name: `${item.name} (${byId.get(item.id) ?? 0})` }));
+}
+
 export default function FilterBar({
     tags,
     tools,
     selectedTagIds,
     selectedToolIds,
     selectedStatuses,
+    facets,
+    matchAll,
+    onMatchAllChange,
     onChange,
 }: FilterBarProps) {
     const handleTagsChange = (newTagIds: number[]) => {
@@ -65,7 +78,7 @@ export default function FilterBar({
                 label="Tags"
                 icon="sell"
                 placeholder="Search tags..."
-                items={tags}
+                items={withCounts(tags, facets?.tags)}
                 selectedIds={selectedTagIds}
                 onChange={handleTagsChange}
                 color="primary"
@@ -74,11 +87,20 @@ export default function FilterBar({
                 label="Tools"
                 icon="build"
                 placeholder="Search tools..."
-                items={tools}
+                items={withCounts(tools, facets?.tools)}
                 selectedIds={selectedToolIds}
                 onChange={handleToolsChange}
                 color="purple"
             />
+            {(selectedTagIds.length > 1 || selectedToolIds.length > 1) && (
+                <button
+                    onClick={() => onMatchAllChange(!matchAll)}
+                    title={matchAll ? 'Apps must have every selected tag and tool' : 'Apps need any of the selected tags and tools'}
+                    className="inline-flex h-7 items-center rounded-full border border-gray-200 dark:border-gray-700 px-3 text-[12px] font-medium text-gray-600 dark:text-gray-300 hover:border-primary hover:text-primary transition-colors whitespace-nowrap"
+                >
+                    {matchAll ? 'Match all' : 'Match any'}
+                </button>
+            )}
         </div>
     );
 }
@@ -1,5 +1,5 @@
 import api from '../api';
-import type { App, AppCreate, Comment, CommentCreate, Tag, Tool, OwnershipClaim, DeadAppReport, DeadAppReportCreate, DeadAppReportResolve } from '../types';
+import type { App, AppCreate, AppFacets, Comment, CommentCreate, Tag, Tool, OwnershipClaim, DeadAppReport, DeadAppReportCreate, DeadAppReportResolve } from '../types';
 
 export interface AppQueryParams {
     skip?: number;
@@ -8,6 +8,8 @@ export interface AppQueryParams {
     tag_id?: number | number[];
     tool?: string;
     tag?: string;
+    // Selected tags (tools) must all match, or any of them
+    match?: 'any' | 'all';
     search?: string;
     status?: 'Concept' | 'WIP' | 'Live';
     creator_id?: number;
@@ -47,6 +49,11 @@ export const appService = {
         };
     },
 
+    getFacets: async (params?: Omit<AppQueryParams, 'skip' | 'limit' | 'sort_by'>): Promise<AppFacets> => {
+        const response = await api.get('/apps/facets', { params });
+        return response.data;
+    },
+
     getApp: async (id: number | string): Promise<App> => {
         const response = await api.get(`/apps/${id}`);
         return response.data;
@@ -6,6 +6,19 @@ export interface MediaResponse {
     upload_url: string;
     download_url: string;
     file_key: string;
+    exists: boolean;
+}
+
+async function sha256Digest(file: Blob): Promise<ArrayBuffer> {
+    return crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+}
+
+function toHex(digest: ArrayBuffer): string {
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+function toBase64(digest: ArrayBuffer): string {
+    return btoa(String.fromCharCode(...new Uint8Array(digest)));
 }
 
 export const mediaService = {
@@ -17,6 +30,39 @@ export const mediaService = {
         return response.data;
     },
 
+    /**
+     * Compress and upload several images, returning their download URLs in input order.
+     * Files are keyed by content hash: one presign request covers the whole batch and
+     * images already in storage are not uploaded again.
+     */
+    uploadFiles: async (files: File[]): Promise<string[]> => {
+        const prepared = await Promise.all(files.map(async (file) => {
+            const compressed = await compressImage(file);
+            return { file: compressed, name: file.name, digest: await sha256Digest(compressed) };
+        }));
+
+        const response = await api.post('/media/presigned-urls', {
+            files: prepared.map(p => ({
+                filename: p.name,
+                content_type: p.file.type,
+                sha256: toHex(p.digest)
+            }))
+        });
+        const items: MediaResponse[] = response.data.items;
+
+        await Promise.all(prepared.map(async (p, i) => {
+            if (items[i].exists) return;
+            await axios.put(items[i].upload_url, p.file, {
+                headers: {
+                    'Content-Type': p.file.type,
+                    'x-amz-checksum-sha256': toBase64(p.digest)
+                }
+            });
+        }));
+
+        return items.map(item => item.download_url);
+    },
+
     /**
      * Upload a file to S3. If it's an image, it will be compressed to under 200KB first.
      */
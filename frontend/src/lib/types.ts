@@ -82,6 +82,18 @@ export interface ToolWithCount extends Tool {
     app_count: number;
 }
 
+export interface FacetCount {
+    id: number;
+    name: string;
+    count: number;
+}
+
+export interface AppFacets {
+    total: number;
+    tags: FacetCount[];
+    tools: FacetCount[];
+}
+
 export interface AppMedia {
     id: number;
     app_id: number;
@@ -171,7 +183,7 @@ export type ReportStatus = 'pending' | 'confirmed' | 'dismissed';
 export interface DeadAppReport {
     id: number;
     app_id: number;
-    reporter_id: number;
+    reporter_id: number | null;  // null when filed by the link prober
     reason?: string;
     status: ReportStatus;
     created_at: string;
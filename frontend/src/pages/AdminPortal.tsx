@@ -851,9 +851,13 @@ export default function AdminPortal() {
                                                         <div className="flex items-center gap-1.5 text-slate-600 dark:text-slate-300">
                                                             <User size={14} className="text-slate-400" />
                                                             <span>Reported by</span>
-                                                            <span className="text-primary font-bold hover:underline cursor-pointer" onClick={(e) => { e.stopPropagation(); navigate(`/users/${report.reporter?.username}`); }}>
-                                                                @{report.reporter?.username || 'unknown'}
-                                                            </span>
+                                                            {report.reporter ? (
+                                                                <span className="text-primary font-bold hover:underline cursor-pointer" onClick={(e) => { e.stopPropagation(); navigate(`/users/${report.reporter?.username}`); }}>
+                                                                    @{report.reporter.username}
+                                                                </span>
+                                                            ) : (
+                                                                <span className="font-bold">link checker</span>
+                                                            )}
                                                         </div>
                                                         <div className="flex items-center gap-1.5 text-slate-500">
                                                             <Clock size={14} className="text-slate-400" />
@@ -117,11 +117,8 @@ export default function CreateApp() {
 
             // 2. Upload Images if any
             if (files.length > 0) {
-                const uploadPromises = files.map(async (file) => {
-                    const { upload_url, download_url } = await mediaService.getPresignedUrl(file.name, file.type);
-                    await mediaService.uploadFile(file, upload_url);
-                    await mediaService.linkMediaToApp(newApp.id, download_url);
-                });
+                const downloadUrls = await mediaService.uploadFiles(files);
+                const uploadPromises = downloadUrls.map(url => mediaService.linkMediaToApp(newApp.id, url));
 
                 await Promise.all(uploadPromises);
             }
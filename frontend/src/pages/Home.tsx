@@ -1,7 +1,7 @@
 import { useEffect, useState, useCallback, useRef, useLayoutEffect, useMemo } from 'react';
 import { useSearchParams } from 'react-router-dom';
 import { appService, type AppQueryParams } from '~/lib/services/app-service';
-import type { App, Tag, Tool } from '~/lib/types';
+import type { App, AppFacets, Tag, Tool } from '~/lib/types';
 import AppCard from '~/components/apps/AppCard';
 import AppCardSkeleton from '~/components/apps/AppCardSkeleton';
 import FilterBar from '~/components/apps/FilterBar';
@@ -75,6 +75,7 @@ export default function Home() {
     const getInitialStatuses = () => parseParams(searchParams.get('status')) as App['status'][];
     const getInitialSort = (): SortOption => (searchParams.get('sort_by') as SortOption) || 'trending';
     const getInitialSearch = () => searchParams.get('search') || '';
+    const getInitialMatchAll = () => searchParams.get('match') === 'all';
 
     const [apps, setApps] = useState<App[]>([]);
     const [loading, setLoading] = useState(true);
@@ -86,6 +87,8 @@ export default function Home() {
     const [selectedStatuses, setSelectedStatuses] = useState<App['status'][]>(getInitialStatuses);
     const [sortBy, setSortBy] = useState<SortOption>(getInitialSort);
     const [searchQuery, setSearchQuery] = useState(getInitialSearch);
+    const [matchAll, setMatchAll] = useState(getInitialMatchAll);
+    const [facets, setFacets] = useState<AppFacets | null>(null);
     const [page, setPage] = useState(1);
     const [hasMore, setHasMore] = useState(true);
     const [showSortDropdown, setShowSortDropdown] = useState(false);
@@ -144,8 +147,23 @@ export default function Home() {
         if (searchQuery) {
             newParams.set('search', searchQuery);
         }
+        if (matchAll) {
+            newParams.set('match', 'all');
+        }
         setSearchParams(newParams, { replace: true });
-    }, [selectedTagIds, selectedToolIds, selectedStatuses, sortBy, searchQuery, setSearchParams]);
+    }, [selectedTagIds, selectedToolIds, selectedStatuses, sortBy, searchQuery, matchAll, setSearchParams]);
+
+    // Filter params shared by the app list and the facet counts
+    const filterParams = useMemo(() => {
+        const params: AppQueryParams = {};
+        if (searchQuery) params.search = searchQuery;
+        if (selectedTagIds.length > 0) params.tag_id = selectedTagIds;
+        if (selectedToolIds.length > 0) params.tool_id = selectedToolIds;
+        // Backend only supports a single status filter
+        if (selectedStatuses.length > 0) params.status = selectedStatuses[0];
+        if (matchAll) params.match = 'all';
+        return params;
+    }, [searchQuery, selectedTagIds, selectedToolIds, selectedStatuses, matchAll]);
 
     const fetchApps = useCallback(async (isInitial: boolean = false) => {
         if (isInitial) {
@@ -156,35 +174,12 @@ export default function Home() {
 
         try {
             const params: AppQueryParams = {
+                ...filterParams,
                 skip: ((isInitial ? 1 : page) - 1) * itemsPerPage,
                 limit: itemsPerPage,
                 sort_by: sortBy,
             };
 
-            // Add search if present
-            if (searchQuery) {
-                params.search = searchQuery;
-            }
-
-            // Add multi-select filters
-            if (selectedTagIds.length > 0) {
-                params.tag_id = selectedTagIds;
-            }
-            if (selectedToolIds.length > 0) {
-                params.tool_id = selectedToolIds;
-            }
-            if (selectedStatuses.length > 0) {
-                // Backend usually takes single status or we might need to handle multi-status if supported
-                // For now backend schemas.py line 68 shows status: Optional[AppStatus]
-                // Let's check how backend handles it. 
-                // Currently backend only supports single status filter in get_apps.
-                // We'll just take the first one or pass as list if backend updated.
-                // Looking at apps.py:115: if status: query = query.filter(App.status == status)
-                // It only supports one. Let's send the first one or we can update backend.
-                // For now, let's keep it consistent with what backend supports.
-                params.status = selectedStatuses[0];
-            }
-
             const { apps: data, newestAppId: newNewestId } = await appService.getApps(params);
 
             if (isInitial) {
@@ -204,7 +199,7 @@ export default function Home() {
             setLoading(false);
             setLoadingMore(false);
         }
-    }, [page, sortBy, selectedTagIds, selectedToolIds, selectedStatuses, searchQuery]);
+    }, [page, sortBy, filterParams]);
 
     // Load filter data (tags, tools) on mount - service handles caching/deduplication
     useEffect(() => {
@@ -223,6 +218,15 @@ export default function Home() {
         loadInitialData();
     }, []);
 
+    // Facet counts for the current filters
+    useEffect(() => {
+        let cancelled = false;
+        appService.getFacets(filterParams)
+            .then(data => { if (!cancelled) setFacets(data); })
+            .catch(err => console.error('Failed to fetch facet counts:', err));
+        return () => { cancelled = true; };
+    }, [filterParams]);
+
     // Check cache on mount and restore if valid - this is the ONLY place that triggers initial fetch
     useEffect(() => {
         if (didInitialFetch.current) return;
@@ -271,7 +275,7 @@ export default function Home() {
         setHasMore(true);
         fetchApps(true);
         // eslint-disable-next-line react-hooks/exhaustive-deps
-    }, [sortBy, selectedTagIds, selectedToolIds, selectedStatuses]);
+    }, [sortBy, selectedTagIds, selectedToolIds, selectedStatuses, matchAll]);
 
     // Fetch more when page changes (infinite scroll)
     useEffect(() => {
@@ -457,6 +461,12 @@ export default function Home() {
                             selectedTagIds={selectedTagIds}
                             selectedToolIds={selectedToolIds}
                             selectedStatuses={selectedStatuses}
+                            facets={facets}
+                            matchAll={matchAll}
+                            onMatchAllChange={(value) => {
+                                setCacheRestored(false);
+                                setMatchAll(value);
+                            }}
                             onChange={handleFilterChange}
                         />
 